@@ -16,6 +16,7 @@ Hướng dẫn sử dụng:
 
 import os
 from pathlib import Path
+from typing import Any, Dict, Optional
 
 # =============================================================================
 # DATABASE SETTINGS
@@ -58,3 +59,128 @@ CONNECTION_TIMEOUT = 30
 
 # Cho phép multi-threading
 CHECK_SAME_THREAD = False
+
+# =============================================================================
+# PERFORMANCE PROFILES
+# =============================================================================
+# Biến môi trường chọn profile (VD: ATTENDANCE_DB_PROFILE=durable)
+DB_PROFILE_ENV = "ATTENDANCE_DB_PROFILE"
+
+# Profile mặc định nếu không cấu hình
+DEFAULT_DB_PROFILE = "balanced"
+
+# Các PRAGMA được áp dụng cho mỗi connection trong pool.
+# journal_mode luôn là WAL vì connection pool dựa vào WAL để reader
+# không bị chặn bởi writer.
+#   - durable:   fsync mỗi commit, an toàn tuyệt đối khi mất điện
+#   - balanced:  fsync khi checkpoint (an toàn khi app crash), cache lớn hơn
+#   - bulk-load: không fsync, cache/mmap lớn - chỉ dùng khi seed/import dữ liệu
+PERFORMANCE_PROFILES = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,             # KiB (~8 MB)
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 30000,           # ms
+        "wal_autocheckpoint": 1000,      # pages
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,            # KiB (~32 MB)
+        "mmap_size": 134217728,          # 128 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+        "wal_autocheckpoint": 1000,
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -128000,           # KiB (~128 MB)
+        "mmap_size": 268435456,          # 256 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 60000,
+        "wal_autocheckpoint": 10000,
+    },
+}
+
+
+def get_performance_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Lấy cấu hình PRAGMA của một performance profile.
+    
+    Args:
+        name: Tên profile (mặc định: biến môi trường ATTENDANCE_DB_PROFILE
+              hoặc "balanced")
+        
+    Returns:
+        Dict tên PRAGMA -> giá trị
+        
+    Raises:
+        ValueError: Nếu tên profile không tồn tại
+        
+    Example:
+        >>> get_performance_profile("durable")["synchronous"]
+        'FULL'
+    """
+    profile_name = name or os.getenv(DB_PROFILE_ENV, DEFAULT_DB_PROFILE)
+    if profile_name not in PERFORMANCE_PROFILES:
+        raise ValueError(
+            f"Invalid database profile: '{profile_name}'. "
+            f"Valid profiles: {list(PERFORMANCE_PROFILES)}"
+        )
+    return dict(PERFORMANCE_PROFILES[profile_name])
+
+# =============================================================================
+# BULK OPERATIONS
+# =============================================================================
+# Số dòng mỗi lần executemany trong create_many/upsert_many
+BULK_BATCH_SIZE = 1000
+
+# Số tham số tối đa mỗi câu lệnh khi không đọc được giới hạn từ connection
+# (SQLITE_MAX_VARIABLE_NUMBER mặc định của SQLite < 3.32)
+SQLITE_MAX_VARIABLES = 999
+
+# =============================================================================
+# ATTENDANCE INGESTION
+# =============================================================================
+# Số submission tối đa gộp vào một transaction của AttendanceIngestionQueue
+INGEST_BATCH_SIZE = 200
+
+# Thời gian tối đa (ms) writer chờ gom thêm submission trước khi ghi batch
+INGEST_MAX_LINGER_MS = 10.0
+
+# Số submission tối đa đang chờ trong queue (đầy -> trả về "hệ thống đang bận")
+INGEST_QUEUE_SIZE = 10000
+
+# =============================================================================
+# ENTITY CACHE
+# =============================================================================
+# Thời gian sống (giây) của entity trong cache của repository
+ENTITY_CACHE_TTL = 60.0
+
+# Số entity tối đa mỗi bảng (0 = tắt cache cho bảng đó)
+ENTITY_CACHE_SIZES = {
+    "classes": 512,
+    "attendance_sessions": 2048,
+    "users": 2048,
+}
+
+# =============================================================================
+# ADMIN DASHBOARD
+# =============================================================================
+# Thời gian (giây) giữ snapshot thống kê của admin dashboard (0 = không cache)
+ADMIN_DASHBOARD_CACHE_TTL = 5.0
+
+# =============================================================================
+# QUERY INSTRUMENTATION
+# =============================================================================
+# Bật profiler khi khởi tạo Database (VD: ATTENDANCE_DB_PROFILING=1)
+QUERY_PROFILING_ENV = "ATTENDANCE_DB_PROFILING"
+
+# Câu lệnh chạy lâu hơn ngưỡng này (ms) được ghi vào slow-query log
+SLOW_QUERY_MS = float(os.getenv("ATTENDANCE_SLOW_QUERY_MS", "100"))
+
+# Số slow query giữ lại trong bộ nhớ
+SLOW_QUERY_LOG_SIZE = 200
@@ -14,7 +14,7 @@ from datetime import datetime
 
 from core.models import Student
 from core.exceptions import ValidationError, NotFoundError, AuthenticationError
-from services import StudentService
+from services import StudentService, AttendanceIngestionQueue
 
 
 class StudentController:
@@ -22,16 +22,24 @@ class StudentController:
     Controller xử lý student requests.
     """
     
-    def __init__(self, student_service: StudentService, auth_service=None):
+    def __init__(
+        self,
+        student_service: StudentService,
+        auth_service=None,
+        ingestion: Optional[AttendanceIngestionQueue] = None
+    ):
         """
         Khởi tạo StudentController.
         
         Args:
             student_service: StudentService instance
             auth_service: AuthService instance (optional but recommended)
+            ingestion: AttendanceIngestionQueue (optional) - nếu có, submit
+                điểm danh được ghi theo batch thay vì mỗi submit một transaction
         """
         self.student_service = student_service
         self.auth_service = auth_service
+        self.ingestion = ingestion
     
     # ... (existing methods omitted for brevity, ensure they are kept) ...
 
@@ -192,11 +200,18 @@ class StudentController:
             return {"success": False, "message": "Session ID không hợp lệ"}
 
         try:
-            success, message = self.student_service.submit_attendance(
-                student_code.strip(),
-                session_id.strip(),
-                verification_data
-            )
+            if self.ingestion is not None:
+                success, message = self.ingestion.submit(
+                    student_code.strip(),
+                    session_id.strip(),
+                    verification_data
+                ).result()
+            else:
+                success, message = self.student_service.submit_attendance(
+                    student_code.strip(),
+                    session_id.strip(),
+                    verification_data
+                )
             return {"success": success, "message": message}
         except Exception as e:
             return {"success": False, "message": f"Lỗi hệ thống: {str(e)}"}
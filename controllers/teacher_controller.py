@@ -60,8 +60,10 @@ class TeacherController:
             >>> print(stats['total_classes'])
             >>> print(stats['active_sessions'])
         """
-        # Get teacher's classes
-        classes = self.classroom_repo.find_by_teacher(teacher.teacher_code)
+        # Get teacher's classes (kèm sĩ số, một query cho mọi lớp)
+        classes = self.classroom_repo.hydrate_students(
+            self.classroom_repo.find_by_teacher(teacher.teacher_code), count_only=True
+        )
         
         # Get recent sessions
         recent_sessions = self.session_service.get_sessions_by_teacher(teacher.teacher_code, limit=10)
@@ -73,16 +75,16 @@ class TeacherController:
         total_rate = 0
         valid_sessions = 0
         
-        for session in recent_sessions:
-            report = self.session_service.get_session_report(session.session_id)
-            if report and report['total_students'] > 0:
+        reports = self.session_service.get_session_reports([s.session_id for s in recent_sessions])
+        for report in reports.values():
+            if report['total_students'] > 0:
                 total_rate += report['attendance_rate']
                 valid_sessions += 1
         
         avg_attendance_rate = (total_rate / valid_sessions) if valid_sessions > 0 else 0
         
         # Total students across all classes
-        total_students = sum(len(c.student_codes) for c in classes)
+        total_students = sum(c.student_count for c in classes)
         
         return {
             "teacher_name": teacher.full_name,
@@ -216,6 +218,21 @@ class TeacherController:
         
         return self.session_service.get_session_report(session_id)
     
+    def get_session_reports(self, teacher: Teacher, session_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Lấy báo cáo điểm danh của nhiều session (số query không đổi theo số session).
+        
+        Args:
+            teacher: Teacher object
+            session_ids: Các mã phiên
+            
+        Returns:
+            Dict session_id -> báo cáo; session không thuộc lớp của giáo viên bị bỏ qua
+        """
+        owned = {c.class_id for c in self.classroom_repo.find_by_teacher(teacher.teacher_code)}
+        reports = self.session_service.get_session_reports(session_ids)
+        return {sid: report for sid, report in reports.items() if report["class_id"] in owned}
+    
     def mark_manual_attendance(
         self,
         teacher: Teacher,
@@ -248,7 +265,7 @@ class TeacherController:
             return False, "Bạn không có quyền điểm danh phiên này"
         
         # Verify student in class
-        if student_code not in classroom.student_codes:
+        if not self.classroom_repo.is_student_in_class(classroom.class_id, student_code):
             return False, "Sinh viên không thuộc lớp này"
         
         # Mark attendance
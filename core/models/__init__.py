@@ -7,6 +7,9 @@ Package chứa các data models (entity classes):
 - classroom.py: Class model
 - attendance_session.py: AttendanceSession model
 - attendance_record.py: AttendanceRecord model
+- attendance_record_batch.py: AttendanceRecordBatch (records dạng cột)
+- attendance_history_row.py: AttendanceHistoryRow (read model record + session + class)
+- attendance_submission.py: AttendanceSubmission (một lần submit chưa được ghi)
 
 Cách sử dụng:
     from core.models import User, Teacher, Student, AttendanceSession
@@ -16,8 +19,12 @@ from .user import User, Admin, Teacher, Student
 from .classroom import Classroom
 from .attendance_session import AttendanceSession
 from .attendance_record import AttendanceRecord
+from .attendance_record_batch import AttendanceRecordBatch
+from .attendance_history_row import AttendanceHistoryRow
+from .attendance_submission import AttendanceSubmission
 
 __all__ = [
     "User", "Admin", "Teacher", "Student",
-    "Classroom", "AttendanceSession", "AttendanceRecord"
+    "Classroom", "AttendanceSession", "AttendanceRecord", "AttendanceRecordBatch",
+    "AttendanceHistoryRow", "AttendanceSubmission"
 ]
@@ -0,0 +1,53 @@
+"""
+Attendance History Row - Read model lịch sử điểm danh
+=====================================================
+
+Một dòng lịch sử điểm danh đã join sẵn record + session + class, dùng cho
+các màn hình chỉ đọc (history, dashboard, export) thay vì tra session/class
+cho từng record.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from core.enums import AttendanceStatus
+
+
+@dataclass(slots=True, frozen=True)
+class AttendanceHistoryRow:
+    """
+    Read model: một record điểm danh kèm thông tin buổi học và lớp.
+
+    Attributes:
+        record_id: Mã bản ghi
+        session_id: Mã phiên điểm danh
+        student_code: Mã sinh viên
+        status: Trạng thái (PRESENT, ABSENT)
+        attendance_time: Thời gian điểm danh (None nếu vắng)
+        remark: Ghi chú
+        class_id: Mã lớp (None nếu session không còn tồn tại)
+        class_name: Tên lớp (None nếu lớp không còn tồn tại)
+        session_start: Giờ bắt đầu buổi học
+        session_end: Giờ kết thúc buổi học
+
+    Example:
+        >>> rows = record_repo.find_history_rows("SV001", limit=20)
+        >>> rows[0].class_name
+        'Nhập môn Lập trình Python'
+    """
+
+    record_id: str
+    session_id: str
+    student_code: str
+    status: AttendanceStatus
+    attendance_time: Optional[datetime]
+    remark: Optional[str]
+    class_id: Optional[str]
+    class_name: Optional[str]
+    session_start: Optional[datetime]
+    session_end: Optional[datetime]
+
+    def is_present(self) -> bool:
+        """Kiểm tra sinh viên có mặt không."""
+        return self.status == AttendanceStatus.PRESENT
@@ -12,7 +12,7 @@ from typing import Optional
 from core.enums import AttendanceStatus
 
 
-@dataclass
+@dataclass(slots=True)
 class AttendanceRecord:
     """
     Model đại diện cho một bản ghi điểm danh.
@@ -32,6 +32,9 @@ class AttendanceRecord:
         ...     student_code="SV001",
         ...     status=AttendanceStatus.PRESENT
         ... )
+    
+    Note:
+        slots=True: không có __dict__, giảm bộ nhớ khi load hàng triệu records.
     """
     
     record_id: str
@@ -51,6 +54,32 @@ class AttendanceRecord:
         if not self.student_code:
             raise ValueError("Student code không được để trống")
     
+    @classmethod
+    def trusted(
+        cls,
+        record_id: str,
+        session_id: str,
+        student_code: str,
+        status: AttendanceStatus,
+        attendance_time: Optional[datetime] = None,
+        remark: Optional[str] = None,
+        created_at: Optional[datetime] = None
+    ) -> "AttendanceRecord":
+        """
+        Tạo record từ dữ liệu tin cậy (row trong DB), bỏ qua __post_init__.
+        
+        Chỉ dùng khi hydrate từ repository: dữ liệu đã được validate lúc ghi.
+        """
+        record = object.__new__(cls)
+        record.record_id = record_id
+        record.session_id = session_id
+        record.student_code = student_code
+        record.status = status
+        record.attendance_time = attendance_time
+        record.remark = remark
+        record.created_at = created_at or datetime.now()
+        return record
+    
     def mark_present(self, time: Optional[datetime] = None) -> None:
         """
         Đánh dấu có mặt.
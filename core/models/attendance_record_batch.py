@@ -0,0 +1,146 @@
+"""
+Attendance Record Batch - Records dạng cột
+==========================================
+
+Container lưu nhiều bản ghi điểm danh theo cột (các list song song) thay
+vì một object cho mỗi record. Dùng cho analytics / export khối lượng lớn:
+- Không tạo object AttendanceRecord cho từng dòng
+- session_id / student_code lặp lại được intern, dùng chung một string
+- Thống kê (đếm theo status, theo sinh viên) chạy trực tiếp trên cột
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.enums import AttendanceStatus
+from .attendance_record import AttendanceRecord
+
+
+class AttendanceRecordBatch:
+    """
+    Tập attendance records lưu theo cột.
+
+    Attributes:
+        record_ids: Mã bản ghi
+        session_ids: Mã phiên điểm danh
+        student_codes: Mã sinh viên
+        statuses: Trạng thái (AttendanceStatus)
+        attendance_times: Thời gian điểm danh (None nếu vắng)
+        remarks: Ghi chú
+
+    Example:
+        >>> batch = AttendanceRecordBatch()
+        >>> batch.append("REC001", "SS001", "SV001", AttendanceStatus.PRESENT)
+        >>> batch.count_by_status()
+        {'PRESENT': 1, 'ABSENT': 0}
+        >>> batch.record(0).student_code
+        'SV001'
+    """
+
+    __slots__ = (
+        "record_ids", "session_ids", "student_codes",
+        "statuses", "attendance_times", "remarks", "_strings"
+    )
+
+    def __init__(self):
+        """Khởi tạo batch rỗng."""
+        self.record_ids: List[str] = []
+        self.session_ids: List[str] = []
+        self.student_codes: List[str] = []
+        self.statuses: List[AttendanceStatus] = []
+        self.attendance_times: List[Optional[datetime]] = []
+        self.remarks: List[Optional[str]] = []
+        # Bảng intern cho các giá trị lặp lại (session_id, student_code)
+        self._strings: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.record_ids)
+
+    def append(
+        self,
+        record_id: str,
+        session_id: str,
+        student_code: str,
+        status: AttendanceStatus,
+        attendance_time: Optional[datetime] = None,
+        remark: Optional[str] = None
+    ) -> None:
+        """Thêm một record vào cuối batch."""
+        intern = self._strings.setdefault
+        self.record_ids.append(record_id)
+        self.session_ids.append(intern(session_id, session_id))
+        self.student_codes.append(intern(student_code, student_code))
+        self.statuses.append(status)
+        self.attendance_times.append(attendance_time)
+        self.remarks.append(remark)
+
+    def extend_rows(
+        self,
+        rows: Iterable[Tuple[str, str, str, AttendanceStatus, Optional[datetime], Optional[str]]]
+    ) -> None:
+        """
+        Thêm nhiều dòng (record_id, session_id, student_code, status,
+        attendance_time, remark) - status đã là AttendanceStatus.
+        """
+        intern = self._strings.setdefault
+        record_ids, session_ids = self.record_ids, self.session_ids
+        student_codes, statuses = self.student_codes, self.statuses
+        attendance_times, remarks = self.attendance_times, self.remarks
+
+        for record_id, session_id, student_code, status, attendance_time, remark in rows:
+            record_ids.append(record_id)
+            session_ids.append(intern(session_id, session_id))
+            student_codes.append(intern(student_code, student_code))
+            statuses.append(status)
+            attendance_times.append(attendance_time)
+            remarks.append(remark)
+
+    @classmethod
+    def from_records(cls, records: Iterable[AttendanceRecord]) -> "AttendanceRecordBatch":
+        """Tạo batch từ các AttendanceRecord."""
+        batch = cls()
+        batch.extend_rows(
+            (r.record_id, r.session_id, r.student_code, r.status, r.attendance_time, r.remark)
+            for r in records
+        )
+        return batch
+
+    def record(self, index: int) -> AttendanceRecord:
+        """Dựng AttendanceRecord cho dòng thứ index (chỉ khi thật sự cần object)."""
+        return AttendanceRecord.trusted(
+            self.record_ids[index],
+            self.session_ids[index],
+            self.student_codes[index],
+            self.statuses[index],
+            self.attendance_times[index],
+            self.remarks[index]
+        )
+
+    def iter_records(self) -> Iterator[AttendanceRecord]:
+        """Duyệt batch dưới dạng AttendanceRecord (tạo từng object khi duyệt)."""
+        for index in range(len(self)):
+            yield self.record(index)
+
+    def rows(self) -> Iterator[Tuple]:
+        """Duyệt các dòng dạng tuple (status.value, thời gian ISO) - dùng cho export."""
+        for record_id, session_id, student_code, status, attendance_time, remark in zip(
+            self.record_ids, self.session_ids, self.student_codes,
+            self.statuses, self.attendance_times, self.remarks
+        ):
+            yield (
+                record_id, session_id, student_code, status.value,
+                attendance_time.isoformat() if attendance_time else None, remark
+            )
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Đếm số records theo trạng thái."""
+        counts = Counter(self.statuses)
+        return {status.value: counts.get(status, 0) for status in AttendanceStatus}
+
+    def present_by_student(self) -> Dict[str, int]:
+        """Đếm số buổi có mặt của mỗi sinh viên."""
+        present = AttendanceStatus.PRESENT
+        return dict(Counter(
+            code for code, status in zip(self.student_codes, self.statuses) if status is present
+        ))
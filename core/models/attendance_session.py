@@ -19,7 +19,7 @@ class SessionStatus(Enum):
     CLOSED = "CLOSED"
 
 
-@dataclass
+@dataclass(slots=True)
 class AttendanceSession:
     """
     Model đại diện cho một phiên điểm danh.
@@ -65,6 +65,40 @@ class AttendanceSession:
         if self.end_time <= self.start_time:
             raise ValueError("End time phải sau start time")
     
+    @classmethod
+    def trusted(
+        cls,
+        session_id: str,
+        class_id: str,
+        start_time: datetime,
+        end_time: datetime,
+        method: AttendanceMethod,
+        status: SessionStatus,
+        attendance_link: Optional[str] = None,
+        token: Optional[str] = None,
+        qr_window_minutes: int = 1,
+        late_window_minutes: int = 15,
+        created_at: Optional[datetime] = None
+    ) -> "AttendanceSession":
+        """
+        Tạo session từ dữ liệu tin cậy (row trong DB), bỏ qua __post_init__.
+        
+        Chỉ dùng khi hydrate từ repository: dữ liệu đã được validate lúc ghi.
+        """
+        session = object.__new__(cls)
+        session.session_id = session_id
+        session.class_id = class_id
+        session.start_time = start_time
+        session.end_time = end_time
+        session.method = method
+        session.status = status
+        session.attendance_link = attendance_link
+        session.token = token
+        session.qr_window_minutes = qr_window_minutes
+        session.late_window_minutes = late_window_minutes
+        session.created_at = created_at or datetime.now()
+        return session
+    
     def is_open(self) -> bool:
         """Kiểm tra phiên còn mở không."""
         return self.status == SessionStatus.OPEN
@@ -0,0 +1,37 @@
+"""
+Attendance Submission - Một lần submit điểm danh
+================================================
+
+Dữ liệu một lần sinh viên submit điểm danh, dùng khi nhiều submit được gom
+lại và ghi cùng một transaction (ingestion queue).
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass(slots=True, frozen=True)
+class AttendanceSubmission:
+    """
+    Một lần submit điểm danh chưa được ghi.
+
+    Attributes:
+        student_code: Mã sinh viên
+        session_id: Mã phiên điểm danh
+        verification_data: Token hoặc dữ liệu QR (tùy phương thức)
+        idempotency_key: Key retry của client
+        submitted_at: Thời điểm sinh viên submit (dùng làm attendance_time,
+                      không phải thời điểm được ghi xuống database)
+
+    Example:
+        >>> submission = AttendanceSubmission("SV001", "SS001", "TOKEN")
+        >>> student_service.submit_attendance_many([submission])
+        [(True, 'Điểm danh thành công!')]
+    """
+
+    student_code: str
+    session_id: str
+    verification_data: Optional[str] = None
+    idempotency_key: Optional[str] = None
+    submitted_at: datetime = field(default_factory=datetime.now)
@@ -6,10 +6,10 @@ Classroom Model - Model lớp học
 """
 
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Iterable, Optional, Set
 
 
-@dataclass
+@dataclass(slots=True)
 class Classroom:
     """
     Model đại diện cho một lớp học.
@@ -19,7 +19,11 @@ class Classroom:
         class_name: Tên lớp học
         subject_code: Mã môn học
         teacher_code: Mã giáo viên phụ trách
-        student_codes: Danh sách mã sinh viên trong lớp
+        student_codes: Tập mã sinh viên trong lớp (set: kiểm tra membership O(1)).
+            Lớp đọc từ repository có tập rỗng cho tới khi được
+            ClassroomRepository.hydrate_students nạp
+        enrolled_count: Sĩ số khi chỉ nạp số lượng (hydrate_students(count_only=True));
+            None nếu sĩ số lấy theo student_codes
         
     Example:
         >>> classroom = Classroom(
@@ -34,7 +38,8 @@ class Classroom:
     class_name: str
     subject_code: str
     teacher_code: Optional[str] = None
-    student_codes: List[str] = field(default_factory=list)
+    student_codes: Set[str] = field(default_factory=set)
+    enrolled_count: Optional[int] = None
     
     def __post_init__(self):
         """Validate data sau khi khởi tạo."""
@@ -42,6 +47,39 @@ class Classroom:
             raise ValueError("Class ID không được để trống")
         if not self.class_name:
             raise ValueError("Class name không được để trống")
+        self.student_codes = set(self.student_codes)
+    
+    @classmethod
+    def trusted(
+        cls,
+        class_id: str,
+        class_name: str,
+        subject_code: str,
+        teacher_code: Optional[str] = None
+    ) -> "Classroom":
+        """
+        Tạo classroom từ dữ liệu tin cậy (row trong DB), bỏ qua __post_init__.
+        
+        Chỉ dùng khi hydrate từ repository: dữ liệu đã được validate lúc ghi.
+        """
+        classroom = object.__new__(cls)
+        classroom.class_id = class_id
+        classroom.class_name = class_name
+        classroom.subject_code = subject_code
+        classroom.teacher_code = teacher_code
+        classroom.student_codes = set()
+        classroom.enrolled_count = None
+        return classroom
+    
+    def set_roster(self, student_codes: Iterable[str]) -> None:
+        """Gán danh sách sinh viên đầy đủ (sĩ số = số phần tử)."""
+        self.student_codes = set(student_codes)
+        self.enrolled_count = None
+    
+    def set_enrolled_count(self, count: int) -> None:
+        """Chỉ gán sĩ số, không nạp danh sách (student_codes để trống)."""
+        self.student_codes = set()
+        self.enrolled_count = count
     
     def add_student(self, student_code: str) -> None:
         """
@@ -51,7 +89,9 @@ class Classroom:
             student_code: Mã sinh viên cần thêm
         """
         if student_code not in self.student_codes:
-            self.student_codes.append(student_code)
+            self.student_codes.add(student_code)
+            if self.enrolled_count is not None:
+                self.enrolled_count += 1
     
     def remove_student(self, student_code: str) -> bool:
         """
@@ -65,12 +105,16 @@ class Classroom:
         """
         if student_code in self.student_codes:
             self.student_codes.remove(student_code)
+            if self.enrolled_count is not None:
+                self.enrolled_count -= 1
             return True
         return False
     
     @property
     def student_count(self) -> int:
         """Số lượng sinh viên trong lớp."""
+        if self.enrolled_count is not None:
+            return self.enrolled_count
         return len(self.student_codes)
     
     def to_dict(self) -> dict:
@@ -80,6 +124,6 @@ class Classroom:
             "class_name": self.class_name,
             "subject_code": self.subject_code,
             "teacher_code": self.teacher_code,
-            "student_codes": self.student_codes,
+            "student_codes": sorted(self.student_codes),
             "student_count": self.student_count,
         }
@@ -13,16 +13,44 @@ Inheritance hierarchy:
     ├── Admin
     ├── Teacher
     └── Student
+
+Các model dùng slots=True (không có __dict__). Lưu ý: với slotted
+dataclass, super() không tham số không hoạt động trong method của class
+con, nên subclass gọi thẳng User.__post_init__(self).
 """
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Type, TypeVar
 
 from core.enums import UserRole
 
+U = TypeVar("U", bound="User")
+
+
+def _trusted_user(
+    cls: Type[U],
+    user_id: int,
+    username: str,
+    password_hash: str,
+    full_name: str,
+    role: UserRole,
+    email: Optional[str],
+    created_at: Optional[datetime]
+) -> U:
+    """Tạo instance cls và gán các field của User, bỏ qua __init__/__post_init__."""
+    user = object.__new__(cls)
+    user.user_id = user_id
+    user.username = username
+    user.password_hash = password_hash
+    user.full_name = full_name
+    user.role = role
+    user.email = email
+    user.created_at = created_at or datetime.now()
+    return user
 
-@dataclass
+
+@dataclass(slots=True)
 class User:
     """
     Base class cho tất cả người dùng trong hệ thống.
@@ -61,6 +89,24 @@ class User:
         if not self.full_name:
             raise ValueError("Full name không được để trống")
     
+    @classmethod
+    def trusted(
+        cls,
+        user_id: int,
+        username: str,
+        password_hash: str,
+        full_name: str,
+        role: UserRole,
+        email: Optional[str] = None,
+        created_at: Optional[datetime] = None
+    ) -> "User":
+        """
+        Tạo user từ dữ liệu tin cậy (row trong DB), bỏ qua __post_init__.
+        
+        Chỉ dùng khi hydrate từ repository: dữ liệu đã được validate lúc ghi.
+        """
+        return _trusted_user(cls, user_id, username, password_hash, full_name, role, email, created_at)
+    
     def to_dict(self) -> dict:
         """Chuyển đổi thành dictionary."""
         return {
@@ -76,7 +122,7 @@ class User:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Admin(User):
     """
     Model cho Admin - Quản trị viên hệ thống.
@@ -94,11 +140,29 @@ class Admin(User):
     admin_id: str = ""
     
     def __post_init__(self):
-        super().__post_init__()
+        User.__post_init__(self)
         self.role = UserRole.ADMIN
+    
+    @classmethod
+    def trusted(
+        cls,
+        user_id: int,
+        username: str,
+        password_hash: str,
+        full_name: str,
+        email: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        admin_id: str = ""
+    ) -> "Admin":
+        """Tạo Admin từ dữ liệu tin cậy (row trong DB), bỏ qua __post_init__."""
+        admin = _trusted_user(
+            cls, user_id, username, password_hash, full_name, UserRole.ADMIN, email, created_at
+        )
+        admin.admin_id = admin_id
+        return admin
 
 
-@dataclass
+@dataclass(slots=True)
 class Teacher(User):
     """
     Model cho Teacher - Giáo viên.
@@ -118,11 +182,31 @@ class Teacher(User):
     department: Optional[str] = None
     
     def __post_init__(self):
-        super().__post_init__()
+        User.__post_init__(self)
         self.role = UserRole.TEACHER
+    
+    @classmethod
+    def trusted(
+        cls,
+        user_id: int,
+        username: str,
+        password_hash: str,
+        full_name: str,
+        email: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        teacher_code: str = "",
+        department: Optional[str] = None
+    ) -> "Teacher":
+        """Tạo Teacher từ dữ liệu tin cậy (row trong DB), bỏ qua __post_init__."""
+        teacher = _trusted_user(
+            cls, user_id, username, password_hash, full_name, UserRole.TEACHER, email, created_at
+        )
+        teacher.teacher_code = teacher_code
+        teacher.department = department
+        return teacher
 
 
-@dataclass
+@dataclass(slots=True)
 class Student(User):
     """
     Model cho Student - Sinh viên.
@@ -141,5 +225,25 @@ class Student(User):
     class_name: Optional[str] = None
     
     def __post_init__(self):
-        super().__post_init__()
+        User.__post_init__(self)
         self.role = UserRole.STUDENT
+    
+    @classmethod
+    def trusted(
+        cls,
+        user_id: int,
+        username: str,
+        password_hash: str,
+        full_name: str,
+        email: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        student_code: str = "",
+        class_name: Optional[str] = None
+    ) -> "Student":
+        """Tạo Student từ dữ liệu tin cậy (row trong DB), bỏ qua __post_init__."""
+        student = _trusted_user(
+            cls, user_id, username, password_hash, full_name, UserRole.STUDENT, email, created_at
+        )
+        student.student_code = student_code
+        student.class_name = class_name
+        return student
@@ -7,6 +7,7 @@ Package này chứa các thành phần truy cập dữ liệu:
 📂 repositories/   - Repository classes (CRUD operations)
 📂 migrations/     - Database schema và seed data
 database.py        - Database connection manager
+cache.py           - LRU + TTL entity cache cho repositories
 
 Sử dụng Repository Pattern để tách biệt data access logic.
 
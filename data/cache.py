@@ -0,0 +1,166 @@
+"""
+Entity Cache - LRU + TTL cache cho repositories
+===============================================
+
+Cache read-through cho các lookup lặp lại nhiều lần (class, session,
+user theo mã). Mỗi bảng có một cache dùng chung cho mọi repository
+instance trên cùng Database (xem Database.entity_cache), nên ghi qua
+repository này sẽ invalidate cho cả các repository khác.
+
+Cách sử dụng:
+    from data.cache import EntityCache, MISSING
+
+    cache = EntityCache(max_size=256, ttl=60)
+    cache.put(("class_id", "CS101"), classroom)
+    value = cache.get(("class_id", "CS101"))
+    if value is MISSING:
+        ...
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Giá trị trả về của get() khi key không có trong cache (None là giá trị hợp lệ)
+MISSING = object()
+
+
+class EntityCache:
+    """
+    LRU cache có TTL, an toàn khi dùng từ nhiều thread.
+
+    - Vượt max_size: bỏ entry ít dùng nhất (eviction)
+    - Entry quá ttl giây: coi như miss (expiration)
+    - generation: tăng sau mỗi lần invalidate; put() kèm generation cũ
+      bị bỏ qua, tránh ghi lại giá trị đã đọc trước khi bị invalidate
+
+    Attributes:
+        max_size: Số entry tối đa
+        ttl: Thời gian sống của entry (giây)
+        hits, misses, evictions, expirations: Bộ đếm thống kê
+
+    Example:
+        >>> cache = EntityCache(max_size=2, ttl=60)
+        >>> cache.put("a", 1)
+        >>> cache.get("a")
+        1
+        >>> cache.stats()["hits"]
+        1
+    """
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Khởi tạo cache.
+
+        Args:
+            max_size: Số entry tối đa (> 0)
+            ttl: Thời gian sống của entry (giây)
+            clock: Hàm lấy thời gian hiện tại (thay được trong test)
+        """
+        if max_size <= 0:
+            raise ValueError("max_size phải lớn hơn 0")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        """Số lần cache đã bị invalidate (đọc trước khi load từ DB)."""
+        return self._generation
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Lấy giá trị theo key.
+
+        Returns:
+            Giá trị đã cache, hoặc MISSING nếu không có / đã hết hạn
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None) -> bool:
+        """
+        Lưu giá trị vào cache.
+
+        Args:
+            key: Cache key
+            value: Giá trị
+            generation: Giá trị generation đọc trước khi load; nếu cache đã
+                        bị invalidate kể từ đó thì không lưu
+
+        Returns:
+            True nếu đã lưu
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, key: Hashable) -> None:
+        """Xóa một key khỏi cache."""
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache (giữ nguyên bộ đếm)."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Thống kê cache.
+
+        Returns:
+            Dict gồm size, max_size, hits, misses, evictions, expirations, hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -4,6 +4,9 @@ Database Connection Manager
 
 Quản lý kết nối SQLite database với connection pooling.
 
+Mỗi thread dùng một connection riêng, database mở ở chế độ WAL để
+các truy vấn đọc (báo cáo, dashboard) không chặn thao tác ghi.
+
 Cách sử dụng:
     from data.database import Database
     
@@ -19,12 +22,68 @@ Cách sử dụng:
         db.execute("UPDATE stats ...")
 """
 
+import os
 import sqlite3
+import threading
+import time
+import unicodedata
 from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Any, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from config.database import (
+    get_db_path,
+    ensure_database_dir,
+    CONNECTION_TIMEOUT,
+    CHECK_SAME_THREAD,
+    DB_PROFILE_ENV,
+    DEFAULT_DB_PROFILE,
+    get_performance_profile,
+    SQLITE_MAX_VARIABLES,
+    QUERY_PROFILING_ENV,
+)
+from .cache import EntityCache
+from .instrumentation import QueryProfiler
+
+
+def _adapt_datetime(dt: datetime) -> str:
+    """Convert datetime to ISO format string."""
+    return dt.isoformat()
+
 
-from config.database import get_db_path, ensure_database_dir, CONNECTION_TIMEOUT, CHECK_SAME_THREAD
+def _convert_datetime(val: bytes) -> datetime:
+    """Convert ISO format string to datetime."""
+    return datetime.fromisoformat(val.decode())
+
+
+# Register datetime adapter for Python 3.12+ (global cho module sqlite3,
+# chỉ cần đăng ký một lần thay vì mỗi lần mở connection)
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter("DATETIME", _convert_datetime)
+
+def casefold(value: Optional[str]) -> Optional[str]:
+    """
+    Chuẩn hóa chuỗi để so khớp không phân biệt hoa thường (cả tiếng Việt).
+    
+    NFC rồi str.casefold(): "Lập Trình" và "lập trình", "Đ" và "đ" cho cùng
+    kết quả. Đăng ký thành hàm SQL casefold() trên mọi connection (LIKE /
+    lower() của SQLite chỉ xử lý ký tự ASCII).
+    
+    Example:
+        >>> casefold("ĐẠI SỐ") == casefold("đại số")
+        True
+    """
+    if value is None:
+        return None
+    return unicodedata.normalize("NFC", str(value)).casefold()
+
+
+# Giá trị số của một số PRAGMA -> tên dễ đọc (dùng khi báo cáo)
+_PRAGMA_VALUE_NAMES = {
+    "synchronous": {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"},
+    "temp_store": {0: "DEFAULT", 1: "FILE", 2: "MEMORY"},
+}
 
 
 class Database:
@@ -33,69 +92,260 @@ class Database:
     
     Features:
     - Singleton pattern: chỉ có 1 instance
-    - Connection management
+    - Connection pool: mỗi thread có connection riêng (Tk main thread,
+      QR scanner thread, background jobs không phải chờ nhau)
+    - WAL journal mode: nhiều reader chạy song song với một writer
+    - Performance profile: PRAGMA (synchronous, cache, mmap...) theo
+      profile trong config/database.py, áp dụng cho mọi connection
     - Transaction support
     - Query execution helpers
+    - Entity cache: mỗi bảng một EntityCache dùng chung cho mọi repository
+    - Query instrumentation: QueryProfiler tùy chọn (enable_profiling)
     
     Example:
         >>> db = Database()
         >>> users = db.fetch_all("SELECT * FROM users")
         >>> user = db.fetch_one("SELECT * FROM users WHERE id = ?", (1,))
+        
+        >>> # Instance riêng cho một file khác (test, benchmark)
+        >>> bench_db = Database("/tmp/bench.db", profile="bulk-load")
     """
     
     _instance: Optional["Database"] = None
-    _connection: Optional[sqlite3.Connection] = None
     
-    def __new__(cls) -> "Database":
-        """Singleton pattern - chỉ tạo 1 instance."""
+    def __new__(
+        cls,
+        db_path: Optional[Union[str, Path]] = None,
+        profile: Optional[str] = None
+    ) -> "Database":
+        """
+        Singleton pattern - chỉ tạo 1 instance.
+        
+        Nếu truyền db_path thì tạo instance riêng (không dùng singleton).
+        """
+        if db_path is not None:
+            return super().__new__(cls)
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self):
-        """Khởi tạo database connection."""
-        if self._connection is None:
-            self._connect()
+    def __init__(
+        self,
+        db_path: Optional[Union[str, Path]] = None,
+        profile: Optional[str] = None
+    ):
+        """
+        Khởi tạo database connection pool.
+        
+        Args:
+            db_path: Đường dẫn file database (mặc định: get_db_path())
+            profile: Tên performance profile (mặc định: biến môi trường
+                     ATTENDANCE_DB_PROFILE hoặc "balanced")
+        """
+        if getattr(self, "_initialized", False):
+            return
+        
+        self._db_path = Path(db_path) if db_path is not None else None
+        self.profile_name = profile or os.getenv(DB_PROFILE_ENV, DEFAULT_DB_PROFILE)
+        self._pragmas = get_performance_profile(self.profile_name)
+        self._local = threading.local()
+        self._pool_lock = threading.Lock()
+        self._pool: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._caches: Dict[str, EntityCache] = {}
+        self.profiler: Optional[QueryProfiler] = None
+        self._initialized = True
+        
+        if os.getenv(QUERY_PROFILING_ENV, "").lower() in ("1", "true", "yes"):
+            self.enable_profiling()
+        
+        # Mở sẵn connection cho thread khởi tạo
+        self._connect()
+    
+    @property
+    def db_path(self) -> Path:
+        """Đường dẫn file database mà pool đang dùng."""
+        return self._db_path if self._db_path is not None else get_db_path()
     
-    def _connect(self) -> None:
-        """Tạo kết nối đến database."""
-        ensure_database_dir()
-        db_path = get_db_path()
+    def _connect(self) -> sqlite3.Connection:
+        """Tạo kết nối đến database cho thread hiện tại."""
+        if self._db_path is None:
+            ensure_database_dir()
+        else:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
         
-        self._connection = sqlite3.connect(
-            str(db_path),
+        connection = sqlite3.connect(
+            str(self.db_path),
             timeout=CONNECTION_TIMEOUT,
             check_same_thread=CHECK_SAME_THREAD,
             detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
         )
         
-        # Register datetime adapter for Python 3.12+
-        # This fixes the deprecation warning
-        from datetime import datetime
-        
-        def adapt_datetime(dt):
-            """Convert datetime to ISO format string."""
-            return dt.isoformat()
+        # Enable foreign keys
+        connection.execute("PRAGMA foreign_keys = ON")
+        # INSERT OR REPLACE chạy delete trigger (giữ student_attendance_summary đúng)
+        connection.execute("PRAGMA recursive_triggers = ON")
+        # So khớp không phân biệt hoa thường cho cả ký tự ngoài ASCII
+        connection.create_function("casefold", 1, casefold, deterministic=True)
         
-        def convert_datetime(val):
-            """Convert ISO format string to datetime."""
-            return datetime.fromisoformat(val.decode())
+        # Performance profile (journal_mode=WAL: reader không bị block bởi writer)
+        for name, value in self._pragmas.items():
+            connection.execute(f"PRAGMA {name} = {value}")
         
-        sqlite3.register_adapter(datetime, adapt_datetime)
-        sqlite3.register_converter("DATETIME", convert_datetime)
+        # Return rows as dictionaries
+        connection.row_factory = sqlite3.Row
         
-        # Enable foreign keys
-        self._connection.execute("PRAGMA foreign_keys = ON")
+        thread = threading.current_thread()
+        with self._pool_lock:
+            self._prune_dead_threads()
+            self._pool[thread.ident] = (thread, connection)
+        self._local.connection = connection
         
-        # Return rows as dictionaries
-        self._connection.row_factory = sqlite3.Row
+        return connection
+    
+    def _prune_dead_threads(self) -> None:
+        """Đóng connection của các thread đã kết thúc (gọi khi giữ _pool_lock)."""
+        for ident, (thread, connection) in list(self._pool.items()):
+            if not thread.is_alive():
+                connection.close()
+                del self._pool[ident]
     
     @property
     def connection(self) -> sqlite3.Connection:
-        """Lấy connection hiện tại."""
-        if self._connection is None:
-            self._connect()
-        return self._connection
+        """Lấy connection của thread hiện tại (tạo mới nếu chưa có)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+        return connection
+    
+    def active_pragmas(self) -> Dict[str, Any]:
+        """
+        Đọc lại giá trị PRAGMA đang có hiệu lực trên connection hiện tại.
+        
+        Returns:
+            Dict tên PRAGMA -> giá trị thực tế
+            
+        Example:
+            >>> db.active_pragmas()["journal_mode"]
+            'wal'
+        """
+        pragmas = {}
+        for name in self._pragmas:
+            value = self.connection.execute(f"PRAGMA {name}").fetchone()[0]
+            pragmas[name] = _PRAGMA_VALUE_NAMES.get(name, {}).get(value, value)
+        return pragmas
+    
+    @property
+    def pool_size(self) -> int:
+        """Số connection đang mở trong pool."""
+        with self._pool_lock:
+            return len(self._pool)
+    
+    @property
+    def max_variables(self) -> int:
+        """Số tham số "?" tối đa trong một câu lệnh (SQLITE_LIMIT_VARIABLE_NUMBER)."""
+        getlimit = getattr(self.connection, "getlimit", None)  # Python 3.11+
+        if getlimit is None:
+            return SQLITE_MAX_VARIABLES
+        return getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    
+    def entity_cache(self, name: str, max_size: int, ttl: float) -> EntityCache:
+        """
+        Lấy (hoặc tạo) EntityCache dùng chung theo tên (thường là tên bảng).
+        
+        Mọi repository instance trên cùng Database dùng chung cache, nên
+        ghi qua một instance sẽ invalidate cho các instance khác.
+        
+        Args:
+            name: Tên cache
+            max_size: Số entry tối đa (chỉ dùng khi tạo mới)
+            ttl: Thời gian sống của entry (giây, chỉ dùng khi tạo mới)
+        """
+        with self._pool_lock:
+            cache = self._caches.get(name)
+            if cache is None:
+                cache = self._caches[name] = EntityCache(max_size, ttl)
+            return cache
+    
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Thống kê của mọi entity cache.
+        
+        Example:
+            >>> db.cache_stats()["classes"]["hit_rate"]
+            0.93
+        """
+        with self._pool_lock:
+            caches = dict(self._caches)
+        return {name: cache.stats() for name, cache in caches.items()}
+    
+    def enable_profiling(self, slow_ms: Optional[float] = None, **options) -> QueryProfiler:
+        """
+        Bật query instrumentation cho mọi thread.
+        
+        Args:
+            slow_ms: Ngưỡng slow query (ms, mặc định SLOW_QUERY_MS)
+            **options: Tham số khác của QueryProfiler (explain, echo, slow_log_size)
+            
+        Returns:
+            QueryProfiler đang dùng
+            
+        Example:
+            >>> profiler = db.enable_profiling(slow_ms=20)
+            >>> print(profiler.report())
+        """
+        if slow_ms is not None:
+            options["slow_ms"] = slow_ms
+        self.profiler = QueryProfiler(**options)
+        return self.profiler
+    
+    def disable_profiling(self) -> None:
+        """Tắt query instrumentation."""
+        self.profiler = None
+    
+    def _run(
+        self,
+        cursor: sqlite3.Cursor,
+        query: str,
+        params: Any,
+        many: bool = False,
+        fetch: Optional[Callable[[], Any]] = None
+    ) -> Any:
+        """
+        Chạy execute/executemany trên cursor, đo thời gian nếu profiler đang bật.
+        
+        Args:
+            fetch: Hàm đọc kết quả (VD: cursor.fetchall); thời gian fetch được
+                   tính vào câu lệnh vì SQLite làm phần lớn việc của SELECT
+                   lúc fetch
+                   
+        Returns:
+            Kết quả của fetch() (None nếu không có fetch)
+        """
+        profiler = self.profiler
+        run = cursor.executemany if many else cursor.execute
+        if profiler is None:
+            run(query, params)
+            return fetch() if fetch is not None else None
+        
+        start = time.perf_counter()
+        try:
+            run(query, params)
+            return fetch() if fetch is not None else None
+        finally:
+            profiler.record(query, params, time.perf_counter() - start, cursor.connection, many)
+    
+    def _open(self, cursor: sqlite3.Cursor, query: str, params: Any) -> sqlite3.Cursor:
+        """
+        Chạy SELECT, trả cursor để caller tự đọc.
+        
+        Khi profiler bật, trả TimedCursor: câu lệnh được record khi đọc hết
+        kết quả / close(), tính cả thời gian fetch.
+        """
+        profiler = self.profiler
+        if profiler is None:
+            cursor.execute(query, params)
+            return cursor
+        return profiler.timed_cursor(cursor, query, params)
     
     def execute(
         self, 
@@ -114,10 +364,19 @@ class Database:
             
         Example:
             >>> db.execute("INSERT INTO users (name) VALUES (?)", ("John",))
+            
+        Note:
+            Ngoài transaction() mỗi lệnh được commit ngay. Bên trong
+            transaction() lệnh chỉ được commit khi scope ngoài cùng kết thúc.
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query, params)
-        self.connection.commit()
+        connection = self.connection
+        cursor = connection.cursor()
+        try:
+            self._run(cursor, query, params)
+        except Exception:
+            self._rollback_statement(connection)
+            raise
+        self._autocommit(connection)
         return cursor
     
     def execute_many(
@@ -135,9 +394,14 @@ class Database:
         Returns:
             Cursor object
         """
-        cursor = self.connection.cursor()
-        cursor.executemany(query, params_list)
-        self.connection.commit()
+        connection = self.connection
+        cursor = connection.cursor()
+        try:
+            self._run(cursor, query, params_list, many=True)
+        except Exception:
+            self._rollback_statement(connection)
+            raise
+        self._autocommit(connection)
         return cursor
     
     def fetch_one(
@@ -160,8 +424,7 @@ class Database:
             >>> print(user["name"])
         """
         cursor = self.connection.cursor()
-        cursor.execute(query, params)
-        return cursor.fetchone()
+        return self._run(cursor, query, params, fetch=cursor.fetchone)
     
     def fetch_all(
         self, 
@@ -184,13 +447,106 @@ class Database:
             ...     print(user["name"])
         """
         cursor = self.connection.cursor()
-        cursor.execute(query, params)
-        return cursor.fetchall()
+        return self._run(cursor, query, params, fetch=cursor.fetchall)
+    
+    def select(
+        self,
+        query: str,
+        params: Tuple = ()
+    ) -> sqlite3.Cursor:
+        """
+        Thực thi SELECT, trả về cursor với plain tuple rows.
+        
+        Nhanh hơn sqlite3.Row khi đọc nhiều dòng; tên cột lấy từ
+        cursor.description (dùng bởi compiled row mapper của repositories).
+        
+        Args:
+            query: SQL query string
+            params: Parameters cho query
+            
+        Returns:
+            Cursor object (row_factory = None)
+            
+        Example:
+            >>> cursor = db.select("SELECT user_id, username FROM users")
+            >>> columns = [d[0] for d in cursor.description]
+            >>> rows = cursor.fetchall()  # [(1, "admin"), ...]
+        """
+        cursor = self.connection.cursor()
+        cursor.row_factory = None
+        return self._open(cursor, query, params)
+    
+    def iter_rows(
+        self,
+        query: str,
+        params: Tuple = (),
+        chunk_size: int = 500
+    ) -> Iterator[sqlite3.Row]:
+        """
+        Duyệt kết quả query theo từng chunk (fetchmany) thay vì fetchall.
+        
+        Bộ nhớ chỉ phụ thuộc chunk_size, không phụ thuộc kích thước bảng.
+        
+        Args:
+            query: SQL query string
+            params: Parameters cho query
+            chunk_size: Số dòng mỗi lần fetchmany
+            
+        Yields:
+            Row objects
+            
+        Example:
+            >>> for row in db.iter_rows("SELECT * FROM attendance_records"):
+            ...     writer.writerow(tuple(row))
+        """
+        cursor = self._open(self.connection.cursor(), query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+    
+    @property
+    def in_transaction(self) -> bool:
+        """True nếu thread hiện tại đang ở trong một transaction() scope."""
+        return getattr(self._local, "depth", 0) > 0
+    
+    def _autocommit(self, connection: sqlite3.Connection) -> None:
+        """Commit ngay nếu không nằm trong transaction() scope."""
+        if not self.in_transaction:
+            connection.commit()
+    
+    def _rollback_statement(self, connection: sqlite3.Connection) -> None:
+        """Rollback transaction ngầm định của một lệnh lỗi ngoài transaction() scope."""
+        if not self.in_transaction and connection.in_transaction:
+            connection.rollback()
+    
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Gọi callback sau khi dữ liệu đã commit.
+        
+        Ngoài transaction() scope: gọi ngay (execute đã autocommit). Trong
+        scope: gọi sau khi scope ngoài cùng commit thành công, bỏ qua nếu
+        rollback. Dùng để invalidate cache sau khi thay đổi hiển thị với
+        các connection khác.
+        """
+        if not self.in_transaction:
+            callback()
+            return
+        self._local.after_commit.append(callback)
     
     @contextmanager
     def transaction(self):
         """
-        Context manager cho transaction.
+        Context manager cho transaction (unit of work).
+        
+        Mọi lệnh execute/execute_many của thread hiện tại bên trong scope
+        (từ bất kỳ repository nào) được gộp vào một lần commit duy nhất.
+        Scope lồng nhau dùng SAVEPOINT: lỗi trong scope con chỉ rollback
+        phần việc của scope con.
         
         Tự động commit nếu thành công, rollback nếu có lỗi.
         
@@ -198,19 +554,60 @@ class Database:
             >>> with db.transaction():
             ...     db.execute("INSERT INTO users ...")
             ...     db.execute("UPDATE stats ...")
+            
+            >>> with db.transaction():
+            ...     session_repo.create(session)
+            ...     with db.transaction():  # SAVEPOINT
+            ...         record_repo.create(record)
         """
+        connection = self.connection
+        depth = getattr(self._local, "depth", 0)
+        savepoint = f"sp_{depth}"
+        
+        if depth == 0:
+            # Kết thúc transaction ngầm định còn dang dở (nếu có)
+            if connection.in_transaction:
+                connection.commit()
+            connection.execute("BEGIN IMMEDIATE")
+            self._local.after_commit = []
+        else:
+            connection.execute(f"SAVEPOINT {savepoint}")
+        
+        self._local.depth = depth + 1
         try:
-            yield
-            self.connection.commit()
-        except Exception as e:
-            self.connection.rollback()
-            raise e
+            yield self
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                connection.rollback()
+            else:
+                connection.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                connection.execute(f"RELEASE SAVEPOINT {savepoint}")
+            raise
+        
+        self._local.depth = depth
+        if depth == 0:
+            try:
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            callbacks, self._local.after_commit = self._local.after_commit, []
+            for callback in callbacks:
+                callback()
+        else:
+            connection.execute(f"RELEASE SAVEPOINT {savepoint}")
     
     def close(self) -> None:
-        """Đóng connection."""
-        if self._connection:
-            self._connection.close()
-            self._connection = None
+        """Đóng tất cả connections trong pool."""
+        pool = getattr(self, "_pool", None)
+        if pool is None:
+            return
+        with self._pool_lock:
+            for _, connection in pool.values():
+                connection.close()
+            pool.clear()
+        self._local = threading.local()
     
     def __del__(self):
         """Cleanup khi object bị destroy."""
@@ -0,0 +1,366 @@
+"""
+Query Instrumentation - Đo thời gian SQL
+========================================
+
+QueryProfiler ghi nhận mọi câu lệnh chạy qua Database khi được bật:
+- Histogram thời gian theo SQL đã chuẩn hóa (literal/IN-list -> ?)
+- Đếm số query trong một phạm vi (VD: một service call) bằng counting()
+- Slow-query log kèm EXPLAIN QUERY PLAN cho câu lệnh vượt ngưỡng
+- Báo cáo top câu lệnh theo tổng thời gian
+
+Khi tắt (Database.profiler is None) chi phí chỉ là một lần kiểm tra None.
+
+Cách sử dụng:
+    db = Database()
+    profiler = db.enable_profiling(slow_ms=50)
+
+    with profiler.counting() as counter:
+        student_service.get_attendance_history("SV001")
+    print(counter.count)
+
+    print(profiler.report(top=10))
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from config.database import SLOW_QUERY_LOG_SIZE, SLOW_QUERY_MS
+
+# Cận trên (ms) của các bucket histogram; bucket cuối là "> 1000 ms"
+HISTOGRAM_BOUNDS_MS: Tuple[float, ...] = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+# Câu lệnh có thể EXPLAIN QUERY PLAN
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    """
+    Chuẩn hóa SQL để gộp thống kê: bỏ khoảng trắng thừa, literal -> ?,
+    IN (?, ?, ...) -> IN (...).
+
+    Example:
+        >>> normalize_sql("SELECT * FROM t WHERE id IN (?, ?, ?) AND x = 5")
+        'SELECT * FROM t WHERE id IN (...) AND x = ?'
+    """
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+@dataclass
+class StatementStats:
+    """Thống kê của một câu lệnh (SQL đã chuẩn hóa)."""
+
+    sql: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    histogram: List[int] = field(default_factory=lambda: [0] * (len(HISTOGRAM_BOUNDS_MS) + 1))
+
+    @property
+    def avg_ms(self) -> float:
+        """Thời gian trung bình (ms)."""
+        return self.total_ms / self.count if self.count else 0.0
+
+    def add(self, duration_ms: float) -> None:
+        """Ghi nhận một lần chạy."""
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+        self.histogram[bisect_left(HISTOGRAM_BOUNDS_MS, duration_ms)] += 1
+
+
+@dataclass
+class SlowQuery:
+    """Một bản ghi trong slow-query log."""
+
+    sql: str
+    params: Any
+    duration_ms: float
+    plan: List[str]
+    at: float = field(default_factory=time.time)
+
+
+@dataclass
+class QueryCounter:
+    """Số query trong một scope counting()."""
+
+    count: int = 0
+    total_ms: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+
+class QueryProfiler:
+    """
+    Thu thập thống kê các câu lệnh SQL chạy qua Database.
+
+    Attributes:
+        slow_ms: Ngưỡng slow query (ms)
+        explain: Có chạy EXPLAIN QUERY PLAN cho slow query không
+        echo: In slow query ra console
+        slow_log: Các slow query gần nhất (tối đa slow_log_size)
+    """
+
+    def __init__(
+        self,
+        slow_ms: float = SLOW_QUERY_MS,
+        slow_log_size: int = SLOW_QUERY_LOG_SIZE,
+        explain: bool = True,
+        echo: bool = True
+    ):
+        """
+        Khởi tạo profiler.
+
+        Args:
+            slow_ms: Ngưỡng slow query (ms)
+            slow_log_size: Số slow query giữ lại
+            explain: Chạy EXPLAIN QUERY PLAN cho slow query
+            echo: In slow query ra console
+        """
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.echo = echo
+        self.slow_log: Deque[SlowQuery] = deque(maxlen=slow_log_size)
+        self._stats: Dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(
+        self,
+        sql: str,
+        params: Any,
+        duration: float,
+        connection: sqlite3.Connection,
+        many: bool = False
+    ) -> None:
+        """
+        Ghi nhận một câu lệnh đã chạy (gọi bởi Database).
+
+        Args:
+            sql: SQL gốc
+            params: Tham số (list tham số nếu many=True)
+            duration: Thời gian chạy (giây)
+            connection: Connection đã chạy lệnh (dùng cho EXPLAIN)
+            many: True nếu chạy bằng executemany
+        """
+        duration_ms = duration * 1000
+        normalized = normalize_sql(sql)
+
+        with self._lock:
+            stats = self._stats.get(normalized)
+            if stats is None:
+                stats = self._stats[normalized] = StatementStats(normalized)
+            stats.add(duration_ms)
+
+        for counter in getattr(self._local, "counters", ()):
+            counter.count += 1
+            counter.total_ms += duration_ms
+            counter.statements[normalized] += 1
+
+        if duration_ms >= self.slow_ms:
+            self._log_slow(sql, params, duration_ms, connection, many)
+
+    def _log_slow(
+        self,
+        sql: str,
+        params: Any,
+        duration_ms: float,
+        connection: sqlite3.Connection,
+        many: bool
+    ) -> None:
+        """Thêm vào slow-query log (kèm query plan)."""
+        if many:
+            params = params[0] if isinstance(params, (list, tuple)) and params else ()
+        plan = self.explain_plan(sql, params, connection) if self.explain else []
+        self.slow_log.append(SlowQuery(normalize_sql(sql), params, duration_ms, plan))
+
+        if self.echo:
+            print(f"🐢 Slow query ({duration_ms:.1f} ms): {normalize_sql(sql)}")
+            for line in plan:
+                print(f"    {line}")
+
+    @staticmethod
+    def explain_plan(sql: str, params: Any, connection: sqlite3.Connection) -> List[str]:
+        """
+        Lấy EXPLAIN QUERY PLAN của câu lệnh (thụt lề theo cây plan).
+
+        Returns:
+            Các dòng plan, hoặc [] nếu câu lệnh không EXPLAIN được
+        """
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return []
+        try:
+            rows = connection.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        except sqlite3.Error as e:
+            return [f"(EXPLAIN failed: {e})"]
+
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append("  " * depth[node_id] + str(detail))
+        return lines
+
+    def timed_cursor(self, cursor: sqlite3.Cursor, sql: str, params: Any) -> "TimedCursor":
+        """
+        Chạy SELECT trên cursor và trả TimedCursor đo cả thời gian đọc kết quả.
+
+        Dùng cho cursor mà caller tự fetch (Database.select/iter_rows): phần
+        lớn công việc của SELECT trong SQLite diễn ra lúc fetch, không phải
+        lúc execute.
+        """
+        return TimedCursor(self, cursor, sql, params)
+
+    @contextmanager
+    def counting(self) -> Iterator[QueryCounter]:
+        """
+        Đếm các query chạy trong scope (thread hiện tại, scope lồng nhau được).
+
+        Example:
+            >>> with profiler.counting() as counter:
+            ...     service.get_dashboard_stats("SV001")
+            >>> counter.count
+            3
+        """
+        counter = QueryCounter()
+        counters = getattr(self._local, "counters", None)
+        if counters is None:
+            counters = self._local.counters = []
+        counters.append(counter)
+        try:
+            yield counter
+        finally:
+            counters.remove(counter)
+
+    def stats(self) -> List[StatementStats]:
+        """Thống kê mọi câu lệnh, sắp xếp theo tổng thời gian giảm dần."""
+        with self._lock:
+            stats = list(self._stats.values())
+        return sorted(stats, key=lambda s: s.total_ms, reverse=True)
+
+    def reset(self) -> None:
+        """Xóa toàn bộ thống kê và slow-query log."""
+        with self._lock:
+            self._stats.clear()
+        self.slow_log.clear()
+
+    def report(self, top: int = 10) -> str:
+        """
+        Báo cáo top câu lệnh theo tổng thời gian.
+
+        Args:
+            top: Số câu lệnh hiển thị
+
+        Returns:
+            Bảng dạng text
+        """
+        stats = self.stats()[:top]
+        lines = [
+            f"{'total ms':>10} | {'count':>7} | {'avg ms':>8} | {'max ms':>8} | sql",
+            "-" * 80,
+        ]
+        for s in stats:
+            sql = s.sql if len(s.sql) <= 100 else s.sql[:97] + "..."
+            lines.append(
+                f"{s.total_ms:>10.1f} | {s.count:>7} | {s.avg_ms:>8.2f} | {s.max_ms:>8.2f} | {sql}"
+            )
+        if self.slow_log:
+            lines.append(f"\nSlow queries (>= {self.slow_ms:g} ms): {len(self.slow_log)}")
+        return "\n".join(lines)
+
+
+class TimedCursor:
+    """
+    Bọc sqlite3.Cursor: cộng dồn thời gian execute + mọi lần fetch/next.
+
+    Câu lệnh được record một lần khi đọc hết kết quả, khi close() hoặc khi
+    cursor bị hủy (đọc dở, VD: chỉ fetchone). Thời gian caller xử lý từng
+    dòng giữa các lần fetch không bị tính.
+    """
+
+    __slots__ = ("_profiler", "_cursor", "_sql", "_params", "_elapsed", "_done")
+
+    def __init__(self, profiler: QueryProfiler, cursor: sqlite3.Cursor, sql: str, params: Any):
+        self._profiler = profiler
+        self._cursor = cursor
+        self._sql = sql
+        self._params = params
+        self._elapsed = 0.0
+        self._done = False
+        try:
+            self._timed(cursor.execute, sql, params)
+        except Exception:
+            self._finish()
+            raise
+
+    def _timed(self, fetch, *args):
+        """Gọi fetch và cộng thời gian chạy vào tổng."""
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def _finish(self) -> None:
+        """Record câu lệnh (chỉ lần đầu)."""
+        if not self._done:
+            self._done = True
+            self._profiler.record(self._sql, self._params, self._elapsed, self._cursor.connection)
+
+    def fetchone(self) -> Any:
+        """cursor.fetchone(), có đo thời gian."""
+        row = self._timed(self._cursor.fetchone)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        """cursor.fetchmany(), có đo thời gian."""
+        rows = self._timed(self._cursor.fetchmany, size if size is not None else self._cursor.arraysize)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        """cursor.fetchall(), có đo thời gian."""
+        rows = self._timed(self._cursor.fetchall)
+        self._finish()
+        return rows
+
+    def __iter__(self) -> "TimedCursor":
+        return self
+
+    def __next__(self) -> Any:
+        try:
+            return self._timed(next, self._cursor)
+        except StopIteration:
+            self._finish()
+            raise
+
+    def close(self) -> None:
+        """Record câu lệnh (nếu chưa) rồi đóng cursor."""
+        self._finish()
+        self._cursor.close()
+
+    def __getattr__(self, name: str) -> Any:
+        # description, rowcount, lastrowid, connection...
+        return getattr(self._cursor, name)
+
+    def __del__(self) -> None:
+        self._finish()
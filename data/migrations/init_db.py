@@ -2,10 +2,12 @@
 Database Initialization - Khởi tạo Database
 ============================================
 
-Script để tạo database schema và seed data.
+Script để tạo / nâng cấp database schema (qua MigrationRunner) và seed data.
 
 Cách sử dụng:
-    python -m data.migrations.init_db
+    python -m data.migrations.init_db            # áp dụng migration còn thiếu
+    python -m data.migrations.init_db --reset    # xóa database và tạo lại
+    python -m data.migrations.init_db --status   # xem version đã áp dụng
     
     hoặc trong code:
     from data.migrations.init_db import init_database
@@ -14,8 +16,10 @@ Cách sử dụng:
 
 import sqlite3
 from pathlib import Path
+from typing import List, Optional, Union
 
 from config.database import get_db_path, ensure_database_dir
+from data.migrations.runner import MigrationResult, MigrationRunner
 
 
 def get_schema_path() -> Path:
@@ -23,41 +27,63 @@ def get_schema_path() -> Path:
     return Path(__file__).parent / "schema.sql"
 
 
-def init_database(reset: bool = False) -> None:
+def init_database(
+    reset: bool = False,
+    db_path: Optional[Union[str, Path]] = None
+) -> List[MigrationResult]:
     """
-    Khởi tạo database với schema.
+    Khởi tạo / nâng cấp database bằng migration runner.
+    
+    Không xóa dữ liệu: chỉ áp dụng các migration chưa chạy (schema.sql cho
+    database trống, sau đó versions/NNN_name.sql).
     
     Args:
         reset: Nếu True, xóa database cũ và tạo mới
+        db_path: Đường dẫn file database (mặc định: get_db_path())
+        
+    Returns:
+        Các migration đã áp dụng trong lần chạy này
         
     Example:
-        >>> init_database()  # Tạo mới nếu chưa có
+        >>> init_database()  # Tạo mới hoặc áp dụng migration còn thiếu
         >>> init_database(reset=True)  # Reset hoàn toàn
     """
-    ensure_database_dir()
-    db_path = get_db_path()
+    if db_path is None:
+        ensure_database_dir()
+        db_path = get_db_path()
+    else:
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # Xóa database cũ nếu reset
+    # Xóa database cũ nếu reset (kèm file WAL / shared-memory)
     if reset and db_path.exists():
-        db_path.unlink()
+        for path in (db_path, Path(f"{db_path}-wal"), Path(f"{db_path}-shm")):
+            if path.exists():
+                path.unlink()
         print(f"🗑️  Đã xóa database cũ: {db_path}")
     
-    # Đọc schema
-    schema_path = get_schema_path()
-    with open(schema_path, "r", encoding="utf-8") as f:
-        schema_sql = f.read()
-    
-    # Tạo database và chạy schema
-    conn = sqlite3.connect(str(db_path))
     try:
-        conn.executescript(schema_sql)
-        conn.commit()
-        print(f"✅ Database đã được khởi tạo: {db_path}")
+        results = MigrationRunner(db_path, baseline=get_schema_path()).migrate()
     except Exception as e:
         print(f"❌ Lỗi khi khởi tạo database: {e}")
         raise
-    finally:
-        conn.close()
+    
+    total_ms = sum(result.duration_ms for result in results)
+    print(f"✅ Database đã được khởi tạo: {db_path} "
+          f"({len(results)} migration mới, {total_ms:.1f} ms)")
+    return results
+
+
+def migration_status(db_path: Optional[Union[str, Path]] = None) -> None:
+    """In các migration đã áp dụng / đang chờ."""
+    runner = MigrationRunner(db_path or get_db_path(), baseline=get_schema_path())
+    applied = runner.applied()
+    for migration in runner.migrations:
+        row = applied.get(migration.version)
+        if row is None:
+            print(f"   ⏳ {migration.version}_{migration.name}: chưa áp dụng")
+        else:
+            print(f"   ✅ {migration.version}_{migration.name}: {row['applied_at']} ({row['duration_ms']:.1f} ms)")
 
 
 def seed_demo_data() -> None:
@@ -175,6 +201,11 @@ if __name__ == "__main__":
     reset = "--reset" in sys.argv
     seed = "--seed" in sys.argv
     
+    if "--status" in sys.argv:
+        print("📋 Trạng thái migration:")
+        migration_status()
+        sys.exit(0)
+    
     print("🚀 Đang khởi tạo database...")
     init_database(reset=reset)
     
@@ -0,0 +1,321 @@
+"""
+Migration Runner - Migration có version, không phá dữ liệu
+==========================================================
+
+Áp dụng schema theo từng bước forward-only và ghi lại version đã chạy
+trong bảng schema_migrations:
+- 000 (baseline): schema.sql, chỉ chạy trên database trống. Database cũ
+  (đã có bảng nhưng chưa có schema_migrations) được đánh dấu baseline mà
+  không chạy lại
+- NNN_name.sql trong versions/: chạy theo thứ tự version, mỗi migration
+  trong một transaction (lỗi -> rollback, version không được ghi)
+- CREATE INDEX trên bảng đã có (và không phụ thuộc câu lệnh trước đó
+  trong migration) được build "online": mỗi index một transaction ngắn,
+  trước phần còn lại của migration. Với WAL, app vẫn đọc
+  được trong lúc build; writer chỉ chờ trong thời gian build một index
+- Báo cáo thời gian từng migration
+
+Cách sử dụng:
+    from data.migrations.runner import MigrationRunner
+
+    runner = MigrationRunner("database/attendance.db")
+    for result in runner.migrate():
+        print(result.version, result.duration_ms)
+"""
+
+import hashlib
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from config.database import CONNECTION_TIMEOUT
+
+BASELINE_VERSION = "000"
+
+_MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+_CREATE_INDEX = re.compile(
+    r"^CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+ON\s+(\w+)",
+    re.IGNORECASE
+)
+_COMMENT_LINE = re.compile(r"^\s*--.*$", re.MULTILINE)
+
+_CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        checksum TEXT NOT NULL,
+        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        duration_ms REAL NOT NULL DEFAULT 0
+    )
+"""
+
+
+class MigrationError(Exception):
+    """Lỗi khi áp dụng migration (trạng thái database không khớp với các file)."""
+
+
+def split_statements(script: str) -> List[str]:
+    """
+    Tách SQL script thành từng câu lệnh (bỏ comment và dòng trống).
+
+    Example:
+        >>> split_statements("-- x\\nCREATE TABLE t (a);\\nDROP TABLE t;")
+        ['CREATE TABLE t (a);', 'DROP TABLE t;']
+    """
+    statements = []
+    buffer = ""
+    for line in _COMMENT_LINE.sub("", script).splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+@dataclass(frozen=True)
+class Migration:
+    """Một file migration."""
+
+    version: str
+    name: str
+    path: Path
+
+    @classmethod
+    def from_path(cls, path: Path) -> "Migration":
+        """Tạo Migration từ file NNN_name.sql."""
+        match = _MIGRATION_FILE.match(path.name)
+        if match is None:
+            raise MigrationError(f"Tên file migration không hợp lệ: {path.name} (cần NNN_name.sql)")
+        return cls(version=match.group(1), name=match.group(2), path=path)
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+    @property
+    def checksum(self) -> str:
+        """SHA-256 nội dung file (phát hiện migration đã chạy bị sửa)."""
+        return hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class MigrationResult:
+    """Kết quả áp dụng một migration."""
+
+    version: str
+    name: str
+    duration_ms: float
+    online_indexes: List[str] = field(default_factory=list)
+    adopted: bool = False
+
+
+class MigrationRunner:
+    """
+    Áp dụng các migration còn thiếu cho một database SQLite.
+
+    Attributes:
+        db_path: File database
+        migrations: Các migration đã biết (baseline + versions/), theo version
+    """
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        versions_dir: Optional[Union[str, Path]] = None,
+        baseline: Optional[Union[str, Path]] = None
+    ):
+        """
+        Khởi tạo runner.
+
+        Args:
+            db_path: File database
+            versions_dir: Thư mục chứa NNN_name.sql (mặc định: versions/ cạnh file này)
+            baseline: Schema baseline (mặc định: schema.sql)
+        """
+        here = Path(__file__).parent
+        self.db_path = Path(db_path)
+        versions_dir = Path(versions_dir) if versions_dir is not None else here / "versions"
+        baseline = Path(baseline) if baseline is not None else here / "schema.sql"
+
+        self.migrations: List[Migration] = [Migration(BASELINE_VERSION, "schema", baseline)]
+        self.migrations += sorted(
+            (Migration.from_path(path) for path in versions_dir.glob("*.sql")),
+            key=lambda m: int(m.version)
+        )
+
+        versions = [m.version for m in self.migrations]
+        duplicates = {v for v in versions if versions.count(v) > 1}
+        if duplicates:
+            raise MigrationError(f"Trùng version migration: {', '.join(sorted(duplicates))}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Connection ở autocommit mode (runner tự quản lý transaction)."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.db_path), timeout=CONNECTION_TIMEOUT, isolation_level=None)
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute("PRAGMA recursive_triggers = ON")
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def applied(self) -> Dict[str, sqlite3.Row]:
+        """
+        Các version đã áp dụng.
+
+        Returns:
+            Dict version -> row (version, name, checksum, applied_at, duration_ms)
+        """
+        if not self.db_path.exists():
+            return {}
+        connection = self._connect()
+        try:
+            connection.execute(_CREATE_MIGRATIONS_TABLE)
+            rows = connection.execute("SELECT * FROM schema_migrations ORDER BY version").fetchall()
+            return {row["version"]: row for row in rows}
+        finally:
+            connection.close()
+
+    def pending(self) -> List[Migration]:
+        """Các migration chưa áp dụng, theo thứ tự."""
+        applied = self.applied()
+        return [m for m in self.migrations if m.version not in applied]
+
+    def migrate(self, echo: bool = True) -> List[MigrationResult]:
+        """
+        Áp dụng mọi migration còn thiếu.
+
+        Args:
+            echo: In tiến trình và thời gian từng migration
+
+        Returns:
+            Kết quả các migration đã áp dụng trong lần chạy này
+
+        Raises:
+            MigrationError: Database có version lạ hoặc migration đã chạy bị sửa
+            sqlite3.Error: Migration lỗi (migration đó đã được rollback)
+        """
+        connection = self._connect()
+        try:
+            connection.execute(_CREATE_MIGRATIONS_TABLE)
+            applied = {
+                row["version"]: row
+                for row in connection.execute("SELECT version, checksum FROM schema_migrations")
+            }
+            self._check_applied(applied)
+
+            results = []
+            for migration in self.migrations:
+                if migration.version in applied:
+                    continue
+                if migration.version == BASELINE_VERSION and self._has_tables(connection):
+                    result = self._adopt_baseline(connection, migration)
+                else:
+                    result = self._apply(connection, migration, echo)
+                results.append(result)
+                if echo:
+                    action = "đánh dấu baseline (database có sẵn)" if result.adopted else f"{result.duration_ms:.1f} ms"
+                    print(f"⬆️  Migration {migration.version}_{migration.name}: {action}")
+            return results
+        finally:
+            connection.close()
+
+    def _check_applied(self, applied: Dict[str, sqlite3.Row]) -> None:
+        """Forward-only: không cho chạy khi database mới hơn code hoặc migration cũ bị sửa."""
+        known = {m.version: m for m in self.migrations}
+        unknown = sorted(set(applied) - set(known))
+        if unknown:
+            raise MigrationError(
+                f"Database có version không có trong code: {', '.join(unknown)} (code cũ hơn database?)"
+            )
+        for version, row in applied.items():
+            migration = known[version]
+            if version != BASELINE_VERSION and row["checksum"] != migration.checksum:
+                raise MigrationError(
+                    f"Migration {version}_{migration.name} đã được áp dụng nhưng file đã bị sửa; "
+                    "hãy tạo migration mới thay vì sửa migration cũ"
+                )
+
+    @staticmethod
+    def _has_tables(connection: sqlite3.Connection) -> bool:
+        """Database đã có bảng ứng dụng (tạo trước khi có runner)."""
+        row = connection.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT IN ('schema_migrations', 'sqlite_sequence')"
+        ).fetchone()
+        return row[0] > 0
+
+    def _adopt_baseline(self, connection: sqlite3.Connection, migration: Migration) -> MigrationResult:
+        """Ghi nhận baseline cho database đã có schema mà không chạy lại schema.sql."""
+        self._record(connection, migration, 0.0)
+        return MigrationResult(migration.version, migration.name, 0.0, adopted=True)
+
+    def _apply(self, connection: sqlite3.Connection, migration: Migration, echo: bool) -> MigrationResult:
+        """Chạy một migration: index online trước, phần còn lại trong một transaction."""
+        statements = split_statements(migration.sql)
+        existing_tables = {
+            row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+
+        # Index được build online nếu bảng đã có và không câu lệnh nào đứng
+        # trước nó trong migration đụng tới bảng đó (VD: ADD COLUMN)
+        online, rest = [], []
+        touched = set()
+        for statement in statements:
+            match = _CREATE_INDEX.match(statement)
+            if match and match.group(2) in existing_tables and match.group(2) not in touched:
+                online.append((match.group(1), statement))
+            else:
+                rest.append(statement)
+                touched.update(re.findall(r"\w+", statement))
+
+        start = time.perf_counter()
+        built = []
+        for index_name, statement in online:
+            exists = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (index_name,)
+            ).fetchone()
+            if exists:
+                continue
+            index_start = time.perf_counter()
+            self._in_transaction(connection, [statement])
+            built.append(index_name)
+            if echo:
+                print(f"   🔨 {index_name}: {(time.perf_counter() - index_start) * 1000:.1f} ms")
+
+        durations = []
+
+        def record():
+            durations.append((time.perf_counter() - start) * 1000)
+            self._record(connection, migration, durations[0])
+
+        self._in_transaction(connection, rest, record)
+        return MigrationResult(migration.version, migration.name, durations[0], built)
+
+    @staticmethod
+    def _in_transaction(connection: sqlite3.Connection, statements: List[str], before_commit=None) -> None:
+        """Chạy các câu lệnh trong một transaction (BEGIN IMMEDIATE), lỗi thì rollback."""
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in statements:
+                connection.execute(statement)
+            if before_commit is not None:
+                before_commit()
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _record(connection: sqlite3.Connection, migration: Migration, duration_ms: float) -> None:
+        """Ghi version đã áp dụng."""
+        connection.execute(
+            "INSERT INTO schema_migrations (version, name, checksum, applied_at, duration_ms) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (migration.version, migration.name, migration.checksum,
+             datetime.now().isoformat(sep=" ", timespec="seconds"), duration_ms)
+        )
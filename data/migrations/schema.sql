@@ -3,19 +3,15 @@
 -- ============================================================================
 -- File: schema.sql
 -- Description: SQLite database schema cho hệ thống điểm danh sinh viên
--- 
+--
+-- Baseline (version 000) của migration runner: chỉ chạy trên database
+-- trống. Thay đổi schema sau này thêm vào versions/NNN_name.sql, không sửa
+-- file này.
+--
 -- Cách sử dụng:
 --   python -c "from data.migrations.init_db import init_database; init_database()"
 -- ============================================================================
 
--- Drop tables nếu tồn tại (cho development)
-DROP TABLE IF EXISTS attendance_records;
-DROP TABLE IF EXISTS attendance_sessions;
-DROP TABLE IF EXISTS classes_student;
-DROP TABLE IF EXISTS classes;
-DROP TABLE IF EXISTS dashboard;
-DROP TABLE IF EXISTS users;
-
 -- ============================================================================
 -- USERS TABLE
 -- ============================================================================
@@ -0,0 +1,24 @@
+-- ============================================================================
+-- Workload indexes (generated by scripts/index_advisor.py, 2026-10-17)
+-- SQL replay speed-up khi đo: 1.82x
+-- ============================================================================
+
+-- USE TEMP B-TREE FOR ORDER BY
+CREATE INDEX IF NOT EXISTS idx_attendance_records_student_code_attendance_time_record_id ON attendance_records(student_code, attendance_time, record_id);
+
+-- SCAN c
+CREATE INDEX IF NOT EXISTS idx_classes_student_student_code ON classes_student(student_code);
+
+-- USE TEMP B-TREE FOR ORDER BY
+CREATE INDEX IF NOT EXISTS idx_attendance_sessions_class_id_start_time_session_id ON attendance_sessions(class_id, start_time, session_id);
+
+-- SEARCH attendance_sessions USING INDEX idx_sessions_class (class_id=?) + filter status
+CREATE INDEX IF NOT EXISTS idx_attendance_sessions_class_id_open ON attendance_sessions(class_id) WHERE status = 'OPEN';
+
+-- USE TEMP B-TREE FOR GROUP BY
+CREATE INDEX IF NOT EXISTS idx_attendance_records_session_id_status ON attendance_records(session_id, status);
+
+-- Index cũ là prefix của index mới (thừa, chỉ làm chậm ghi)
+DROP INDEX IF EXISTS idx_records_session;
+DROP INDEX IF EXISTS idx_records_student;
+DROP INDEX IF EXISTS idx_sessions_class;
@@ -0,0 +1,52 @@
+-- ============================================================================
+-- Student attendance summary
+-- ============================================================================
+-- Số buổi / số buổi có mặt của từng sinh viên, được trigger cập nhật khi
+-- attendance_records thay đổi. Dashboard đọc một dòng thay vì đếm toàn bộ
+-- lịch sử (chi phí không tăng theo số records).
+--
+-- INSERT OR REPLACE chỉ chạy delete trigger khi PRAGMA recursive_triggers
+-- = ON (Database và MigrationRunner luôn bật).
+-- ============================================================================
+
+CREATE TABLE student_attendance_summary (
+    student_code CHAR(10) PRIMARY KEY,
+    total_count INTEGER NOT NULL DEFAULT 0,
+    present_count INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+INSERT INTO student_attendance_summary (student_code, total_count, present_count)
+SELECT student_code, COUNT(*), SUM(status = 'PRESENT')
+FROM attendance_records
+GROUP BY student_code;
+
+CREATE TRIGGER trg_records_summary_insert AFTER INSERT ON attendance_records
+BEGIN
+    INSERT INTO student_attendance_summary (student_code, total_count, present_count)
+    VALUES (NEW.student_code, 1, NEW.status = 'PRESENT')
+    ON CONFLICT(student_code) DO UPDATE SET
+        total_count = total_count + 1,
+        present_count = present_count + excluded.present_count;
+END;
+
+CREATE TRIGGER trg_records_summary_delete AFTER DELETE ON attendance_records
+BEGIN
+    UPDATE student_attendance_summary SET
+        total_count = total_count - 1,
+        present_count = present_count - (OLD.status = 'PRESENT')
+    WHERE student_code = OLD.student_code;
+END;
+
+CREATE TRIGGER trg_records_summary_update AFTER UPDATE OF student_code, status ON attendance_records
+BEGIN
+    UPDATE student_attendance_summary SET
+        total_count = total_count - 1,
+        present_count = present_count - (OLD.status = 'PRESENT')
+    WHERE student_code = OLD.student_code;
+
+    INSERT INTO student_attendance_summary (student_code, total_count, present_count)
+    VALUES (NEW.student_code, 1, NEW.status = 'PRESENT')
+    ON CONFLICT(student_code) DO UPDATE SET
+        total_count = total_count + 1,
+        present_count = present_count + excluded.present_count;
+END;
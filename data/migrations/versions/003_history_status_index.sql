@@ -0,0 +1,9 @@
+-- ============================================================================
+-- History status index
+-- ============================================================================
+-- Trang lịch sử lọc theo trạng thái (VD: chỉ các buổi vắng) đọc theo index
+-- (student_code, status, attendance_time, record_id): đúng thứ tự sắp xếp,
+-- dừng ngay khi đủ một trang, đếm tổng bằng một range của index.
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_attendance_records_student_code_status_attendance_time_record_id ON attendance_records(student_code, status, attendance_time, record_id);
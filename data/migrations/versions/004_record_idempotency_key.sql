@@ -0,0 +1,10 @@
+-- ============================================================================
+-- Record idempotency key
+-- ============================================================================
+-- Key do client gửi kèm lần submit điểm danh. Client gửi lại cùng key (retry
+-- sau timeout / mất mạng) nhận lại kết quả thành công thay vì lỗi "đã điểm
+-- danh". Trùng lặp vẫn do UNIQUE(session_id, student_code) chặn, key chỉ được
+-- đọc lại qua index đó nên không cần index riêng.
+-- ============================================================================
+
+ALTER TABLE attendance_records ADD COLUMN idempotency_key VARCHAR(64);
@@ -0,0 +1,12 @@
+-- ============================================================================
+-- Open session expiry index
+-- ============================================================================
+-- Tự động đóng session hết hạn: UPDATE ... WHERE status = 'OPEN' AND
+-- end_time < ? và MIN(end_time) của session đang mở (thời điểm scheduler
+-- thức dậy lần tới). Partial index chỉ chứa session đang mở nên cả hai chỉ
+-- đọc đúng các session cần đóng / một entry, không phụ thuộc kích thước bảng.
+-- Hai query dùng INDEXED BY: khi chưa ANALYZE planner ưu tiên idx_sessions_status
+-- (status=?) và quét mọi session đang mở.
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_attendance_sessions_end_time_open ON attendance_sessions(end_time) WHERE status = 'OPEN';
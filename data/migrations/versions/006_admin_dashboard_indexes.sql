@@ -0,0 +1,14 @@
+-- ============================================================================
+-- Admin dashboard indexes
+-- ============================================================================
+-- Admin dashboard đếm session bắt đầu trong tháng và record được điểm danh
+-- trong ngày (AttendanceSessionRepository.get_system_counts). Không có index
+-- theo start_time / attendance_time nên hai COUNT quét toàn bảng; với index
+-- chúng chỉ đọc đúng khoảng thời gian cần đếm.
+-- Record chưa điểm danh (ABSENT) có attendance_time NULL: partial index bỏ
+-- qua chúng (so sánh attendance_time >= ? đã kéo theo IS NOT NULL).
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_attendance_sessions_start_time ON attendance_sessions(start_time);
+
+CREATE INDEX IF NOT EXISTS idx_attendance_records_attendance_time ON attendance_records(attendance_time) WHERE attendance_time IS NOT NULL;
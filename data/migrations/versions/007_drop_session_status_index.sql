@@ -0,0 +1,12 @@
+-- ============================================================================
+-- Drop idx_sessions_status
+-- ============================================================================
+-- Index một cột status (vài giá trị) gần như không lọc được gì: query theo
+-- session đang mở đã có partial index (class_id) / (end_time) WHERE
+-- status = 'OPEN'. Khi chưa ANALYZE, planner lại ưu tiên index này và quét
+-- mọi session đang mở thay vì đọc partial index; bỏ nó để close_expired /
+-- next_expiry tự chọn idx_attendance_sessions_end_time_open mà không cần
+-- INDEXED BY (INDEXED BY lỗi trên database chưa có migration 005).
+-- ============================================================================
+
+DROP INDEX IF EXISTS idx_sessions_status;
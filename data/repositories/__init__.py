@@ -8,6 +8,7 @@ Package contains repository classes:
 - classroom_repository.py: Classroom CRUD
 - attendance_repository.py: Attendance operations
 - password_reset_token_repository.py: Password reset token operations
+- stats_repository.py: System-wide aggregate counts (admin dashboard)
 
 Repository Pattern: Separates business logic from data access.
 
@@ -22,21 +23,24 @@ Usage:
     users = user_repo.find_all()
 """
 
-from .base_repository import BaseRepository
+from .base_repository import BaseRepository, Page
 from .user_repository import UserRepository
 from .classroom_repository import ClassroomRepository
 from .attendance_repository import AttendanceSessionRepository, AttendanceRecordRepository
 from .password_reset_token_repository import PasswordResetTokenRepository
+from .stats_repository import StatsRepository
 
 # Alias for compatibility
 ClassRepository = ClassroomRepository
 
 __all__ = [
     "BaseRepository",
+    "Page",
     "UserRepository",
     "ClassroomRepository",
     "ClassRepository",  # Alias
     "AttendanceSessionRepository",
     "AttendanceRecordRepository",
     "PasswordResetTokenRepository",
+    "StatsRepository",
 ]
@@ -6,13 +6,72 @@ Repository cho AttendanceSession và AttendanceRecord.
 """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 from core.enums import AttendanceMethod, AttendanceStatus
-from core.models import AttendanceSession, AttendanceRecord
+from core.models import AttendanceSession, AttendanceRecord, AttendanceRecordBatch, AttendanceHistoryRow
 from core.models.attendance_session import SessionStatus
-from data.database import Database
-from .base_repository import BaseRepository
+from data.database import Database, casefold
+from utils.id_generator import new_id
+from .base_repository import BaseRepository, Page, _chunked, enum_lookup, to_datetime
+
+_MONTH_ABBR = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+
+# Ký tự của ngày hiển thị "2024-01-15" / "15 Jan 2024": (phần, vị trí) hoặc ký tự cố định
+_ISO_DATE_SLOTS = (("Y", 0), ("Y", 1), ("Y", 2), ("Y", 3), "-", ("M", 0), ("M", 1), "-", ("D", 0), ("D", 1))
+_LABEL_DATE_SLOTS = (("D", 0), ("D", 1), " ", ("b", 0), ("b", 1), ("b", 2), " ",
+                     ("Y", 0), ("Y", 1), ("Y", 2), ("Y", 3))
+
+
+def _date_search_patterns(text: str) -> List[str]:
+    """
+    GLOB patterns trên attendance_time (ISO "YYYY-MM-DDTHH:MM:SS") khớp các
+    ngày mà "YYYY-MM-DD" hoặc "DD Mon YYYY" chứa text (không phân biệt hoa thường).
+    
+    So khớp pattern neo đầu chuỗi rẻ hơn nhiều so với dựng chuỗi ngày bằng
+    strftime cho từng dòng; text không thể là một phần của ngày -> [].
+    
+    Example:
+        >>> _date_search_patterns("15 jan")
+        ['????-01-15*']
+        >>> _date_search_patterns("2024")
+        ['2024*']
+        >>> _date_search_patterns("Lập trình")
+        []
+    """
+    text = text.lower()
+    patterns: List[str] = []
+    for slots in (_ISO_DATE_SLOTS, _LABEL_DATE_SLOTS):
+        for offset in range(len(slots) - len(text) + 1):
+            parts = {"Y": ["?"] * 4, "M": ["?"] * 2, "D": ["?"] * 2}
+            letters = {}
+            for char, slot in zip(text, slots[offset:]):
+                if isinstance(slot, str):
+                    if char != slot:
+                        break
+                elif slot[0] == "b":
+                    letters[slot[1]] = char
+                elif char in "0123456789":
+                    parts[slot[0]][slot[1]] = char
+                else:
+                    break
+            else:
+                months = ["".join(parts["M"])]
+                if letters:
+                    months = [
+                        f"{number:02d}" for number, name in enumerate(_MONTH_ABBR, 1)
+                        if all(name[i] == char for i, char in letters.items())
+                    ]
+                for month in months:
+                    pattern = f"{''.join(parts['Y'])}-{month}-{''.join(parts['D'])}".rstrip("?-") + "*"
+                    if pattern not in patterns:
+                        patterns.append(pattern)
+    return patterns
+
+
+# Keyset khi sắp theo tên lớp, không phân biệt hoa thường (casefold Unicode như khi tìm kiếm;
+# NULL -> '' để so sánh row value được)
+_CLASS_SORT_KEY = ("casefold(COALESCE(c.class_name, ''))", "COALESCE(r.attendance_time, '')", "r.record_id")
 
 
 class AttendanceSessionRepository(BaseRepository[AttendanceSession]):
@@ -24,30 +83,49 @@ class AttendanceSessionRepository(BaseRepository[AttendanceSession]):
         >>> active_sessions = session_repo.find_active_by_class("CS101")
     """
     
+    primary_key = "session_id"
+    
     @property
     def table_name(self) -> str:
         return "attendance_sessions"
     
     def _row_to_entity(self, row) -> AttendanceSession:
-        """Chuyển đổi row thành AttendanceSession."""
-        # Safely get optional fields from sqlite3.Row
-        attendance_link = row["attendance_link"] if "attendance_link" in row.keys() else None
-        token = row["token"] if "token" in row.keys() else None
-        qr_window = row["qr_window_minutes"] if "qr_window_minutes" in row.keys() else 1
-        late_window = row["late_window_minutes"] if "late_window_minutes" in row.keys() else 15
-        
-        return AttendanceSession(
-            session_id=row["session_id"],
-            class_id=row["class_id"],
-            start_time=datetime.fromisoformat(row["start_time"]) if isinstance(row["start_time"], str) else row["start_time"],
-            end_time=datetime.fromisoformat(row["end_time"]) if isinstance(row["end_time"], str) else row["end_time"],
-            method=AttendanceMethod.from_string(row["attendance_method"]),
-            status=SessionStatus(row["status"]),
-            attendance_link=attendance_link,
-            token=token,
-            qr_window_minutes=qr_window,
-            late_window_minutes=late_window
-        )
+        """Chuyển đổi sqlite3.Row thành AttendanceSession."""
+        return self._map_row(row)
+    
+    def _compile_mapper(self, columns: Tuple[str, ...]) -> Callable[[tuple], AttendanceSession]:
+        """Compile mapper tuple row -> AttendanceSession bằng index vị trí."""
+        index = {name: i for i, name in enumerate(columns)}
+        i_id, i_class = index["session_id"], index["class_id"]
+        i_start, i_end = index["start_time"], index["end_time"]
+        i_method, i_status = index["attendance_method"], index["status"]
+        
+        # Cột optional: không có trong SELECT thì dùng giá trị mặc định
+        i_link = index.get("attendance_link")
+        i_token = index.get("token")
+        i_qr = index.get("qr_window_minutes")
+        i_late = index.get("late_window_minutes")
+        i_created = index.get("created_at")
+        
+        method_of = enum_lookup(AttendanceMethod)
+        status_of = enum_lookup(SessionStatus)
+        
+        def mapper(row: tuple) -> AttendanceSession:
+            return AttendanceSession.trusted(
+                row[i_id],
+                row[i_class],
+                to_datetime(row[i_start]),
+                to_datetime(row[i_end]),
+                method_of(row[i_method]),
+                status_of(row[i_status]),
+                row[i_link] if i_link is not None else None,
+                row[i_token] if i_token is not None else None,
+                row[i_qr] if i_qr is not None else 1,
+                row[i_late] if i_late is not None else 15,
+                to_datetime(row[i_created]) if i_created is not None else None
+            )
+        
+        return mapper
 
     def _entity_to_dict(self, entity: AttendanceSession) -> Dict[str, Any]:
         """Chuyển đổi AttendanceSession thành dictionary."""
@@ -64,12 +142,6 @@ class AttendanceSessionRepository(BaseRepository[AttendanceSession]):
             "late_window_minutes": entity.late_window_minutes,
         }
     
-    def find_by_id(self, session_id: str) -> Optional[AttendanceSession]:
-        """Override find_by_id to use session_id."""
-        query = f"SELECT * FROM {self.table_name} WHERE session_id = ?"
-        row = self.db.fetch_one(query, (session_id,))
-        return self._row_to_entity(row) if row else None
-    
     def delete(self, session_id: str) -> bool:
         """
         Override delete to use session_id instead of id.
@@ -80,38 +152,197 @@ class AttendanceSessionRepository(BaseRepository[AttendanceSession]):
         Returns:
             True if deletion was successful
         """
-        # First, delete all attendance records for this session
-        self.db.execute("DELETE FROM attendance_records WHERE session_id = ?", (session_id,))
-        
-        # Then delete the session itself
-        query = f"DELETE FROM {self.table_name} WHERE session_id = ?"
-        cursor = self.db.execute(query, (session_id,))
+        with self.db.transaction():
+            # First, delete all attendance records for this session
+            self.db.execute("DELETE FROM attendance_records WHERE session_id = ?", (session_id,))
+            
+            # Then delete the session itself
+            query = f"DELETE FROM {self.table_name} WHERE session_id = ?"
+            cursor = self.db.execute(query, (session_id,))
+            self._invalidate(session_id)
         return cursor.rowcount > 0
     
     def find_by_class(self, class_id: str) -> List[AttendanceSession]:
         """Lấy tất cả sessions của một lớp."""
         query = f"SELECT * FROM {self.table_name} WHERE class_id = ? ORDER BY start_time DESC"
-        rows = self.db.fetch_all(query, (class_id,))
-        return [self._row_to_entity(row) for row in rows]
+        return self._fetch_entities(query, (class_id,))
+    
+    def iter_by_class(self, class_id: str, chunk_size: Optional[int] = None) -> Iterator[AttendanceSession]:
+        """Duyệt sessions của một lớp (mới nhất trước) theo từng chunk."""
+        query = f"""
+            SELECT * FROM {self.table_name} WHERE class_id = ?
+            ORDER BY start_time DESC, session_id DESC
+        """
+        return self._iter_entities(query, (class_id,), chunk_size)
     
+    def page_by_class(
+        self,
+        class_id: str,
+        after_key: Optional[Tuple[datetime, str]] = None,
+        limit: int = 50
+    ) -> Page[AttendanceSession]:
+        """
+        Lấy một trang sessions của lớp (mới nhất trước) bằng keyset pagination.
+        
+        Args:
+            class_id: Mã lớp
+            after_key: (start_time, session_id) của session cuối trang trước
+            limit: Số session tối đa mỗi trang
+            
+        Returns:
+            Page với next_key = (start_time, session_id)
+        """
+        if after_key is None:
+            seek, params = "", (class_id,)
+        else:
+            seek, params = "AND (start_time, session_id) < (?, ?)", (class_id, *after_key)
+        
+        query = f"""
+            SELECT * FROM {self.table_name}
+            WHERE class_id = ? {seek}
+            ORDER BY start_time DESC, session_id DESC
+            LIMIT ?
+        """
+        sessions = self._fetch_entities(query, (*params, limit + 1))
+        return self._make_page(sessions, limit, lambda s: (s.start_time, s.session_id))
+    
+    def find_by_student_between(
+        self,
+        student_code: str,
+        start: datetime,
+        end: datetime
+    ) -> List[AttendanceSession]:
+        """
+        Lấy sessions của mọi lớp sinh viên đang học, bắt đầu trong [start, end).
+
+        Một query classes_student -> attendance_sessions; mỗi lớp đọc một range
+        của index (class_id, start_time, session_id) nên chi phí theo số
+        sessions trong khoảng, không theo toàn bộ lịch sử của lớp.
+
+        Args:
+            student_code: Mã sinh viên
+            start: Thời điểm bắt đầu (bao gồm)
+            end: Thời điểm kết thúc (không bao gồm)
+
+        Returns:
+            List AttendanceSession, sắp theo start_time tăng dần
+
+        Example:
+            >>> today = datetime.combine(date.today(), time.min)
+            >>> repo.find_by_student_between("SV001", today, today + timedelta(days=1))
+        """
+        query = f"""
+            SELECT s.* FROM classes_student cs
+            JOIN {self.table_name} s ON s.class_id = cs.class_id
+            WHERE cs.student_code = ? AND s.start_time >= ? AND s.start_time < ?
+            ORDER BY s.start_time, s.session_id
+        """
+        return self._fetch_entities(query, (student_code, start, end))
+
+    def find_by_teacher(
+        self,
+        teacher_code: str,
+        limit: int = 50,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        status: Optional[SessionStatus] = None
+    ) -> List[AttendanceSession]:
+        """
+        Lấy các session mới nhất của mọi lớp giáo viên dạy, trong một query.
+
+        classes JOIN attendance_sessions theo teacher_code, ORDER BY start_time
+        DESC LIMIT trong SQL. Mỗi lớp chỉ đóng góp tối đa `limit` session đọc
+        ngược theo index (class_id, start_time, session_id), nên chi phí theo
+        số lớp x limit, không theo toàn bộ lịch sử session.
+
+        Args:
+            teacher_code: Mã giáo viên
+            limit: Số session tối đa
+            start: Chỉ lấy session bắt đầu từ thời điểm này (bao gồm, optional)
+            end: Chỉ lấy session bắt đầu trước thời điểm này (không bao gồm, optional)
+            status: Lọc theo trạng thái (optional)
+
+        Returns:
+            List AttendanceSession, mới nhất trước
+
+        Example:
+            >>> repo.find_by_teacher("GV001", limit=10, status=SessionStatus.OPEN)
+        """
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("AND x.start_time >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("AND x.start_time < ?")
+            params.append(end)
+        if status is not None:
+            conditions.append("AND x.status = ?")
+            params.append(status.value)
+
+        query = f"""
+            SELECT s.* FROM classes c
+            JOIN {self.table_name} s ON s.session_id IN (
+                SELECT x.session_id FROM {self.table_name} x
+                WHERE x.class_id = c.class_id {" ".join(conditions)}
+                ORDER BY x.start_time DESC, x.session_id DESC
+                LIMIT ?
+            )
+            WHERE c.teacher_code = ?
+            ORDER BY s.start_time DESC, s.session_id DESC
+            LIMIT ?
+        """
+        return self._fetch_entities(query, (*params, limit, teacher_code, limit))
+
     def find_active_by_class(self, class_id: str) -> List[AttendanceSession]:
         """Lấy các session đang mở của một lớp."""
         query = f"SELECT * FROM {self.table_name} WHERE class_id = ? AND status = 'OPEN'"
-        rows = self.db.fetch_all(query, (class_id,))
-        return [self._row_to_entity(row) for row in rows]
+        return self._fetch_entities(query, (class_id,))
     
     def find_by_token(self, token: str) -> Optional[AttendanceSession]:
         """Tìm session theo token."""
         query = f"SELECT * FROM {self.table_name} WHERE token = ?"
-        row = self.db.fetch_one(query, (token,))
-        return self._row_to_entity(row) if row else None
+        return self._fetch_entity(query, (token,))
     
     def close_session(self, session_id: str) -> bool:
         """Đóng một session."""
         query = f"UPDATE {self.table_name} SET status = 'CLOSED' WHERE session_id = ?"
         cursor = self.db.execute(query, (session_id,))
+        self._invalidate(session_id)
         return cursor.rowcount > 0
 
+    def close_expired(self, now: datetime) -> List[str]:
+        """
+        Đóng mọi session đang mở có end_time < now bằng một câu UPDATE.
+        
+        Planner đọc partial index (end_time) WHERE status = 'OPEN' (migration
+        005/007): chi phí theo số session hết hạn, không theo kích thước bảng.
+        Không dùng INDEXED BY để query vẫn chạy trên database chưa migrate.
+        
+        Args:
+            now: Thời điểm hiện tại
+            
+        Returns:
+            session_id của các session vừa được đóng
+        """
+        query = f"""
+            UPDATE {self.table_name}
+            SET status = 'CLOSED'
+            WHERE status = 'OPEN' AND end_time < ?
+            RETURNING session_id
+        """
+        with self.db.transaction():
+            closed = [row[0] for row in self.db.execute(query, (now,)).fetchall()]
+        for session_id in closed:
+            self._invalidate(session_id)
+        return closed
+    
+    def next_expiry(self) -> Optional[datetime]:
+        """end_time sớm nhất của các session đang mở (None nếu không có session mở)."""
+        row = self.db.select(
+            f"SELECT MIN(end_time) FROM {self.table_name} WHERE status = 'OPEN'"
+        ).fetchone()
+        return to_datetime(row[0]) if row and row[0] is not None else None
+
 
 class AttendanceRecordRepository(BaseRepository[AttendanceRecord]):
     """
@@ -122,32 +353,45 @@ class AttendanceRecordRepository(BaseRepository[AttendanceRecord]):
         >>> records = record_repo.find_by_session("SS001")
     """
     
+    primary_key = "record_id"
+    
     @property
     def table_name(self) -> str:
         return "attendance_records"
     
+    @property
+    def conflict_keys(self) -> Tuple[str, ...]:
+        """Mỗi sinh viên chỉ có một record cho mỗi session (UNIQUE constraint)."""
+        return ("session_id", "student_code")
+    
     def _row_to_entity(self, row) -> AttendanceRecord:
-        """Chuyển đổi row thành AttendanceRecord."""
-        attendance_time = None
-
-        if "attendance_time" in row.keys() and row["attendance_time"]:
-            att_time_val = row["attendance_time"]
-            if isinstance(att_time_val, str):
-                attendance_time = datetime.fromisoformat(att_time_val)
-            else:
-                attendance_time = att_time_val
+        """Chuyển đổi sqlite3.Row thành AttendanceRecord."""
+        return self._map_row(row)
+    
+    def _compile_mapper(self, columns: Tuple[str, ...]) -> Callable[[tuple], AttendanceRecord]:
+        """Compile mapper tuple row -> AttendanceRecord bằng index vị trí."""
+        index = {name: i for i, name in enumerate(columns)}
+        i_id, i_session = index["record_id"], index["session_id"]
+        i_student, i_status = index["student_code"], index["status"]
+        i_time = index.get("attendance_time")
+        i_remark = index.get("remark")
+        i_created = index.get("created_at")
         
-        remark = row["remark"] if "remark" in row.keys() else None
+        status_of = enum_lookup(AttendanceStatus)
         
-        return AttendanceRecord(
-            record_id=row["record_id"],
-            session_id=row["session_id"],
-            student_code=row["student_code"],
-            status=AttendanceStatus.from_string(row["status"]),
-            attendance_time=attendance_time,
-            remark=remark
-        )
-    
+        def mapper(row: tuple) -> AttendanceRecord:
+            return AttendanceRecord.trusted(
+                row[i_id],
+                row[i_session],
+                row[i_student],
+                status_of(row[i_status]),
+                to_datetime(row[i_time] or None) if i_time is not None else None,
+                row[i_remark] if i_remark is not None else None,
+                to_datetime(row[i_created]) if i_created is not None else None
+            )
+        
+        return mapper
+
     def _entity_to_dict(self, entity: AttendanceRecord) -> Dict[str, Any]:
         """Chuyển đổi AttendanceRecord thành dictionary."""
         return {
@@ -162,14 +406,121 @@ class AttendanceRecordRepository(BaseRepository[AttendanceRecord]):
     def find_by_session(self, session_id: str) -> List[AttendanceRecord]:
         """Lấy tất cả records của một session."""
         query = f"SELECT * FROM {self.table_name} WHERE session_id = ?"
-        rows = self.db.fetch_all(query, (session_id,))
-        return [self._row_to_entity(row) for row in rows]
+        return self._fetch_entities(query, (session_id,))
     
     def find_by_student(self, student_code: str) -> List[AttendanceRecord]:
         """Lấy lịch sử điểm danh của sinh viên."""
         query = f"SELECT * FROM {self.table_name} WHERE student_code = ? ORDER BY attendance_time DESC"
-        rows = self.db.fetch_all(query, (student_code,))
-        return [self._row_to_entity(row) for row in rows]
+        return self._fetch_entities(query, (student_code,))
+    
+    def iter_by_student(self, student_code: str, chunk_size: Optional[int] = None) -> Iterator[AttendanceRecord]:
+        """Duyệt lịch sử điểm danh của sinh viên (mới nhất trước) theo từng chunk."""
+        query = f"""
+            SELECT * FROM {self.table_name} WHERE student_code = ?
+            ORDER BY attendance_time DESC, record_id DESC
+        """
+        return self._iter_entities(query, (student_code,), chunk_size)
+    
+    def page_by_student(
+        self,
+        student_code: str,
+        after_key: Optional[Tuple[Optional[datetime], str]] = None,
+        limit: int = 50
+    ) -> Page[AttendanceRecord]:
+        """
+        Lấy một trang lịch sử điểm danh (mới nhất trước) bằng keyset pagination.
+        
+        Records vắng mặt (attendance_time NULL) nằm cuối, sắp theo record_id.
+        
+        Args:
+            student_code: Mã sinh viên
+            after_key: (attendance_time, record_id) của record cuối trang trước
+            limit: Số record tối đa mỗi trang
+            
+        Returns:
+            Page với next_key = (attendance_time, record_id)
+        """
+        seek, params = self._history_seek(after_key)
+        query = f"""
+            SELECT * FROM {self.table_name}
+            WHERE student_code = ? {seek}
+            ORDER BY attendance_time DESC, record_id DESC
+            LIMIT ?
+        """
+        records = self._fetch_entities(query, (student_code, *params, limit + 1))
+        return self._make_page(records, limit, lambda r: (r.attendance_time, r.record_id))
+    
+    @staticmethod
+    def _history_seek(
+        after_key: Optional[Tuple[Optional[datetime], str]],
+        prefix: str = "",
+        descending: bool = True
+    ) -> Tuple[str, Tuple]:
+        """
+        Điều kiện keyset cho thứ tự (attendance_time, record_id).
+        
+        NULL (vắng mặt) được coi là cũ nhất: cuối khi DESC, đầu khi ASC.
+        
+        Args:
+            after_key: (attendance_time, record_id) của dòng cuối trang trước
+            prefix: Alias bảng (VD: "r.")
+            descending: Thứ tự giảm dần (mới nhất trước)
+            
+        Returns:
+            (SQL bắt đầu bằng AND hoặc rỗng, params)
+        """
+        if after_key is None:
+            return "", ()
+        last_time, last_id = after_key
+        time, record_id = f"{prefix}attendance_time", f"{prefix}record_id"
+        if descending:
+            if last_time is None:
+                return f"AND {time} IS NULL AND {record_id} < ?", (last_id,)
+            return f"AND ({time} IS NULL OR ({time}, {record_id}) < (?, ?))", (last_time, last_id)
+        if last_time is None:
+            return f"AND (({time} IS NULL AND {record_id} > ?) OR {time} IS NOT NULL)", (last_id,)
+        return f"AND {time} IS NOT NULL AND ({time}, {record_id}) > (?, ?)", (last_time, last_id)
+    
+    def load_batch(self, chunk_size: Optional[int] = None, **conditions) -> AttendanceRecordBatch:
+        """
+        Load records vào AttendanceRecordBatch (dạng cột) - cho analytics/export.
+        
+        Không tạo object AttendanceRecord cho từng dòng; rows được đọc theo
+        chunk và nối thẳng vào các cột của batch.
+        
+        Args:
+            chunk_size: Số dòng mỗi lần fetch (mặc định batch_size)
+            **conditions: Điều kiện WHERE dạng column=value (VD: session_id="SS001")
+            
+        Returns:
+            AttendanceRecordBatch
+            
+        Example:
+            >>> batch = repo.load_batch(student_code="SV001")
+            >>> batch.count_by_status()
+        """
+        query = (
+            f"SELECT record_id, session_id, student_code, status, attendance_time, remark "
+            f"FROM {self.table_name}"
+        )
+        if conditions:
+            query += " WHERE " + " AND ".join(f"{k} = ?" for k in conditions)
+        
+        status_of = enum_lookup(AttendanceStatus)
+        batch = AttendanceRecordBatch()
+        cursor = self.db.select(query, tuple(conditions.values()))
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size or self.batch_size)
+                if not rows:
+                    break
+                batch.extend_rows(
+                    (record_id, session_id, student_code, status_of(status), to_datetime(time or None), remark)
+                    for record_id, session_id, student_code, status, time, remark in rows
+                )
+        finally:
+            cursor.close()
+        return batch
     
     def find_by_session_and_student(
         self, 
@@ -178,8 +529,129 @@ class AttendanceRecordRepository(BaseRepository[AttendanceRecord]):
     ) -> Optional[AttendanceRecord]:
         """Tìm record của sinh viên trong một session."""
         query = f"SELECT * FROM {self.table_name} WHERE session_id = ? AND student_code = ?"
-        row = self.db.fetch_one(query, (session_id, student_code))
-        return self._row_to_entity(row) if row else None
+        return self._fetch_entity(query, (session_id, student_code))
+    
+    def _submit_query(self, rows: int) -> str:
+        """
+        INSERT ... SELECT cho `rows` submission (mỗi submission 6 tham số).
+        
+        Chỉ dòng có session đang mở, attendance_time trong giờ session và
+        verification hợp lệ (LINK_TOKEN: đúng token, QR: có dữ liệu QR) được
+        ghi; trùng (session_id, student_code) bị bỏ qua bằng ON CONFLICT.
+        
+        WITH nằm sau INSERT INTO (không đứng đầu câu) để cursor.rowcount
+        của sqlite3 vẫn báo số dòng đã ghi.
+        """
+        values = ", ".join(["(?, ?, ?, ?, ?, ?)"] * rows)
+        return f"""
+            INSERT INTO {self.table_name}
+                (record_id, session_id, student_code, status, attendance_time, remark, idempotency_key)
+            WITH v(record_id, session_id, student_code, attendance_time, verification, idempotency_key)
+                AS (VALUES {values})
+            SELECT v.record_id, v.session_id, v.student_code, ?, v.attendance_time, '', v.idempotency_key
+            FROM v JOIN attendance_sessions s ON s.session_id = v.session_id
+            WHERE s.status = ?
+              AND s.start_time <= v.attendance_time AND s.end_time >= v.attendance_time
+              AND CASE s.attendance_method
+                      WHEN ? THEN s.token = v.verification
+                      WHEN ? THEN v.verification IS NOT NULL
+                      ELSE 1
+                  END
+            ON CONFLICT (session_id, student_code) DO NOTHING
+        """
+    
+    @staticmethod
+    def _submit_params(
+        submissions: Sequence[Tuple[str, str, str, datetime, Optional[str], Optional[str]]]
+    ) -> Tuple:
+        """Tham số cho _submit_query: các dòng VALUES rồi tới hằng số của điều kiện."""
+        params: List[Any] = []
+        for record_id, session_id, student_code, attendance_time, verification, key in submissions:
+            params += [record_id, session_id, student_code, attendance_time, verification or None, key]
+        return (*params, AttendanceStatus.PRESENT.value, SessionStatus.OPEN.value,
+                AttendanceMethod.LINK_TOKEN.value, AttendanceMethod.QR.value)
+    
+    def submit_present(
+        self,
+        record_id: str,
+        session_id: str,
+        student_code: str,
+        attendance_time: datetime,
+        verification_data: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> bool:
+        """
+        Ghi record PRESENT trong một câu lệnh nếu session nhận submit.
+        
+        Điều kiện session và chống trùng nằm trong chính câu INSERT (xem
+        _submit_query): không có khoảng hở giữa kiểm tra và ghi khi nhiều
+        submit chạy song song.
+        
+        Args:
+            record_id: Mã record mới
+            session_id: Mã session
+            student_code: Mã sinh viên
+            attendance_time: Thời điểm submit
+            verification_data: Token hoặc dữ liệu QR
+            idempotency_key: Key retry của client (lưu cùng record)
+            
+        Returns:
+            True nếu đã ghi; False nếu đã có record hoặc session không nhận submit
+            (dùng find_submission / session để biết lý do)
+        """
+        submission = (record_id, session_id, student_code, attendance_time, verification_data, idempotency_key)
+        cursor = self.db.execute(self._submit_query(1), self._submit_params([submission]))
+        if cursor.rowcount > 0:
+            self._invalidate(record_id)
+        return cursor.rowcount > 0
+    
+    def submit_present_many(
+        self,
+        submissions: Sequence[Tuple[str, str, str, datetime, Optional[str], Optional[str]]]
+    ) -> Set[str]:
+        """
+        Ghi nhiều submission bằng INSERT nhiều dòng trong một transaction (một commit).
+        
+        Cùng điều kiện với submit_present; hai submission trùng (session_id,
+        student_code) trong cùng batch: chỉ dòng đầu được ghi.
+        
+        Args:
+            submissions: Các tuple (record_id, session_id, student_code,
+                         attendance_time, verification_data, idempotency_key)
+            
+        Returns:
+            record_id của các submission đã được ghi
+        """
+        written: Set[str] = set()
+        if not submissions:
+            return written
+        
+        chunk_size = max(1, min(self.batch_size, (self.db.max_variables - 4) // 6))
+        with self.db.transaction():
+            for chunk in _chunked(submissions, chunk_size):
+                self.db.execute(self._submit_query(len(chunk)), self._submit_params(chunk))
+                record_ids = [submission[0] for submission in chunk]
+                placeholders = ", ".join(["?"] * len(record_ids))
+                written.update(
+                    row[0] for row in self.db.select(
+                        f"SELECT record_id FROM {self.table_name} WHERE record_id IN ({placeholders})",
+                        tuple(record_ids)
+                    )
+                )
+        return written
+    
+    def find_submission(self, session_id: str, student_code: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Record đã submit của sinh viên trong session (qua UNIQUE index).
+        
+        Returns:
+            (record_id, idempotency_key) hoặc None nếu chưa submit
+        """
+        row = self.db.select(
+            f"SELECT record_id, idempotency_key FROM {self.table_name} WHERE session_id = ? AND student_code = ?",
+            (session_id, student_code)
+        ).fetchone()
+        return tuple(row) if row is not None else None
     
     def mark_attendance(
         self, 
@@ -188,6 +660,16 @@ class AttendanceRecordRepository(BaseRepository[AttendanceRecord]):
         status: AttendanceStatus
     ) -> bool:
         """Đánh dấu điểm danh cho sinh viên."""
+        with self.db.transaction():
+            return self._mark_attendance(session_id, student_code, status)
+    
+    def _mark_attendance(
+        self, 
+        session_id: str, 
+        student_code: str, 
+        status: AttendanceStatus
+    ) -> bool:
+        """Kiểm tra và ghi điểm danh (chạy bên trong transaction của mark_attendance)."""
         existing = self.find_by_session_and_student(session_id, student_code)
         
         if existing:
@@ -205,7 +687,7 @@ class AttendanceRecordRepository(BaseRepository[AttendanceRecord]):
         else:
             # Insert new record
             record = AttendanceRecord(
-                record_id=f"REC{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                record_id=new_id("REC"),
                 session_id=session_id,
                 student_code=student_code,
                 status=status,
@@ -229,3 +711,279 @@ class AttendanceRecordRepository(BaseRepository[AttendanceRecord]):
             stats[row["status"]] = row["count"]
         
         return stats
+    
+    def get_session_stats_many(self, session_ids: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        """
+        Thống kê điểm danh của nhiều session trong một query GROUP BY session_id.
+        
+        Số PRESENT / ABSENT đọc từ index (session_id, status); sĩ số lớp là
+        COUNT trên primary key (class_id, student_code) của classes_student.
+        
+        Args:
+            session_ids: Các mã session (trùng lặp được bỏ qua)
+            
+        Returns:
+            Dict session_id -> {"PRESENT": n, "ABSENT": n, "enrolled": n};
+            session không tồn tại không có trong kết quả
+            
+        Example:
+            >>> repo.get_session_stats_many(["SS001", "SS002"])["SS001"]
+            {'PRESENT': 25, 'ABSENT': 3, 'enrolled': 30}
+        """
+        stats: Dict[str, Dict[str, int]] = {}
+        for chunk in _chunked(dict.fromkeys(session_ids), self.db.max_variables):
+            placeholders = ", ".join(["?"] * len(chunk))
+            query = f"""
+                SELECT s.session_id,
+                       COUNT(CASE WHEN r.status = 'PRESENT' THEN 1 END),
+                       COUNT(CASE WHEN r.status = 'ABSENT' THEN 1 END),
+                       (SELECT COUNT(*) FROM classes_student cs WHERE cs.class_id = s.class_id)
+                FROM attendance_sessions s
+                LEFT JOIN {self.table_name} r ON r.session_id = s.session_id
+                WHERE s.session_id IN ({placeholders})
+                GROUP BY s.session_id
+            """
+            for session_id, present, absent, enrolled in self.db.select(query, tuple(chunk)):
+                stats[session_id] = {"PRESENT": present, "ABSENT": absent, "enrolled": enrolled}
+        return stats
+    
+    def get_student_summary(self, student_code: str) -> Dict[str, int]:
+        """
+        Tổng số record và số buổi có mặt của sinh viên.
+        
+        Đọc một dòng của student_attendance_summary (được trigger cập nhật),
+        không đếm lại lịch sử.
+        
+        Returns:
+            Dict {"total": ..., "present": ...}
+        """
+        query = """
+            SELECT total_count AS total, present_count AS present
+            FROM student_attendance_summary
+            WHERE student_code = ?
+        """
+        row = self.db.fetch_one(query, (student_code,))
+        if row is None:
+            return {"total": 0, "present": 0}
+        return {"total": row["total"], "present": row["present"]}
+    
+    # ==================== Read model: lịch sử điểm danh ====================
+    
+    def _history_query(
+        self,
+        where: str = "",
+        order: str = "r.attendance_time DESC, r.record_id DESC",
+        limit: bool = False,
+        extra_columns: str = ""
+    ) -> str:
+        """SELECT record + session + class của một sinh viên (mặc định mới nhất trước)."""
+        return f"""
+            SELECT r.record_id, r.session_id, r.student_code, r.status, r.attendance_time, r.remark,
+                   s.class_id, c.class_name, s.start_time, s.end_time{extra_columns}
+            FROM {self.table_name} r
+            LEFT JOIN attendance_sessions s ON s.session_id = r.session_id
+            LEFT JOIN classes c ON c.class_id = s.class_id
+            WHERE r.student_code = ? {where}
+            ORDER BY {order}
+            {"LIMIT ?" if limit else ""}
+        """
+    
+    @staticmethod
+    def _history_mapper() -> Callable[[tuple], AttendanceHistoryRow]:
+        """Mapper tuple row (cột theo _history_query, bỏ qua cột thêm) -> AttendanceHistoryRow."""
+        status_of = enum_lookup(AttendanceStatus)
+        
+        def mapper(row: tuple) -> AttendanceHistoryRow:
+            record_id, session_id, student_code, status, time, remark, class_id, class_name, start, end = row[:10]
+            return AttendanceHistoryRow(
+                record_id, session_id, student_code, status_of(status), to_datetime(time or None),
+                remark, class_id, class_name, to_datetime(start), to_datetime(end)
+            )
+        
+        return mapper
+    
+    def _history_filters(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        class_id: Optional[str] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None
+    ) -> Tuple[str, Tuple]:
+        """
+        Điều kiện WHERE (tham số hóa) cho các bộ lọc lịch sử.
+        
+        Mọi điều kiện chỉ dùng cột của r nên không phải join session/class cho
+        từng dòng của sinh viên. search khớp (không phân biệt hoa thường, kể cả
+        chữ tiếng Việt, qua hàm SQL casefold()) tên lớp, ngày dạng "2024-01-15" hoặc "15 Jan 2024"; các
+        lớp khớp tên được tra trước (bảng classes nhỏ).
+        
+        Returns:
+            (SQL các điều kiện bắt đầu bằng AND hoặc rỗng, params)
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        if start_date:
+            clauses.append("r.attendance_time >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("r.attendance_time <= ?")
+            params.append(end_date)
+        if class_id:
+            clauses.append("r.session_id IN (SELECT session_id FROM attendance_sessions WHERE class_id = ?)")
+            params.append(class_id)
+        if status:
+            clauses.append("r.status = ?")
+            params.append(status)
+        if search:
+            class_ids = [
+                row[0] for row in self.db.select(
+                    "SELECT class_id FROM classes WHERE instr(casefold(class_name), ?) > 0", (casefold(search),)
+                )
+            ]
+            matches = []
+            if class_ids:
+                matches.append(
+                    "r.session_id IN (SELECT session_id FROM attendance_sessions "
+                    f"WHERE class_id IN ({', '.join('?' * len(class_ids))}))"
+                )
+                params += class_ids
+            for date_pattern in _date_search_patterns(search):
+                matches.append("r.attendance_time GLOB ?")
+                params.append(date_pattern)
+            clauses.append(f"({' OR '.join(matches)})" if matches else "0")
+        return "".join(f" AND {clause}" for clause in clauses), tuple(params)
+    
+    def page_history_rows(
+        self,
+        student_code: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        class_id: Optional[str] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        sort_by: str = "date",
+        descending: bool = True,
+        after_key: Optional[Tuple] = None,
+        limit: int = 50
+    ) -> Page[AttendanceHistoryRow]:
+        """
+        Một trang lịch sử đã join, lọc + sắp xếp trong SQL, keyset pagination.
+        
+        sort_by="date" đi theo index (student_code, attendance_time, record_id)
+        nên trang đầu chỉ đọc vừa đủ dòng; sort_by="class_name" phải sắp xếp
+        các dòng khớp bộ lọc.
+        
+        Args:
+            student_code: Mã sinh viên
+            start_date, end_date: Khoảng thời gian điểm danh
+            class_id: Mã lớp
+            status: "PRESENT" / "ABSENT"
+            search: Từ khóa (tên lớp hoặc ngày)
+            sort_by: "date" hoặc "class_name"
+            descending: Thứ tự giảm dần
+            after_key: next_key của trang trước (cursor, không tự tạo)
+            limit: Kích thước trang
+            
+        Returns:
+            Page với next_key là cursor cho trang kế tiếp
+            
+        Example:
+            >>> page = repo.page_history_rows("SV001", status="ABSENT", limit=20)
+            >>> page = repo.page_history_rows("SV001", status="ABSENT", after_key=page.next_key, limit=20)
+        """
+        if sort_by not in ("date", "class_name"):
+            raise ValueError(f"sort_by không hợp lệ: {sort_by}")
+        
+        where, params = self._history_filters(start_date, end_date, class_id, status, search)
+        direction = "DESC" if descending else "ASC"
+        
+        if sort_by == "date":
+            seek, seek_params = self._history_seek(after_key, prefix="r.", descending=descending)
+            query = self._history_query(
+                where + " " + seek,
+                order=f"r.attendance_time {direction}, r.record_id {direction}",
+                limit=True
+            )
+            key_of = lambda row: (to_datetime(row[4] or None), row[0])
+        else:
+            seek, seek_params = "", ()
+            if after_key is not None:
+                seek = f"AND ({', '.join(_CLASS_SORT_KEY)}) {'<' if descending else '>'} (?, ?, ?)"
+                seek_params = tuple(after_key)
+            query = self._history_query(
+                where + " " + seek,
+                order=", ".join(f"{part} {direction}" for part in _CLASS_SORT_KEY),
+                limit=True,
+                extra_columns="".join(f", {part}" for part in _CLASS_SORT_KEY)
+            )
+            key_of = lambda row: row[10:13]
+        
+        rows = self.db.select(query, (student_code, *params, *seek_params, limit + 1)).fetchall()
+        next_key = key_of(rows[limit - 1]) if len(rows) > limit and limit > 0 else None
+        return Page(items=list(map(self._history_mapper(), rows[:limit])), next_key=next_key)
+    
+    def count_history_rows(
+        self,
+        student_code: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        class_id: Optional[str] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None
+    ) -> int:
+        """
+        Đếm số dòng lịch sử khớp bộ lọc (cùng điều kiện với page_history_rows).
+        
+        Không có bộ lọc (hoặc chỉ lọc status): đọc bảng tổng hợp thay vì đếm.
+        """
+        if not (start_date or end_date or class_id or search):
+            summary = self.get_student_summary(student_code)
+            if not status:
+                return summary["total"]
+            if status == AttendanceStatus.PRESENT.value:
+                return summary["present"]
+            if status == AttendanceStatus.ABSENT.value:
+                return summary["total"] - summary["present"]
+        
+        where, params = self._history_filters(start_date, end_date, class_id, status, search)
+        query = f"SELECT COUNT(*) AS count FROM {self.table_name} r WHERE r.student_code = ? {where}"
+        return self.db.fetch_one(query, (student_code, *params))["count"]
+    
+    def find_history_rows(
+        self,
+        student_code: str,
+        limit: Optional[int] = None,
+        after_key: Optional[Tuple[Optional[datetime], str]] = None
+    ) -> List[AttendanceHistoryRow]:
+        """
+        Lấy lịch sử điểm danh đã join session + class (một query, mới nhất trước).
+        
+        Đọc theo index (student_code, attendance_time, record_id): với limit,
+        chi phí chỉ phụ thuộc limit, không phụ thuộc độ dài lịch sử.
+        Records vắng mặt (attendance_time NULL) nằm cuối.
+        
+        Args:
+            student_code: Mã sinh viên
+            limit: Số dòng tối đa (None: tất cả)
+            after_key: (attendance_time, record_id) của dòng cuối trang trước
+            
+        Returns:
+            List AttendanceHistoryRow
+            
+        Example:
+            >>> recent = record_repo.find_history_rows("SV001", limit=5)
+        """
+        seek, params = self._history_seek(after_key, prefix="r.")
+        query = self._history_query(seek, limit=limit is not None)
+        params = (student_code, *params) + ((limit,) if limit is not None else ())
+        cursor = self.db.select(query, params)
+        return list(map(self._history_mapper(), cursor.fetchall()))
+    
+    def iter_history_rows(
+        self,
+        student_code: str,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[AttendanceHistoryRow]:
+        """Duyệt toàn bộ lịch sử đã join (mới nhất trước) theo từng chunk - cho export."""
+        return self._iter_entities(self._history_query(), (student_code,), chunk_size, self._history_mapper())
@@ -5,15 +5,91 @@ Base Repository - Abstract Base Class
 Base class cho tất cả repositories với các CRUD operations cơ bản.
 """
 
+import copy
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Generic, List, Optional, TypeVar
+from dataclasses import dataclass, field
+from itertools import islice
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar
 
+from config.database import BULK_BATCH_SIZE, ENTITY_CACHE_SIZES, ENTITY_CACHE_TTL
+from data.cache import MISSING, EntityCache
 from data.database import Database
 
 # Generic type cho entity
 T = TypeVar("T")
 
 
+@dataclass
+class Page(Generic[T]):
+    """
+    Một trang kết quả keyset (seek) pagination.
+    
+    Attributes:
+        items: Các entity của trang
+        next_key: Key truyền vào after_key để lấy trang kế tiếp
+                  (None nếu đã hết dữ liệu)
+        total: Tổng số dòng khớp điều kiện (None nếu không đếm)
+        
+    Example:
+        >>> page = repo.page(limit=50)
+        >>> while page.items:
+        ...     render(page.items)
+        ...     if not page.has_more:
+        ...         break
+        ...     page = repo.page(after_key=page.next_key, limit=50)
+    """
+    
+    items: List[T] = field(default_factory=list)
+    next_key: Optional[Any] = None
+    total: Optional[int] = None
+    
+    @property
+    def has_more(self) -> bool:
+        """Còn trang kế tiếp hay không."""
+        return self.next_key is not None
+
+
+def enum_lookup(enum_cls: Type[Enum]) -> Callable[[Any], Enum]:
+    """
+    Tạo hàm chuyển giá trị DB -> enum bằng bảng tra cứu dựng sẵn.
+    
+    Giá trị chuẩn (VD: "PRESENT") chỉ tốn một lần dict lookup; giá trị
+    khác (VD: "present") fallback về from_string() của enum.
+    
+    Example:
+        >>> status_of = enum_lookup(AttendanceStatus)
+        >>> status_of("PRESENT")
+        <AttendanceStatus.PRESENT: 'PRESENT'>
+    """
+    table = {member.value: member for member in enum_cls}
+    parse = getattr(enum_cls, "from_string", enum_cls)
+    
+    def lookup(value: Any) -> Enum:
+        member = table.get(value)
+        return member if member is not None else parse(value)
+    
+    return lookup
+
+
+def to_datetime(value: Any) -> Optional[datetime]:
+    """Chuyển chuỗi ISO thành datetime (cột DATETIME đã được sqlite3 convert sẵn)."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Chia iterable thành các list có tối đa size phần tử."""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
 class BaseRepository(ABC, Generic[T]):
     """
     Abstract base class cho repositories.
@@ -28,6 +104,14 @@ class BaseRepository(ABC, Generic[T]):
     - _row_to_entity: Chuyển đổi row thành entity
     - _entity_to_dict: Chuyển đổi entity thành dict
     
+    Subclasses có thể override:
+    - _compile_mapper: Tạo hàm tuple row -> entity cho một bộ cột
+    - primary_key: Tên cột khóa chính (mặc định "id")
+    - conflict_keys: Các cột xác định trùng lặp cho upsert_many
+    - batch_size: Số dòng mỗi lần executemany
+    - cache_size / cache_ttl: Giới hạn entity cache (0 = không cache)
+    - _invalidate: Cách xóa cache sau khi ghi
+    
     Example:
         >>> class UserRepository(BaseRepository[User]):
         ...     table_name = "users"
@@ -36,14 +120,30 @@ class BaseRepository(ABC, Generic[T]):
         ...         return User(**dict(row))
     """
     
-    def __init__(self, db: Database):
+    primary_key: str = "id"
+    batch_size: int = BULK_BATCH_SIZE
+    cache_ttl: float = ENTITY_CACHE_TTL
+    
+    def __init__(self, db: Database, cache: Optional[EntityCache] = None):
         """
         Khởi tạo repository với database connection.
         
         Args:
             db: Database instance
+            cache: EntityCache riêng (mặc định: cache dùng chung của bảng
+                   trên db, nếu cache_size > 0)
         """
         self.db = db
+        self._mappers: Dict[Tuple[str, ...], Callable[[tuple], T]] = {}
+        
+        if cache is None and self.cache_size > 0:
+            cache = db.entity_cache(self.table_name, self.cache_size, self.cache_ttl)
+        self.cache: Optional[EntityCache] = cache
+    
+    @property
+    def cache_size(self) -> int:
+        """Số entity tối đa trong cache của bảng (0 = không cache)."""
+        return ENTITY_CACHE_SIZES.get(self.table_name, 0)
     
     @property
     @abstractmethod
@@ -77,6 +177,139 @@ class BaseRepository(ABC, Generic[T]):
         """
         pass
     
+    # ==================== Row mapping ====================
+    
+    def _compile_mapper(self, columns: Tuple[str, ...]) -> Callable[[tuple], T]:
+        """
+        Tạo hàm chuyển tuple row -> entity cho một bộ cột cố định.
+        
+        Mặc định dựng dict từ tên cột rồi gọi _row_to_entity. Subclass
+        override để dùng index vị trí và bảng tra enum dựng sẵn.
+        
+        Args:
+            columns: Tên các cột theo thứ tự trong cursor.description
+            
+        Returns:
+            Hàm nhận tuple row, trả về entity
+        """
+        return lambda row: self._row_to_entity(dict(zip(columns, row)))
+    
+    def _mapper_for(self, columns: Tuple[str, ...]) -> Callable[[tuple], T]:
+        """Lấy mapper đã compile cho bộ cột (compile một lần, cache lại)."""
+        mapper = self._mappers.get(columns)
+        if mapper is None:
+            mapper = self._mappers[columns] = self._compile_mapper(columns)
+        return mapper
+    
+    def _map_row(self, row) -> T:
+        """Map một sqlite3.Row (hoặc dict) qua mapper đã compile."""
+        columns = tuple(row.keys())
+        return self._mapper_for(columns)(tuple(row[name] for name in columns))
+    
+    def _mapper_for_cursor(self, cursor) -> Callable[[tuple], T]:
+        """Lấy mapper theo cursor.description."""
+        return self._mapper_for(tuple(d[0] for d in cursor.description))
+    
+    def _fetch_entities(self, query: str, params: Tuple = ()) -> List[T]:
+        """Chạy SELECT và map tất cả tuple rows thành entities."""
+        cursor = self.db.select(query, params)
+        return list(map(self._mapper_for_cursor(cursor), cursor.fetchall()))
+    
+    def _fetch_entity(self, query: str, params: Tuple = ()) -> Optional[T]:
+        """Chạy SELECT và map dòng đầu tiên thành entity (None nếu không có)."""
+        cursor = self.db.select(query, params)
+        row = cursor.fetchone()
+        return self._mapper_for_cursor(cursor)(row) if row is not None else None
+    
+    def _iter_entities(
+        self,
+        query: str,
+        params: Tuple = (),
+        chunk_size: Optional[int] = None,
+        mapper: Optional[Callable[[tuple], Any]] = None
+    ) -> Iterator[T]:
+        """Chạy SELECT và stream entities theo từng chunk fetchmany (mapper mặc định theo cursor)."""
+        cursor = self.db.select(query, params)
+        mapper = mapper or self._mapper_for_cursor(cursor)
+        size = chunk_size or self.batch_size
+        try:
+            while True:
+                rows = cursor.fetchmany(size)
+                if not rows:
+                    return
+                yield from map(mapper, rows)
+        finally:
+            cursor.close()
+    
+    # ==================== Entity cache ====================
+    
+    def _cached(self, key: Tuple[str, Any], load: Callable[[], Optional[T]]) -> Optional[T]:
+        """
+        Read-through: trả entity từ cache, nếu miss thì load() rồi lưu lại.
+        
+        Mỗi lần gọi nhận một bản sao (_detach) của entity trong cache: caller
+        sửa field rồi bỏ dở (VD: validate thất bại) không làm bẩn cache.
+        
+        Args:
+            key: Cache key dạng (tên cột, giá trị)
+            load: Hàm đọc entity từ database
+        """
+        cache = self.cache
+        if cache is None:
+            return load()
+        
+        entity = cache.get(key)
+        if entity is not MISSING:
+            return self._detach(entity)
+        
+        generation = cache.generation
+        entity = load()
+        # Không cache dữ liệu chưa commit của transaction đang mở
+        if entity is not None and not self.db.in_transaction:
+            cache.put(key, entity, generation)
+            return self._detach(entity)
+        return entity
+    
+    def _detach(self, entity: T) -> T:
+        """
+        Bản sao của entity trong cache để trả cho caller.
+        
+        Mặc định shallow copy (không chạy lại __post_init__); subclass có
+        field mutable (set/list) override để copy luôn field đó.
+        """
+        return copy.copy(entity)
+    
+    def _invalidate(self, id: Any = None) -> None:
+        """
+        Xóa entity khỏi cache sau khi ghi (id=None: xóa toàn bộ cache).
+        
+        Xóa ngay và xóa lại sau khi commit, để reader ở thread khác không
+        đưa dữ liệu cũ (đọc trước commit) trở lại cache.
+        """
+        cache = self.cache
+        if cache is None:
+            return
+        if id is None:
+            invalidate = cache.clear
+        else:
+            key = (self.primary_key, id)
+            invalidate = lambda: cache.invalidate(key)
+        invalidate()
+        self.db.after_commit(invalidate)
+    
+    @property
+    def conflict_keys(self) -> Tuple[str, ...]:
+        """Các cột mặc định dùng cho ON CONFLICT trong upsert_many."""
+        return (self.primary_key,)
+    
+    def _bulk_row(self, entity: T) -> Dict[str, Any]:
+        """
+        Chuyển đổi entity thành dictionary cho create_many/upsert_many.
+        
+        Mọi dòng trong một lần ghi phải có cùng tập cột.
+        """
+        return self._entity_to_dict(entity)
+    
     def find_by_id(self, id: Any) -> Optional[T]:
         """
         Tìm entity theo ID.
@@ -87,9 +320,55 @@ class BaseRepository(ABC, Generic[T]):
         Returns:
             Entity object hoặc None nếu không tìm thấy
         """
-        query = f"SELECT * FROM {self.table_name} WHERE id = ?"
-        row = self.db.fetch_one(query, (id,))
-        return self._row_to_entity(row) if row else None
+        query = f"SELECT * FROM {self.table_name} WHERE {self.primary_key} = ?"
+        return self._cached((self.primary_key, id), lambda: self._fetch_entity(query, (id,)))
+    
+    def find_many_by_ids(self, ids: Iterable[Any]) -> Dict[Any, T]:
+        """
+        Tìm nhiều entities theo primary key bằng WHERE pk IN (...).
+        
+        Key đã có trong cache không query lại; phần còn lại được chia
+        chunk theo giới hạn số tham số của SQLite.
+        
+        Args:
+            ids: Các primary key (có thể trùng lặp)
+            
+        Returns:
+            Dict primary key -> entity (ID không tồn tại không có trong dict)
+            
+        Example:
+            >>> sessions = session_repo.find_many_by_ids(["SS1", "SS2"])
+            >>> sessions["SS1"].class_id
+        """
+        cache = self.cache
+        found: Dict[Any, T] = {}
+        missing: List[Any] = []
+        
+        for id in dict.fromkeys(ids):
+            entity = cache.get((self.primary_key, id)) if cache is not None else MISSING
+            if entity is MISSING:
+                missing.append(id)
+            else:
+                found[id] = self._detach(entity)
+        
+        if not missing:
+            return found
+        
+        generation = cache.generation if cache is not None else None
+        loaded: Dict[Any, T] = {}
+        for chunk in _chunked(missing, self.db.max_variables):
+            placeholders = ", ".join(["?"] * len(chunk))
+            query = f"SELECT * FROM {self.table_name} WHERE {self.primary_key} IN ({placeholders})"
+            for entity in self._fetch_entities(query, tuple(chunk)):
+                loaded[self._entity_key(entity)] = entity
+        
+        if cache is not None and not self.db.in_transaction:
+            for id, entity in loaded.items():
+                cache.put((self.primary_key, id), entity, generation)
+                loaded[id] = self._detach(entity)
+        
+        found.update(loaded)
+        return found
     
     def find_all(self) -> List[T]:
         """
@@ -99,8 +378,7 @@ class BaseRepository(ABC, Generic[T]):
             List các entity objects
         """
         query = f"SELECT * FROM {self.table_name}"
-        rows = self.db.fetch_all(query)
-        return [self._row_to_entity(row) for row in rows]
+        return self._fetch_entities(query)
     
     def find_by(self, **conditions) -> List[T]:
         """
@@ -117,8 +395,88 @@ class BaseRepository(ABC, Generic[T]):
         """
         where_clauses = " AND ".join([f"{k} = ?" for k in conditions.keys()])
         query = f"SELECT * FROM {self.table_name} WHERE {where_clauses}"
-        rows = self.db.fetch_all(query, tuple(conditions.values()))
-        return [self._row_to_entity(row) for row in rows]
+        return self._fetch_entities(query, tuple(conditions.values()))
+    
+    def iter_all(self, chunk_size: Optional[int] = None) -> Iterator[T]:
+        """
+        Duyệt tất cả entities theo từng chunk, không tải cả bảng vào bộ nhớ.
+        
+        Args:
+            chunk_size: Số dòng mỗi lần fetch (mặc định: self.batch_size)
+            
+        Yields:
+            Entity objects
+        """
+        query = f"SELECT * FROM {self.table_name}"
+        return self._iter_entities(query, (), chunk_size)
+    
+    def iter_by(self, chunk_size: Optional[int] = None, **conditions) -> Iterator[T]:
+        """
+        Duyệt các entities thỏa điều kiện theo từng chunk.
+        
+        Args:
+            chunk_size: Số dòng mỗi lần fetch (mặc định: self.batch_size)
+            **conditions: Các điều kiện (field=value)
+            
+        Yields:
+            Entity objects
+            
+        Example:
+            >>> for user in user_repo.iter_by(role="STUDENT"):
+            ...     export(user)
+        """
+        where_clauses = " AND ".join([f"{k} = ?" for k in conditions.keys()])
+        query = f"SELECT * FROM {self.table_name} WHERE {where_clauses}"
+        return self._iter_entities(query, tuple(conditions.values()), chunk_size)
+    
+    def page(self, after_key: Any = None, limit: int = 50, **conditions) -> Page[T]:
+        """
+        Lấy một trang entities bằng keyset pagination trên primary key.
+        
+        Dùng WHERE primary_key > after_key thay vì OFFSET nên chi phí mỗi
+        trang không tăng theo vị trí trang.
+        
+        Args:
+            after_key: primary key của entity cuối trang trước (None = trang đầu)
+            limit: Số entity tối đa mỗi trang
+            **conditions: Các điều kiện lọc (field=value)
+            
+        Returns:
+            Page chứa items và next_key
+        """
+        where = [f"{k} = ?" for k in conditions.keys()]
+        params = list(conditions.values())
+        if after_key is not None:
+            where.append(f"{self.primary_key} > ?")
+            params.append(after_key)
+        
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ""
+        query = f"""
+            SELECT * FROM {self.table_name} {where_clause}
+            ORDER BY {self.primary_key} LIMIT ?
+        """
+        entities = self._fetch_entities(query, (*params, limit + 1))
+        return self._make_page(entities, limit, self._entity_key)
+    
+    def _entity_key(self, entity: T) -> Any:
+        """Lấy giá trị primary key của entity (object hoặc dict)."""
+        if isinstance(entity, dict):
+            return entity[self.primary_key]
+        return getattr(entity, self.primary_key)
+    
+    def _make_page(self, entities: List[T], limit: int, key_of: Callable[[T], Any]) -> Page[T]:
+        """
+        Tạo Page từ limit + 1 entity: entity dư chỉ dùng để biết còn trang sau.
+        
+        Args:
+            entities: Tối đa limit + 1 entity đã sắp xếp
+            limit: Kích thước trang
+            key_of: Hàm lấy keyset key từ một entity
+        """
+        has_more = len(entities) > limit
+        items = entities[:limit]
+        next_key = key_of(items[-1]) if has_more and items else None
+        return Page(items=items, next_key=next_key)
     
     def create(self, entity: T) -> T:
         """
@@ -136,10 +494,109 @@ class BaseRepository(ABC, Generic[T]):
         
         query = f"INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})"
         cursor = self.db.execute(query, tuple(data.values()))
+        self._invalidate(data.get(self.primary_key))
         
         # Update entity với ID mới
         return entity
     
+    def create_many(self, entities: Iterable[T], batch_size: Optional[int] = None) -> int:
+        """
+        Tạo nhiều entities trong một transaction bằng executemany.
+        
+        Args:
+            entities: Các entity cần tạo (list hoặc generator)
+            batch_size: Số dòng mỗi lần executemany (mặc định: self.batch_size)
+            
+        Returns:
+            Số dòng đã insert
+            
+        Example:
+            >>> record_repo.create_many(records)
+            100000
+        """
+        return self._write_many(entities, None, batch_size)
+    
+    def upsert_many(
+        self,
+        entities: Iterable[T],
+        conflict_keys: Optional[Sequence[str]] = None,
+        batch_size: Optional[int] = None
+    ) -> int:
+        """
+        Insert hoặc cập nhật nhiều entities trong một transaction.
+        
+        Dòng trùng theo conflict_keys được cập nhật các cột còn lại
+        (INSERT ... ON CONFLICT DO UPDATE).
+        
+        Args:
+            entities: Các entity cần ghi
+            conflict_keys: Các cột có UNIQUE constraint (mặc định: self.conflict_keys)
+            batch_size: Số dòng mỗi lần executemany (mặc định: self.batch_size)
+            
+        Returns:
+            Số dòng đã insert hoặc cập nhật
+        """
+        return self._write_many(entities, tuple(conflict_keys or self.conflict_keys), batch_size)
+    
+    def _build_bulk_query(
+        self,
+        columns: List[str],
+        conflict_keys: Optional[Tuple[str, ...]]
+    ) -> str:
+        """Tạo câu INSERT (hoặc upsert) cho danh sách cột."""
+        placeholders = ", ".join(["?" for _ in columns])
+        query = f"INSERT INTO {self.table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+        
+        if conflict_keys is None:
+            return query
+        
+        # Không ghi đè khóa chính của dòng đã tồn tại
+        update_columns = [
+            c for c in columns if c not in conflict_keys and c != self.primary_key
+        ]
+        if not update_columns:
+            return f"{query} ON CONFLICT ({', '.join(conflict_keys)}) DO NOTHING"
+        
+        set_clause = ", ".join([f"{c} = excluded.{c}" for c in update_columns])
+        return f"{query} ON CONFLICT ({', '.join(conflict_keys)}) DO UPDATE SET {set_clause}"
+    
+    def _write_many(
+        self,
+        entities: Iterable[T],
+        conflict_keys: Optional[Tuple[str, ...]],
+        batch_size: Optional[int]
+    ) -> int:
+        """Ghi entities theo từng chunk executemany trong một transaction."""
+        size = batch_size or self.batch_size
+        rows = (self._bulk_row(entity) for entity in entities)
+        
+        columns: Optional[List[str]] = None
+        column_set = set()
+        query = ""
+        total = 0
+        
+        with self.db.transaction():
+            for chunk in _chunked(rows, size):
+                if columns is None:
+                    columns = list(chunk[0].keys())
+                    column_set = set(columns)
+                    query = self._build_bulk_query(columns, conflict_keys)
+                
+                params = []
+                for row in chunk:
+                    if row.keys() != column_set:
+                        raise ValueError(
+                            f"All rows must have the same columns: {columns} != {list(row.keys())}"
+                        )
+                    params.append(tuple(row[c] for c in columns))
+                
+                cursor = self.db.execute_many(query, params)
+                total += cursor.rowcount
+            
+            self._invalidate()
+        
+        return total
+    
     def update(self, entity: T) -> T:
         """
         Cập nhật entity trong database.
@@ -153,8 +610,12 @@ class BaseRepository(ABC, Generic[T]):
         data = self._entity_to_dict(entity)
         set_clause = ", ".join([f"{k} = ?" for k in data.keys()])
         
-        query = f"UPDATE {self.table_name} SET {set_clause} WHERE id = ?"
-        self.db.execute(query, (*data.values(), data.get("id")))
+        query = f"UPDATE {self.table_name} SET {set_clause} WHERE {self.primary_key} = ?"
+        try:
+            self.db.execute(query, (*data.values(), data.get(self.primary_key)))
+        finally:
+            # Kể cả khi lỗi: entity có thể là object trong cache đã bị sửa
+            self._invalidate(data.get(self.primary_key))
         
         return entity
     
@@ -168,8 +629,9 @@ class BaseRepository(ABC, Generic[T]):
         Returns:
             True nếu xóa thành công
         """
-        query = f"DELETE FROM {self.table_name} WHERE id = ?"
+        query = f"DELETE FROM {self.table_name} WHERE {self.primary_key} = ?"
         cursor = self.db.execute(query, (id,))
+        self._invalidate(id)
         return cursor.rowcount > 0
     
     def count(self) -> int:
@@ -193,6 +655,6 @@ class BaseRepository(ABC, Generic[T]):
         Returns:
             True nếu tồn tại
         """
-        query = f"SELECT 1 FROM {self.table_name} WHERE id = ? LIMIT 1"
+        query = f"SELECT 1 FROM {self.table_name} WHERE {self.primary_key} = ? LIMIT 1"
         row = self.db.fetch_one(query, (id,))
         return row is not None
@@ -5,11 +5,12 @@ Classroom Repository - Class Data Access
 Repository cho các thao tác CRUD với Classroom.
 """
 
-from typing import Any, Dict, List, Optional
+from dataclasses import replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from core.models import Classroom
 from data.database import Database
-from .base_repository import BaseRepository
+from .base_repository import BaseRepository, _chunked
 
 
 class ClassroomRepository(BaseRepository[Classroom]):
@@ -21,20 +22,32 @@ class ClassroomRepository(BaseRepository[Classroom]):
         >>> classes = class_repo.find_by_teacher("GV001")
     """
     
+    primary_key = "class_id"
+    
     @property
     def table_name(self) -> str:
         return "classes"
     
     def _row_to_entity(self, row) -> Classroom:
-        """Chuyển đổi row thành Classroom."""
-        # sqlite3.Row supports dict-style access but not .get()
-        return Classroom(
-            class_id=row["class_id"],
-            class_name=row["class_name"],
-            subject_code=row["subject_code"],
-            teacher_code=row["teacher_code"] if "teacher_code" in row.keys() else None
-        )
+        """Chuyển đổi sqlite3.Row thành Classroom."""
+        return self._map_row(row)
     
+    def _compile_mapper(self, columns: Tuple[str, ...]) -> Callable[[tuple], Classroom]:
+        """Compile mapper tuple row -> Classroom bằng index vị trí."""
+        index = {name: i for i, name in enumerate(columns)}
+        i_id, i_name, i_subject = index["class_id"], index["class_name"], index["subject_code"]
+        i_teacher = index.get("teacher_code")
+        
+        def mapper(row: tuple) -> Classroom:
+            return Classroom.trusted(
+                row[i_id],
+                row[i_name],
+                row[i_subject],
+                row[i_teacher] if i_teacher is not None else None
+            )
+        
+        return mapper
+
     def _entity_to_dict(self, entity: Classroom) -> Dict[str, Any]:
         """Chuyển đổi Classroom thành dictionary."""
         return {
@@ -44,19 +57,32 @@ class ClassroomRepository(BaseRepository[Classroom]):
             "teacher_code": entity.teacher_code,
         }
     
-    def find_by_id(self, class_id: str) -> Optional[Classroom]:
+    def _detach(self, entity: Classroom) -> Classroom:
+        """Bản sao lớp trong cache, kèm set student_codes riêng."""
+        classroom = super()._detach(entity)
+        classroom.student_codes = set(entity.student_codes)
+        return classroom
+    
+    def create_many(self, entities: Iterable[Classroom], batch_size: Optional[int] = None) -> int:
         """
-        Override find_by_id to use class_id instead of id.
+        Override create_many để ghi danh luôn student_codes của từng lớp.
+        
+        Lớp và danh sách sinh viên được ghi trong cùng một transaction.
         
         Args:
-            class_id: Class ID
+            entities: Các Classroom cần tạo
+            batch_size: Số dòng mỗi lần executemany
             
         Returns:
-            Classroom object or None
+            Số lớp đã insert
         """
-        query = f"SELECT * FROM {self.table_name} WHERE class_id = ?"
-        row = self.db.fetch_one(query, (class_id,))
-        return self._row_to_entity(row) if row else None
+        classrooms = list(entities)
+        with self.db.transaction():
+            created = super().create_many(classrooms, batch_size)
+            for classroom in classrooms:
+                if classroom.student_codes:
+                    self.add_students_to_class(classroom.class_id, classroom.student_codes)
+        return created
     
     def update(self, entity: Classroom) -> Classroom:
         """
@@ -73,7 +99,10 @@ class ClassroomRepository(BaseRepository[Classroom]):
         set_clause = ", ".join([f"{k} = ?" for k in data.keys()])
         
         query = f"UPDATE {self.table_name} SET {set_clause} WHERE class_id = ?"
-        self.db.execute(query, (*data.values(), class_id))
+        try:
+            self.db.execute(query, (*data.values(), class_id))
+        finally:
+            self._invalidate(class_id)
         
         return entity
     
@@ -87,12 +116,14 @@ class ClassroomRepository(BaseRepository[Classroom]):
         Returns:
             True if deletion was successful
         """
-        # First, delete all students associated with this class
-        self.db.execute("DELETE FROM classes_student WHERE class_id = ?", (class_id,))
-        
-        # Then delete the class itself
-        query = f"DELETE FROM {self.table_name} WHERE class_id = ?"
-        cursor = self.db.execute(query, (class_id,))
+        with self.db.transaction():
+            # First, delete all students associated with this class
+            self.db.execute("DELETE FROM classes_student WHERE class_id = ?", (class_id,))
+            
+            # Then delete the class itself
+            query = f"DELETE FROM {self.table_name} WHERE class_id = ?"
+            cursor = self.db.execute(query, (class_id,))
+            self._invalidate(class_id)
         return cursor.rowcount > 0
     
     def find_by_teacher(self, teacher_code: str) -> List[Classroom]:
@@ -106,8 +137,7 @@ class ClassroomRepository(BaseRepository[Classroom]):
             List các Classroom
         """
         query = f"SELECT * FROM {self.table_name} WHERE teacher_code = ?"
-        rows = self.db.fetch_all(query, (teacher_code,))
-        return [self._row_to_entity(row) for row in rows]
+        return self._fetch_entities(query, (teacher_code,))
     
     def find_by_subject(self, subject_code: str) -> List[Classroom]:
         """
@@ -120,8 +150,7 @@ class ClassroomRepository(BaseRepository[Classroom]):
             List các Classroom
         """
         query = f"SELECT * FROM {self.table_name} WHERE subject_code = ?"
-        rows = self.db.fetch_all(query, (subject_code,))
-        return [self._row_to_entity(row) for row in rows]
+        return self._fetch_entities(query, (subject_code,))
     
     def get_students_in_class(self, class_id: str) -> List[str]:
         """
@@ -137,6 +166,70 @@ class ClassroomRepository(BaseRepository[Classroom]):
         rows = self.db.fetch_all(query, (class_id,))
         return [row["student_code"] for row in rows]
     
+    def hydrate_students(self, classrooms: Iterable[Classroom], count_only: bool = False) -> List[Classroom]:
+        """
+        Nạp danh sách sinh viên (hoặc chỉ sĩ số) cho nhiều lớp bằng một query.
+        
+        Một SELECT trên classes_student cho mỗi chunk class_id (đọc primary
+        key (class_id, student_code)), thay vì get_students_in_class cho từng lớp.
+        
+        Kết quả là bản sao của từng lớp: object truyền vào (thường là entity
+        dùng chung trong cache) không bị sửa.
+        
+        Args:
+            classrooms: Các lớp cần nạp
+            count_only: True -> chỉ đếm sĩ số (Classroom.enrolled_count),
+                        không tải mã sinh viên
+            
+        Returns:
+            Bản sao các lớp (cùng thứ tự) đã có roster / sĩ số
+            
+        Example:
+            >>> classes = class_repo.hydrate_students(class_repo.find_by_teacher("GV001"))
+            >>> "SV001" in classes[0].student_codes
+            True
+            >>> class_repo.hydrate_students(classes, count_only=True)[0].student_count
+            30
+        """
+        classrooms = [replace(classroom) for classroom in classrooms]
+        class_ids = list(dict.fromkeys(c.class_id for c in classrooms))
+        if count_only:
+            counts: Dict[str, int] = {}
+            for chunk in _chunked(class_ids, self.db.max_variables):
+                placeholders = ", ".join(["?"] * len(chunk))
+                query = f"""
+                    SELECT class_id, COUNT(*) FROM classes_student
+                    WHERE class_id IN ({placeholders}) GROUP BY class_id
+                """
+                counts.update(self.db.select(query, tuple(chunk)))
+            for classroom in classrooms:
+                classroom.set_enrolled_count(counts.get(classroom.class_id, 0))
+            return classrooms
+        
+        rosters: Dict[str, Set[str]] = {class_id: set() for class_id in class_ids}
+        for chunk in _chunked(class_ids, self.db.max_variables):
+            placeholders = ", ".join(["?"] * len(chunk))
+            query = f"SELECT class_id, student_code FROM classes_student WHERE class_id IN ({placeholders})"
+            for class_id, student_code in self.db.select(query, tuple(chunk)):
+                rosters[class_id].add(student_code)
+        for classroom in classrooms:
+            classroom.set_roster(rosters[classroom.class_id])
+        return classrooms
+    
+    def is_student_in_class(self, class_id: str, student_code: str) -> bool:
+        """
+        Kiểm tra sinh viên có trong lớp (một lookup theo primary key, không nạp roster).
+        
+        Args:
+            class_id: Mã lớp
+            student_code: Mã sinh viên
+            
+        Returns:
+            True nếu sinh viên đã được ghi danh vào lớp
+        """
+        query = "SELECT 1 FROM classes_student WHERE class_id = ? AND student_code = ?"
+        return self.db.select(query, (class_id, student_code)).fetchone() is not None
+    
     def add_student_to_class(self, class_id: str, student_code: str) -> bool:
         """
         Thêm sinh viên vào lớp.
@@ -154,6 +247,31 @@ class ClassroomRepository(BaseRepository[Classroom]):
             return True
         except Exception:
             return False
+        finally:
+            # Lớp trong cache có thể đang giữ roster đã nạp
+            self._invalidate(class_id)
+    
+    def add_students_to_class(self, class_id: str, student_codes: Iterable[str]) -> int:
+        """
+        Ghi danh nhiều sinh viên vào lớp trong một lần executemany.
+        
+        Sinh viên đã có trong lớp được bỏ qua.
+        
+        Args:
+            class_id: Mã lớp
+            student_codes: Các mã sinh viên
+            
+        Returns:
+            Số sinh viên được thêm mới
+        """
+        params = [(class_id, code) for code in student_codes]
+        if not params:
+            return 0
+        
+        query = "INSERT OR IGNORE INTO classes_student (class_id, student_code) VALUES (?, ?)"
+        cursor = self.db.execute_many(query, params)
+        self._invalidate(class_id)
+        return cursor.rowcount
     
     def remove_student_from_class(self, class_id: str, student_code: str) -> bool:
         """
@@ -168,6 +286,7 @@ class ClassroomRepository(BaseRepository[Classroom]):
         """
         query = "DELETE FROM classes_student WHERE class_id = ? AND student_code = ?"
         cursor = self.db.execute(query, (class_id, student_code))
+        self._invalidate(class_id)
         return cursor.rowcount > 0
     
     def get_classes_for_student(self, student_code: str) -> List[Classroom]:
@@ -185,5 +304,4 @@ class ClassroomRepository(BaseRepository[Classroom]):
             JOIN classes_student cs ON c.class_id = cs.class_id
             WHERE cs.student_code = ?
         """
-        rows = self.db.fetch_all(query, (student_code,))
-        return [self._row_to_entity(row) for row in rows]
+        return self._fetch_entities(query, (student_code,))
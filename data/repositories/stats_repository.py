@@ -0,0 +1,70 @@
+"""
+Stats Repository - Số đếm toàn hệ thống
+=======================================
+
+Query aggregate đọc nhiều bảng (users, classes, attendance_sessions,
+attendance_records) cho admin dashboard. Không map entity nên không kế thừa
+BaseRepository.
+"""
+
+from datetime import datetime
+from typing import Dict
+
+from data.database import Database
+
+
+class StatsRepository:
+    """
+    Repository cho thống kê toàn hệ thống.
+    
+    Example:
+        >>> stats_repo = StatsRepository(db)
+        >>> stats_repo.get_system_counts(month_start, month_end, today, tomorrow)["students"]
+        50000
+    """
+    
+    def __init__(self, db: Database):
+        """
+        Khởi tạo repository.
+        
+        Args:
+            db: Database instance
+        """
+        self.db = db
+    
+    def get_system_counts(
+        self,
+        month_start: datetime,
+        month_end: datetime,
+        day_start: datetime,
+        day_end: datetime
+    ) -> Dict[str, int]:
+        """
+        Số đếm toàn hệ thống cho admin dashboard trong một query.
+
+        Mỗi số đếm là một subquery COUNT(*) đọc index (idx_users_role,
+        start_time, attendance_time) thay vì nạp entity.
+
+        Args:
+            month_start: Đầu khoảng đếm session (bao gồm)
+            month_end: Cuối khoảng đếm session (không bao gồm)
+            day_start: Đầu khoảng đếm record đã điểm danh (bao gồm)
+            day_end: Cuối khoảng đếm record đã điểm danh (không bao gồm)
+
+        Returns:
+            Dict gồm admins, teachers, students, classes, sessions, submissions
+        """
+        row = self.db.select(
+            """
+            SELECT
+                (SELECT COUNT(*) FROM users WHERE role = 'ADMIN'),
+                (SELECT COUNT(*) FROM users WHERE role = 'TEACHER'),
+                (SELECT COUNT(*) FROM users WHERE role = 'STUDENT'),
+                (SELECT COUNT(*) FROM classes),
+                (SELECT COUNT(*) FROM attendance_sessions WHERE start_time >= ? AND start_time < ?),
+                (SELECT COUNT(*) FROM attendance_records WHERE attendance_time >= ? AND attendance_time < ?)
+            """,
+            (month_start, month_end, day_start, day_end)
+        ).fetchone()
+        keys = ("admins", "teachers", "students", "classes", "sessions", "submissions")
+        return dict(zip(keys, row))
@@ -5,12 +5,12 @@ User Repository - User Data Access
 Repository cho các thao tác CRUD với User, Admin, Teacher, Student.
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from core.enums import UserRole
 from core.models import User, Admin, Teacher, Student
 from data.database import Database
-from .base_repository import BaseRepository
+from .base_repository import BaseRepository, enum_lookup, to_datetime
 
 
 class UserRepository(BaseRepository[User]):
@@ -28,33 +28,63 @@ class UserRepository(BaseRepository[User]):
         >>> teachers = user_repo.find_by_role(UserRole.TEACHER)
     """
     
+    primary_key = "user_id"
+    
+    # Cột mã theo role - luôn có mặt trong bulk rows để mọi dòng cùng tập cột
+    ROLE_CODE_COLUMNS = ("admin_id", "teacher_code", "student_code")
+    
+    # (cột mã, prefix) theo role: mã mặc định sinh từ user_id (VD: SV007)
+    ROLE_CODE_PREFIXES = {
+        UserRole.ADMIN: ("admin_id", "AD"),
+        UserRole.TEACHER: ("teacher_code", "GV"),
+        UserRole.STUDENT: ("student_code", "SV"),
+    }
+    
     @property
     def table_name(self) -> str:
         return "users"
     
+    @property
+    def conflict_keys(self) -> Tuple[str, ...]:
+        """User mới chưa có user_id (AUTOINCREMENT) nên upsert theo username."""
+        return ("username",)
+    
     def _row_to_entity(self, row) -> User:
-        """Chuyển đổi row thành User/Admin/Teacher/Student."""
-        role = UserRole.from_string(row["role"])
+        """Chuyển đổi sqlite3.Row thành User/Admin/Teacher/Student."""
+        return self._map_row(row)
+    
+    def _compile_mapper(self, columns: Tuple[str, ...]) -> Callable[[tuple], User]:
+        """Compile mapper tuple row -> User/Admin/Teacher/Student bằng index vị trí."""
+        index = {name: i for i, name in enumerate(columns)}
+        i_id, i_username = index["user_id"], index["username"]
+        i_password, i_name = index["password_hash"], index["full_name"]
+        i_role, i_email = index["role"], index["email"]
+        i_admin = index["admin_id"]
+        i_teacher = index["teacher_code"]
+        i_student = index["student_code"]
+        i_created = index.get("created_at")
         
-        base_data = {
-            "user_id": row["user_id"],
-            "username": row["username"],
-            "password_hash": row["password_hash"],
-            "full_name": row["full_name"],
-            "role": role,
-            "email": row["email"] if row["email"] else None,
-        }
+        role_of = enum_lookup(UserRole)
         
-        # Tạo subclass phù hợp
-        if role == UserRole.ADMIN:
-            return Admin(**base_data, admin_id=row["admin_id"] if row["admin_id"] else "")
-        elif role == UserRole.TEACHER:
-            return Teacher(**base_data, teacher_code=row["teacher_code"] if row["teacher_code"] else "")
-        elif role == UserRole.STUDENT:
-            return Student(**base_data, student_code=row["student_code"] if row["student_code"] else "")
-        else:
-            return User(**base_data)
-    
+        def mapper(row: tuple) -> User:
+            role = role_of(row[i_role])
+            base = (
+                row[i_id], row[i_username], row[i_password], row[i_name],
+                row[i_email] or None,
+                to_datetime(row[i_created]) if i_created is not None else None
+            )
+            
+            # Tạo subclass phù hợp
+            if role is UserRole.STUDENT:
+                return Student.trusted(*base, student_code=row[i_student] or "")
+            if role is UserRole.TEACHER:
+                return Teacher.trusted(*base, teacher_code=row[i_teacher] or "")
+            if role is UserRole.ADMIN:
+                return Admin.trusted(*base, admin_id=row[i_admin] or "")
+            return User.trusted(*base[:4], role, *base[4:])
+        
+        return mapper
+
     def _entity_to_dict(self, entity: User) -> Dict[str, Any]:
         """Chuyển đổi User thành dictionary."""
         data = {
@@ -76,6 +106,27 @@ class UserRepository(BaseRepository[User]):
         
         return data
     
+    def _bulk_row(self, entity: Union[User, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Chuẩn hóa User (hoặc dict như create()) cho create_many/upsert_many.
+        
+        - user_id rỗng được bỏ để database tự cấp (AUTOINCREMENT)
+        - Các cột mã theo role luôn có mặt (None nếu không áp dụng)
+        """
+        data = dict(entity) if isinstance(entity, dict) else self._entity_to_dict(entity)
+        if not data.get("user_id"):
+            data.pop("user_id", None)
+        for column in self.ROLE_CODE_COLUMNS:
+            data.setdefault(column, None)
+        return data
+    
+    def _invalidate(self, id: Any = None) -> None:
+        """
+        Cache users được key theo student_code/teacher_code, còn các lệnh
+        ghi thường chỉ biết user_id: xóa toàn bộ cache (ghi users hiếm).
+        """
+        super()._invalidate()
+    
     def find_by_username(self, username: str) -> Optional[User]:
         """
         Tìm user theo username.
@@ -87,8 +138,7 @@ class UserRepository(BaseRepository[User]):
             User object hoặc None
         """
         query = f"SELECT * FROM {self.table_name} WHERE username = ?"
-        row = self.db.fetch_one(query, (username,))
-        return self._row_to_entity(row) if row else None
+        return self._fetch_entity(query, (username,))
     
     def find_by_email(self, email: str) -> Optional[User]:
         """
@@ -101,8 +151,7 @@ class UserRepository(BaseRepository[User]):
             User object hoặc None
         """
         query = f"SELECT * FROM {self.table_name} WHERE email = ?"
-        row = self.db.fetch_one(query, (email,))
-        return self._row_to_entity(row) if row else None
+        return self._fetch_entity(query, (email,))
     
     def find_by_role(self, role: UserRole) -> List[User]:
         """
@@ -115,8 +164,7 @@ class UserRepository(BaseRepository[User]):
             List các users
         """
         query = f"SELECT * FROM {self.table_name} WHERE role = ?"
-        rows = self.db.fetch_all(query, (role.value,))
-        return [self._row_to_entity(row) for row in rows]
+        return self._fetch_entities(query, (role.value,))
     
     def find_by_teacher_code(self, teacher_code: str) -> Optional[Teacher]:
         """
@@ -129,8 +177,7 @@ class UserRepository(BaseRepository[User]):
             Teacher object hoặc None
         """
         query = f"SELECT * FROM {self.table_name} WHERE teacher_code = ?"
-        row = self.db.fetch_one(query, (teacher_code,))
-        return self._row_to_entity(row) if row else None
+        return self._cached(("teacher_code", teacher_code), lambda: self._fetch_entity(query, (teacher_code,)))
     
     def find_by_student_code(self, student_code: str) -> Optional[Student]:
         """
@@ -143,8 +190,7 @@ class UserRepository(BaseRepository[User]):
             Student object hoặc None
         """
         query = f"SELECT * FROM {self.table_name} WHERE student_code = ?"
-        row = self.db.fetch_one(query, (student_code,))
-        return self._row_to_entity(row) if row else None
+        return self._cached(("student_code", student_code), lambda: self._fetch_entity(query, (student_code,)))
     
     def username_exists(self, username: str) -> bool:
         """Kiểm tra username đã tồn tại chưa."""
@@ -171,14 +217,32 @@ class UserRepository(BaseRepository[User]):
         """
         query = f"UPDATE {self.table_name} SET password_hash = ? WHERE user_id = ?"
         cursor = self.db.execute(query, (new_password_hash, user_id))
+        self._invalidate(user_id)
         return cursor.rowcount > 0
     
-    def create(self, data: Dict[str, Any]) -> User:
+    @classmethod
+    def role_code(cls, role: UserRole, user_id: int) -> Optional[str]:
+        """
+        Mã mặc định theo role sinh từ user_id.
+        
+        Example:
+            >>> UserRepository.role_code(UserRole.STUDENT, 7)
+            'SV007'
+        """
+        column_prefix = cls.ROLE_CODE_PREFIXES.get(role)
+        return f"{column_prefix[1]}{user_id:03d}" if column_prefix else None
+    
+    def create(self, data: Union[User, Dict[str, Any]]) -> User:
         """
-        Create new user from dictionary data.
+        Create new user from a User entity or dictionary data.
+        
+        user_id rỗng do database cấp (AUTOINCREMENT), không cần đọc
+        max(user_id) trước. Nếu chưa có mã theo role (admin_id /
+        teacher_code / student_code), mã được sinh từ user_id vừa cấp
+        (role_code) trong cùng transaction với lệnh INSERT.
         
         Args:
-            data: Dictionary with user fields
+            data: User entity hoặc dictionary với các field của user
             
         Returns:
             Created User object
@@ -189,34 +253,73 @@ class UserRepository(BaseRepository[User]):
             ...     "password_hash": "hash...",
             ...     "full_name": "John Doe",
             ...     "email": "john@example.com",
-            ...     "role": "STUDENT",
-            ...     "student_code": "ST001"
+            ...     "role": "STUDENT"
             ... })
+            >>> user.student_code
+            'SV042'
         """
-        # Build columns and values
-        columns = ", ".join(data.keys())
-        placeholders = ", ".join(["?" for _ in data])
+        row = self._bulk_row(data)
+        role = UserRole(row["role"])
+        code_column = self.ROLE_CODE_PREFIXES.get(role, (None,))[0]
+        if code_column is not None and not row[code_column]:
+            row[code_column] = None
+        
+        columns = list(row)
+        placeholders = ", ".join(["?" for _ in columns])
+        query = f"INSERT INTO {self.table_name} ({', '.join(columns)}) VALUES ({placeholders})"
         
-        query = f"INSERT INTO {self.table_name} ({columns}) VALUES ({placeholders})"
-        cursor = self.db.execute(query, tuple(data.values()))
+        with self.db.transaction():
+            user_id = self.db.execute(query, tuple(row.values())).lastrowid
+            if code_column is not None and row[code_column] is None:
+                self.db.execute(
+                    f"UPDATE {self.table_name} SET {code_column} = ? WHERE user_id = ?",
+                    (self.role_code(role, user_id), user_id)
+                )
+        self._invalidate()
         
         # Fetch and return the created user
-        user_id = cursor.lastrowid
         return self.find_by_id(user_id)
     
-    def find_by_id(self, user_id: int) -> Optional[User]:
+    def reserve_ids(self, count: int) -> range:
         """
-        Find user by ID.
+        Giữ trước một khối user_id liên tiếp cho bulk import.
+        
+        AUTOINCREMENT cấp ID mới từ max(sqlite_sequence.seq, max(user_id)) + 1,
+        nên sau khi tăng seq thêm count, không insert nào khác (kể cả từ
+        process khác) nhận ID trong khối. Caller gán sẵn user_id và mã theo
+        role (role_code) cho từng user rồi ghi bằng create_many.
         
         Args:
-            user_id: User ID
+            count: Số ID cần giữ (>= 1)
             
         Returns:
-            User object or None
+            range các user_id đã giữ
+            
+        Example:
+            >>> ids = user_repo.reserve_ids(len(rows))
+            >>> user_repo.create_many([
+            ...     Student(user_id, ..., student_code=UserRepository.role_code(UserRole.STUDENT, user_id))
+            ...     for user_id, row in zip(ids, rows)
+            ... ])
         """
-        query = f"SELECT * FROM {self.table_name} WHERE user_id = ?"
-        row = self.db.fetch_one(query, (user_id,))
-        return self._row_to_entity(row) if row else None
+        if count < 1:
+            raise ValueError("count must be >= 1")
+        
+        with self.db.transaction():
+            sequence = self.db.select(
+                "SELECT seq FROM sqlite_sequence WHERE name = ?", (self.table_name,)
+            ).fetchone()
+            top = self.db.select(f"SELECT MAX(user_id) FROM {self.table_name}").fetchone()[0] or 0
+            start = max(sequence[0] if sequence else 0, top) + 1
+            if sequence:
+                self.db.execute(
+                    "UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (start + count - 1, self.table_name)
+                )
+            else:
+                self.db.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (self.table_name, start + count - 1)
+                )
+        return range(start, start + count)
     
     def delete(self, user_id: int) -> bool:
         """
@@ -230,6 +333,7 @@ class UserRepository(BaseRepository[User]):
         """
         query = f"DELETE FROM {self.table_name} WHERE user_id = ?"
         cursor = self.db.execute(query, (user_id,))
+        self._invalidate(user_id)
         return cursor.rowcount > 0
 
     def update_student_profile(self, student_code: str, data: Dict[str, Any]) -> bool:
@@ -262,6 +366,7 @@ class UserRepository(BaseRepository[User]):
         
         try:
             cursor = self.db.execute(query, tuple(values))
+            self._invalidate()
             return cursor.rowcount > 0
         except Exception as e:
             print(f"Error updating student profile: {e}")
@@ -297,6 +402,7 @@ class UserRepository(BaseRepository[User]):
         
         try:
             cursor = self.db.execute(query, tuple(values))
+            self._invalidate()
             return cursor.rowcount > 0
         except Exception as e:
             print(f"Error updating teacher profile: {e}")
@@ -29,7 +29,8 @@ def init_database(seed: bool = False):
     
     from data.migrations.init_db import init_database as init_db, seed_demo_data
     
-    init_db(reset=True)
+    # Chỉ xóa data cũ khi seed demo; --init-db chỉ áp dụng migration còn thiếu
+    init_db(reset=seed)
     
     if seed:
         print("🌱 Đang seed demo data...")
@@ -47,12 +48,24 @@ def create_app():
     """
     # Import dependencies
     from data.database import Database
-    from data.repositories import UserRepository
-    from services import SecurityService, EmailService, AuthService, SessionService
+    from data.migrations.runner import MigrationRunner
+    from data.repositories import (
+        UserRepository, AttendanceRecordRepository, AttendanceSessionRepository, ClassroomRepository
+    )
+    from services import (
+        SecurityService, EmailService, AuthService, SessionService, SessionExpiryScheduler,
+        StudentService, AttendanceIngestionQueue
+    )
     from controllers import AuthController
     
     # Initialize database
     db = Database()
+    # Áp dụng migration còn thiếu trước khi dùng (database cũ chưa chạy --init-db)
+    MigrationRunner(db.db_path).migrate()
+    pragmas = ", ".join(f"{k}={v}" for k, v in db.active_pragmas().items())
+    print(f"🗄️  Database profile '{db.profile_name}': {pragmas}")
+    if db.profiler is not None:
+        print(f"⏱️  Query profiling bật (slow query >= {db.profiler.slow_ms:g} ms)")
     
     # Initialize repositories
     user_repo = UserRepository(db)
@@ -63,6 +76,19 @@ def create_app():
     email_service = EmailService()
     auth_service = AuthService(user_repo, security_service, session_service, email_service)
     
+    # Đóng phiên điểm danh đúng lúc hết giờ (thread nền, ngủ tới end_time sớm nhất)
+    session_expiry = SessionExpiryScheduler(AttendanceSessionRepository(db)).start()
+    
+    # Submit điểm danh của sinh viên đi qua queue group-commit (một writer
+    # thread, một commit mỗi batch) - đóng bởi shutdown_app()
+    student_service = StudentService(
+        user_repo=user_repo,
+        attendance_record_repo=AttendanceRecordRepository(db),
+        attendance_session_repo=AttendanceSessionRepository(db),
+        class_repo=ClassroomRepository(db)
+    )
+    ingestion = AttendanceIngestionQueue(student_service)
+    
     # Initialize controllers
     auth_controller = AuthController(auth_service)
     
@@ -76,6 +102,9 @@ def create_app():
             "security": security_service,
             "email": email_service,
             "auth": auth_service,
+            "session_expiry": session_expiry,
+            "student": student_service,
+            "ingestion": ingestion,
         },
         "controllers": {
             "auth": auth_controller,
@@ -83,6 +112,21 @@ def create_app():
     }
 
 
+def shutdown_app(app_config: dict) -> None:
+    """
+    Dừng các thread nền của ứng dụng.
+    
+    Ghi nốt các submit điểm danh còn trong queue rồi dừng scheduler đóng
+    session. Gọi nhiều lần không sao.
+    
+    Args:
+        app_config: Application configuration từ create_app()
+    """
+    services = app_config["services"]
+    services["ingestion"].close()
+    services["session_expiry"].stop()
+
+
 def run_gui(app_config: dict):
     """
     Chạy ứng dụng GUI.
@@ -167,29 +211,15 @@ def run_gui(app_config: dict):
 
             # Initialize student controller dependencies
             from controllers.student_controller import StudentController
-            from services.student_service import StudentService
-            from data.repositories import AttendanceRecordRepository, AttendanceSessionRepository, ClassroomRepository
             
-            # Get database and repos
-            db = app_config["db"]
-            user_repo = app_config["repositories"]["user"]
-            # Initialize repositories
-            record_repo = AttendanceRecordRepository(db)
-            session_repo = AttendanceSessionRepository(db)
-            class_repo = ClassroomRepository(db)
-            
-            # Initialize service
-            student_service = StudentService(
-                user_repo=user_repo,
-                attendance_record_repo=record_repo,
-                attendance_session_repo=session_repo,
-                class_repo=class_repo
-            )
+            # Service và ingestion queue dùng chung, tạo trong create_app()
+            student_service = app_config["services"]["student"]
             
             # Initialize controller
             student_controller = StudentController(
                 student_service=student_service,
-                auth_service=app_config["services"]["auth"]
+                auth_service=app_config["services"]["auth"],
+                ingestion=app_config["services"]["ingestion"]
             )
                 
             # Define navigation handler
@@ -265,7 +295,8 @@ def run_gui(app_config: dict):
                 record_repo=record_repo,
                 classroom_repo=classroom_repo,
                 security_service=app_config["services"]["security"],
-                qr_service=qr_service
+                qr_service=qr_service,
+                expiry_scheduler=app_config["services"]["session_expiry"]
             )
             
             # Initialize teacher controller
@@ -319,7 +350,7 @@ def run_gui(app_config: dict):
             # Initialize admin controller dependencies
             from controllers.admin_controller import AdminController
             from services.admin_service import AdminService
-            from data.repositories import ClassroomRepository, AttendanceSessionRepository
+            from data.repositories import ClassroomRepository, AttendanceSessionRepository, StatsRepository
             
             # Get database and repos
             db = app_config["db"]
@@ -332,7 +363,8 @@ def run_gui(app_config: dict):
                 user_repo=user_repo,
                 classroom_repo=classroom_repo,
                 attendance_repo=session_repo,
-                security_service=app_config["services"]["security"]
+                security_service=app_config["services"]["security"],
+                stats_repo=StatsRepository(db)
             )
             
             # Initialize controller
@@ -395,6 +427,12 @@ def run_gui(app_config: dict):
         print(f"🎓 {APP_NAME} đang chạy...")
         root.mainloop()
         
+        # Báo cáo SQL khi chạy với ATTENDANCE_DB_PROFILING=1
+        profiler = app_config["db"].profiler
+        if profiler is not None:
+            print("⏱️  Top SQL statements:")
+            print(profiler.report())
+        
     except ImportError as e:
         print(f"❌ Lỗi import: {e}")
         print("📦 Vui lòng cài đặt dependencies: pip install -r requirements.txt")
@@ -409,21 +447,21 @@ def main():
         epilog="""
 Examples:
   python main.py              Chạy ứng dụng GUI
-  python main.py --init-db    Khởi tạo database
-  python main.py --seed       Khởi tạo database với demo data
+  python main.py --init-db    Khởi tạo / nâng cấp database (giữ data)
+  python main.py --seed       Tạo lại database với demo data
         """
     )
     
     parser.add_argument(
         "--init-db",
         action="store_true",
-        help="Khởi tạo database (xóa data cũ)"
+        help="Khởi tạo database hoặc áp dụng migration còn thiếu (giữ data)"
     )
     
     parser.add_argument(
         "--seed",
         action="store_true",
-        help="Seed demo data vào database"
+        help="Tạo lại database (xóa data cũ) và seed demo data"
     )
     
     parser.add_argument(
@@ -442,7 +480,10 @@ Examples:
     # Run GUI application
     try:
         app_config = create_app()
-        run_gui(app_config)
+        try:
+            run_gui(app_config)
+        finally:
+            shutdown_app(app_config)
     except KeyboardInterrupt:
         print("\n👋 Đã thoát ứng dụng.")
     except Exception as e:
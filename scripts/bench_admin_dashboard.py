@@ -0,0 +1,67 @@
+"""
+Benchmark: Admin dashboard ở quy mô lớn
+=======================================
+
+So sánh AdminService.get_dashboard_stats:
+- legacy:   nạp mọi user và mọi lớp thành entity rồi đếm bằng Python
+- query:    một query aggregate (StatsRepository.get_system_counts), không cache
+- snapshot: như query nhưng đọc snapshot TTL (lần refresh thứ hai trở đi)
+
+Cách chạy:
+    python scripts/bench_admin_dashboard.py
+    python scripts/bench_admin_dashboard.py --users 1000 10000 50000
+"""
+
+import argparse
+
+from bench_utils import temp_database, seed_synthetic, timed
+from core.enums import UserRole
+from data.database import Database
+from data.repositories import AttendanceSessionRepository, ClassroomRepository, UserRepository
+from services.admin_service import AdminService
+from services.security_service import SecurityService
+
+
+def legacy_dashboard_stats(service: AdminService) -> dict:
+    """Bản sao get_dashboard_stats trước khi chuyển sang query aggregate (để so sánh)."""
+    all_users = service.user_repo.find_all()
+    return {
+        "total_users": len(all_users),
+        "total_admins": len([u for u in all_users if u.role == UserRole.ADMIN]),
+        "total_teachers": len([u for u in all_users if u.role == UserRole.TEACHER]),
+        "total_students": len([u for u in all_users if u.role == UserRole.STUDENT]),
+        "total_classes": len(service.classroom_repo.find_all()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Admin dashboard benchmark")
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000, 50000], help="Số sinh viên")
+    parser.add_argument("--classes", type=int, default=20, help="Số lớp")
+    parser.add_argument("--repeat", type=int, default=5, help="Số lần đo mỗi cách")
+    args = parser.parse_args()
+
+    print(f"{'users':>6} | {'legacy ms':>9} | {'query ms':>8} | {'snapshot ms':>11} | {'speed-up':>8}")
+    print("-" * 55)
+    for count in args.users:
+        with temp_database() as db_path:
+            seed_synthetic(db_path, num_students=count, num_classes=args.classes, sessions_per_class=1,
+                           with_records=False)
+            db = Database(db_path)
+            repos = (UserRepository(db), ClassroomRepository(db), AttendanceSessionRepository(db))
+            uncached = AdminService(*repos, SecurityService(), stats_cache_ttl=0)
+            cached = AdminService(*repos, SecurityService(), stats_cache_ttl=60)
+
+            legacy_time, legacy = timed(lambda: legacy_dashboard_stats(uncached), repeat=args.repeat)
+            query_time, stats = timed(uncached.get_dashboard_stats, repeat=args.repeat)
+            cached.get_dashboard_stats()
+            snapshot_time, _ = timed(cached.get_dashboard_stats, repeat=args.repeat)
+            db.close()
+
+        assert all(stats[key] == value for key, value in legacy.items()), (stats, legacy)
+        print(f"{count:>6} | {legacy_time * 1000:>9.2f} | {query_time * 1000:>8.2f} | "
+              f"{snapshot_time * 1000:>11.4f} | {legacy_time / query_time:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
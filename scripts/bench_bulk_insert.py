@@ -0,0 +1,68 @@
+"""
+Benchmark: Bulk insert attendance records
+=========================================
+
+So sánh BaseRepository.create (một commit mỗi record) với
+create_many (executemany theo batch trong một transaction).
+
+Cách chạy:
+    python scripts/bench_bulk_insert.py
+    python scripts/bench_bulk_insert.py --records 100000 --loop-sample 2000
+"""
+
+import argparse
+
+from bench_utils import temp_database, seed_synthetic, student_code, session_id, timed
+from core.enums import AttendanceStatus
+from core.models import AttendanceRecord
+from data.database import Database
+from data.repositories import AttendanceRecordRepository
+
+
+def make_records(count: int, num_students: int, prefix: str):
+    """Sinh records tổng hợp (generator) cho các session đã seed."""
+    for i in range(count):
+        yield AttendanceRecord(
+            record_id=f"{prefix}{i:09d}",
+            session_id=session_id(0, i // num_students),
+            student_code=student_code(i % num_students),
+            status=AttendanceStatus.PRESENT,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk insert benchmark")
+    parser.add_argument("--records", type=int, default=100000, help="Số records cho create_many")
+    parser.add_argument("--loop-sample", type=int, default=2000, help="Số records đo với create() từng dòng")
+    parser.add_argument("--students", type=int, default=200, help="Số sinh viên tổng hợp")
+    args = parser.parse_args()
+
+    sessions = args.records // args.students + 1
+
+    with temp_database() as db_path:
+        seed_synthetic(db_path, num_students=args.students, sessions_per_class=sessions, with_records=False)
+        db = Database(db_path)
+        repo = AttendanceRecordRepository(db)
+
+        def loop_create():
+            for record in make_records(args.loop_sample, args.students, "L"):
+                repo.create(record)
+
+        loop_time, _ = timed(loop_create)
+        db.execute("DELETE FROM attendance_records")
+
+        bulk_time, inserted = timed(
+            lambda: repo.create_many(make_records(args.records, args.students, "B"))
+        )
+        db.close()
+
+    loop_rate = args.loop_sample / loop_time
+    bulk_rate = inserted / bulk_time
+    print(f"create() loop : {loop_rate:>10.0f} rows/s "
+          f"(~{args.records / loop_rate:.1f}s for {args.records} rows, extrapolated)")
+    print(f"create_many() : {bulk_rate:>10.0f} rows/s ({bulk_time:.2f}s for {inserted} rows)")
+    print(f"speed-up      : {bulk_rate / loop_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: Dashboard sinh viên theo số records
+==============================================
+
+So sánh StudentService.get_dashboard_stats:
+- legacy: load mọi record của sinh viên, đếm + sort trong Python,
+  rồi nạp session/class của 5 record gần nhất
+- sql: một query aggregate + một query JOIN top-5 (cách hiện tại)
+
+Chạy với nhiều mức records / sinh viên: thời gian của "sql" phải gần như
+không đổi khi lịch sử dài ra.
+
+Cách chạy:
+    python scripts/bench_dashboard.py
+    python scripts/bench_dashboard.py --records 1000 10000 50000
+"""
+
+import argparse
+from datetime import datetime
+
+from bench_utils import temp_database, seed_synthetic, student_code, timed
+from core.enums import AttendanceStatus
+from data.database import Database
+from data.repositories import (
+    AttendanceRecordRepository,
+    AttendanceSessionRepository,
+    ClassRepository,
+    UserRepository,
+)
+from services.student_service import StudentService
+
+
+def legacy_dashboard_stats(service: StudentService, code: str) -> dict:
+    """Bản sao get_dashboard_stats trước khi chuyển sang SQL aggregate (để so sánh)."""
+    records = service.attendance_record_repo.find_by_student(code)
+    total_sessions = len(records)
+    present_count = sum(1 for r in records if r.status == AttendanceStatus.PRESENT)
+    recent_records = sorted(
+        records,
+        key=lambda r: r.attendance_time if r.attendance_time else datetime.min,
+        reverse=True
+    )[:5]
+    sessions = service.attendance_session_repo.find_many_by_ids(r.session_id for r in recent_records)
+    classes = service.class_repo.find_many_by_ids(s.class_id for s in sessions.values())
+    recent_attendance = []
+    for r in recent_records:
+        session = sessions.get(r.session_id)
+        cls = classes.get(session.class_id) if session else None
+        recent_attendance.append({
+            "record_id": r.record_id,
+            "class_name": cls.class_name if cls else None,
+        })
+    return {
+        "attendance_rate": round(present_count / total_sessions * 100, 2) if total_sessions else 0,
+        "total_sessions": total_sessions,
+        "present_count": present_count,
+        "absent_count": total_sessions - present_count,
+        "recent_attendance": recent_attendance,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Student dashboard benchmark")
+    parser.add_argument("--records", type=int, nargs="+", default=[1000, 5000, 10000],
+                        help="Số records mỗi sinh viên")
+    parser.add_argument("--students", type=int, default=5, help="Số sinh viên tổng hợp")
+    parser.add_argument("--repeat", type=int, default=20, help="Số lần đo mỗi cách")
+    args = parser.parse_args()
+
+    print(f"{'records':>8} | {'legacy ms':>10} | {'sql ms':>8} | {'speed-up':>8}")
+    print("-" * 44)
+    for per_student in args.records:
+        with temp_database() as db_path:
+            seed_synthetic(db_path, num_students=args.students, sessions_per_class=per_student)
+            db = Database(db_path)
+            service = StudentService(
+                UserRepository(db),
+                AttendanceRecordRepository(db),
+                AttendanceSessionRepository(db),
+                ClassRepository(db),
+            )
+            code = student_code(0)
+
+            legacy_time, legacy = timed(lambda: legacy_dashboard_stats(service, code), repeat=args.repeat)
+            sql_time, current = timed(lambda: service.get_dashboard_stats(code), repeat=args.repeat)
+            db.close()
+
+        for key in ("attendance_rate", "total_sessions", "present_count", "absent_count"):
+            assert legacy[key] == current[key], key
+        assert [r["record_id"] for r in legacy["recent_attendance"]] == \
+               [r["record_id"] for r in current["recent_attendance"]]
+
+        print(f"{per_student:>8} | {legacy_time * 1000:>10.2f} | {sql_time * 1000:>8.3f} | "
+              f"{legacy_time / sql_time:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
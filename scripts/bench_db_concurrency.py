@@ -0,0 +1,89 @@
+"""
+Benchmark: Read throughput vs. thread count
+===========================================
+
+So sánh throughput đọc khi nhiều thread cùng truy vấn:
+- shared: một sqlite3.Connection dùng chung (hành vi cũ của Database)
+- pooled: Database với connection riêng cho mỗi thread + WAL
+
+Cách chạy:
+    python scripts/bench_db_concurrency.py
+    python scripts/bench_db_concurrency.py --records 50000 --duration 3
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+from bench_utils import temp_database, seed_synthetic
+from data.database import Database
+
+REPORT_QUERY = """
+    SELECT session_id, status, COUNT(*) AS count
+    FROM attendance_records
+    WHERE student_code >= ?
+    GROUP BY session_id, status
+"""
+
+THREAD_COUNTS = [1, 2, 4, 8]
+
+
+def run_threads(num_threads: int, duration: float, query_fn) -> int:
+    """Chạy query_fn trên num_threads thread trong duration giây, trả về tổng số query."""
+    counts = [0] * num_threads
+    stop = threading.Event()
+
+    def worker(index: int) -> None:
+        while not stop.is_set():
+            query_fn()
+            counts[index] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(num_threads)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database concurrency benchmark")
+    parser.add_argument("--records", type=int, default=20000, help="Số attendance records tổng hợp")
+    parser.add_argument("--duration", type=float, default=2.0, help="Thời gian chạy mỗi cấu hình (giây)")
+    args = parser.parse_args()
+
+    with temp_database() as db_path:
+        seed_synthetic(db_path, num_students=200, sessions_per_class=max(1, args.records // 200))
+
+        # Baseline: một connection dùng chung, serialize bằng lock
+        shared_conn = sqlite3.connect(db_path, check_same_thread=False)
+        shared_lock = threading.Lock()
+
+        def shared_query():
+            with shared_lock:
+                shared_conn.execute(REPORT_QUERY, ("SV",)).fetchall()
+
+        db = Database(db_path)
+
+        def pooled_query():
+            db.fetch_all(REPORT_QUERY, ("SV",))
+
+        print(f"Records: {args.records}, duration: {args.duration}s per run, CPUs: {os.cpu_count()}")
+        print(f"{'threads':>8} | {'shared q/s':>12} | {'pooled q/s':>12} | {'speed-up':>8}")
+        print("-" * 50)
+        for n in THREAD_COUNTS:
+            shared_qps = run_threads(n, args.duration, shared_query) / args.duration
+            pooled_qps = run_threads(n, args.duration, pooled_query) / args.duration
+            print(f"{n:>8} | {shared_qps:>12.1f} | {pooled_qps:>12.1f} | {pooled_qps / shared_qps:>7.2f}x")
+
+        print(f"\nPool size after run: {db.pool_size}")
+        shared_conn.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
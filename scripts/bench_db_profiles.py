@@ -0,0 +1,81 @@
+"""
+Benchmark: Performance profiles
+===============================
+
+So sánh throughput submit (insert + commit từng record) và report
+(GROUP BY theo session) giữa các performance profile trong
+config/database.py trên cùng một bộ dữ liệu tổng hợp.
+
+Cách chạy:
+    python scripts/bench_db_profiles.py
+    python scripts/bench_db_profiles.py --students 500 --sessions 200 --submits 5000
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+from bench_utils import temp_database, seed_synthetic, timed
+from config.database import PERFORMANCE_PROFILES
+from data.database import Database
+
+REPORT_QUERY = """
+    SELECT session_id, status, COUNT(*) AS count
+    FROM attendance_records
+    GROUP BY session_id, status
+"""
+
+
+def bench_profile(profile: str, args) -> dict:
+    """Chạy benchmark cho một profile trên database tạm mới."""
+    with temp_database() as db_path:
+        seed_synthetic(db_path, num_students=args.students, sessions_per_class=args.sessions)
+        db = Database(db_path, profile=profile)
+
+        now = datetime.now()
+        db.execute(
+            "INSERT INTO attendance_sessions (session_id, class_id, start_time, end_time, attendance_method) "
+            "VALUES ('BENCH_OPEN', 'BENCH000', ?, ?, 'QR')",
+            (now.isoformat(), (now + timedelta(hours=2)).isoformat())
+        )
+
+        def submit_all():
+            for i in range(args.submits):
+                db.execute(
+                    "INSERT INTO attendance_records (record_id, session_id, student_code, status, attendance_time) "
+                    "VALUES (?, 'BENCH_OPEN', ?, 'PRESENT', ?)",
+                    (f"SUB{i:08d}", f"SUBMIT{i:06d}", now.isoformat())
+                )
+
+        # Foreign key tới users.student_code: tắt tạm cho dữ liệu submit tổng hợp
+        db.connection.execute("PRAGMA foreign_keys = OFF")
+        submit_time, _ = timed(submit_all)
+        db.connection.execute("PRAGMA foreign_keys = ON")
+
+        report_time, _ = timed(lambda: db.fetch_all(REPORT_QUERY), repeat=args.reports)
+        db.close()
+
+    return {
+        "submits_per_sec": args.submits / submit_time,
+        "reports_per_sec": 1 / report_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database performance profile benchmark")
+    parser.add_argument("--students", type=int, default=200, help="Số sinh viên tổng hợp")
+    parser.add_argument("--sessions", type=int, default=100, help="Số buổi học tổng hợp")
+    parser.add_argument("--submits", type=int, default=2000, help="Số lần submit (mỗi lần một commit)")
+    parser.add_argument("--reports", type=int, default=20, help="Số lần chạy report query")
+    args = parser.parse_args()
+
+    print(f"Dataset: {args.students} students x {args.sessions} sessions "
+          f"= {args.students * args.sessions} records")
+    print(f"{'profile':>10} | {'submit/s':>10} | {'report/s':>10}")
+    print("-" * 36)
+    for profile in PERFORMANCE_PROFILES:
+        result = bench_profile(profile, args)
+        print(f"{profile:>10} | {result['submits_per_sec']:>10.0f} | {result['reports_per_sec']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
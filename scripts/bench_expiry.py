@@ -0,0 +1,96 @@
+"""
+Benchmark: Tự động đóng session hết hạn theo kích thước bảng
+============================================================
+
+So sánh AttendanceSessionService.auto_close_expired_sessions:
+- legacy: duyệt mọi session đang mở, kiểm tra hết hạn trong Python, đóng
+  từng session (một UPDATE mỗi session, chung một transaction)
+- sql: một UPDATE ... WHERE status = 'OPEN' AND end_time < ? trên partial
+  index (cách hiện tại, được SessionExpiryScheduler gọi)
+
+Bảng có --open-ratio session đang mở (chưa hết giờ) và --expiring session
+vừa hết giờ; thời gian của "sql" phải theo số session hết hạn, không theo
+kích thước bảng.
+
+Cách chạy:
+    python scripts/bench_expiry.py
+    python scripts/bench_expiry.py --sessions 10000 100000 --expiring 50
+"""
+
+import argparse
+import sqlite3
+from datetime import datetime, timedelta
+
+from bench_utils import temp_database, seed_synthetic, timed
+from core.models.attendance_session import SessionStatus
+from data.database import Database
+from data.repositories import AttendanceSessionRepository
+
+
+def legacy_auto_close(session_repo: AttendanceSessionRepository) -> int:
+    """Bản sao auto_close_expired_sessions trước khi gộp thành một UPDATE (để so sánh)."""
+    open_sessions = list(session_repo.iter_by(status=SessionStatus.OPEN.value))
+    closed_count = 0
+    with session_repo.db.transaction():
+        for session in open_sessions:
+            if session.auto_close_if_expired():
+                session_repo.close_session(session.session_id)
+                closed_count += 1
+    return closed_count
+
+
+def prepare(db_path: str, open_every: int, expiring: int) -> None:
+    """Mở lại 1/open_every session (chưa hết giờ) và `expiring` session vừa hết giờ."""
+    now = datetime.now()
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE attendance_sessions SET status = 'CLOSED'")
+    conn.execute(
+        "UPDATE attendance_sessions SET status = 'OPEN', end_time = ? WHERE rowid % ? = 0",
+        ((now + timedelta(hours=1)).isoformat(), open_every)
+    )
+    conn.execute(
+        "UPDATE attendance_sessions SET status = 'OPEN', end_time = ? "
+        "WHERE rowid IN (SELECT rowid FROM attendance_sessions WHERE rowid % ? = 1 LIMIT ?)",
+        ((now - timedelta(minutes=1)).isoformat(), open_every, expiring)
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Expired session auto-close benchmark")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10000, 50000, 200000],
+                        help="Tổng số session trong bảng")
+    parser.add_argument("--open-ratio", type=int, default=10, help="1/N session đang mở (chưa hết giờ)")
+    parser.add_argument("--expiring", type=int, default=100, help="Số session vừa hết giờ")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>9} | {'open':>6} | {'closed':>6} | {'legacy ms':>10} | {'sql ms':>8} | {'speed-up':>8}")
+    print("-" * 62)
+    for total in args.sessions:
+        with temp_database() as db_path:
+            classes = 10
+            seed_synthetic(db_path, num_students=1, num_classes=classes,
+                           sessions_per_class=total // classes, with_records=False)
+            results = {}
+            for name in ("legacy", "sql"):
+                prepare(db_path, args.open_ratio, args.expiring)
+                db = Database(db_path)
+                repo = AttendanceSessionRepository(db)
+                open_count = db.fetch_one(
+                    "SELECT COUNT(*) AS count FROM attendance_sessions WHERE status = 'OPEN'"
+                )["count"]
+                if name == "legacy":
+                    results[name] = timed(lambda: legacy_auto_close(repo))
+                else:
+                    results[name] = timed(lambda: len(repo.close_expired(datetime.now())))
+                db.close()
+
+        (legacy_time, legacy_closed), (sql_time, sql_closed) = results["legacy"], results["sql"]
+        assert legacy_closed == sql_closed == args.expiring, (legacy_closed, sql_closed)
+        print(f"{total:>9} | {open_count:>6} | {sql_closed:>6} | {legacy_time * 1000:>10.2f} | "
+              f"{sql_time * 1000:>8.3f} | {legacy_time / sql_time:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
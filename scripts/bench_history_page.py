@@ -0,0 +1,136 @@
+"""
+Benchmark: Một trang lịch sử điểm danh (filter + sort + page trong SQL)
+=======================================================================
+
+So sánh StudentService.get_attendance_history cho một sinh viên có lịch sử dài:
+- legacy: đọc toàn bộ lịch sử đã join, lọc + sắp xếp trong Python rồi cắt trang
+- sql: filter/sort/keyset pagination trong SQL + query đếm tổng (cách hiện tại)
+
+Mỗi kịch bản đo trang đầu (kèm total) và một trang sâu (đi bằng cursor).
+Mục tiêu: < 20 ms mỗi trang với 50k records.
+
+Cách chạy:
+    python scripts/bench_history_page.py
+    python scripts/bench_history_page.py --classes 10 --sessions 5000 --page-size 10
+"""
+
+import argparse
+from datetime import timedelta
+
+from bench_utils import BENCH_START, temp_database, seed_synthetic, student_code, timed
+from data.database import Database
+from data.repositories import (
+    AttendanceRecordRepository,
+    AttendanceSessionRepository,
+    ClassRepository,
+    UserRepository,
+)
+from services.student_service import StudentService
+
+
+def legacy_history_page(service: StudentService, code: str, page_size: int, **filters) -> tuple:
+    """Bản sao get_attendance_history trước khi đẩy filter/sort/page vào SQL (để so sánh)."""
+    rows = service.attendance_record_repo.find_history_rows(code)
+    if filters.get("start_date"):
+        rows = [r for r in rows if r.attendance_time and r.attendance_time >= filters["start_date"]]
+    if filters.get("end_date"):
+        rows = [r for r in rows if r.attendance_time and r.attendance_time <= filters["end_date"]]
+    if filters.get("class_id"):
+        rows = [r for r in rows if r.class_id == filters["class_id"]]
+    if filters.get("status"):
+        rows = [r for r in rows if r.status.value == filters["status"]]
+    if filters.get("search_query"):
+        query = filters["search_query"].lower()
+        rows = [
+            r for r in rows
+            if query in (r.class_name or "").lower()
+            or (r.attendance_time and (query in r.attendance_time.strftime("%d %b %Y").lower()
+                                       or query in r.attendance_time.strftime("%Y-%m-%d")))
+        ]
+    formatted = [service._format_history_row(r) for r in rows]
+    reverse = filters.get("sort_order", "desc") == "desc"
+    if filters.get("sort_by") == "class_name":
+        formatted.sort(key=lambda x: (x["class_name"] or "").lower(), reverse=reverse)
+    else:
+        formatted.sort(key=lambda x: x["date"] + x["time"], reverse=reverse)
+    return formatted[:page_size], len(formatted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attendance history page benchmark")
+    parser.add_argument("--classes", type=int, default=10, help="Số lớp")
+    parser.add_argument("--sessions", type=int, default=5000, help="Số buổi mỗi lớp")
+    parser.add_argument("--page-size", type=int, default=10, help="Số dòng mỗi trang")
+    parser.add_argument("--depth", type=int, default=20, help="Trang sâu được đo (đi bằng cursor)")
+    parser.add_argument("--repeat", type=int, default=20, help="Số lần đo mỗi trang")
+    parser.add_argument("--legacy-repeat", type=int, default=2, help="Số lần đo bản legacy")
+    args = parser.parse_args()
+
+    middle = BENCH_START + timedelta(days=args.sessions // 2)
+    scenarios = {
+        "default (date desc)": {},
+        "status=ABSENT": {"status": "ABSENT"},
+        "date range": {"start_date": middle, "end_date": middle + timedelta(days=365)},
+        "class_id": {"class_id": "BENCH003"},
+        "search class name": {"search_query": "bench003"},
+        "search date": {"search_query": BENCH_START.strftime("%d %b")},
+        "sort class_name asc": {"sort_by": "class_name", "sort_order": "asc"},
+        "sort date asc": {"sort_order": "asc"},
+    }
+
+    with temp_database() as db_path:
+        total = seed_synthetic(db_path, num_students=1, num_classes=args.classes, sessions_per_class=args.sessions)
+        db = Database(db_path)
+        service = StudentService(
+            UserRepository(db),
+            AttendanceRecordRepository(db),
+            AttendanceSessionRepository(db),
+            ClassRepository(db),
+        )
+        code = student_code(0)
+        print(f"📊 {total} records cho {code}, trang {args.page_size} dòng, trang sâu = {args.depth + 1}\n")
+        print(f"{'scenario':<22} | {'total':>6} | {'legacy ms':>9} | {'page 1 ms':>9} | {'deep ms':>8}")
+        print("-" * 68)
+
+        worst = 0.0
+        for name, filters in scenarios.items():
+            first_time, first = timed(
+                lambda: service.get_attendance_history(code, limit=args.page_size, **filters),
+                repeat=args.repeat
+            )
+
+            # Đi tới trang sâu bằng cursor, rồi đo riêng trang đó (không đếm lại total)
+            page, cursor = first, None
+            for _ in range(args.depth):
+                if not page.has_more:
+                    break
+                cursor = page.next_key
+                page = service.get_attendance_history(
+                    code, cursor=cursor, limit=args.page_size, include_total=False, **filters
+                )
+            deep_time, deep = timed(
+                lambda: service.get_attendance_history(
+                    code, cursor=cursor, limit=args.page_size, include_total=False, **filters
+                ),
+                repeat=args.repeat
+            )
+
+            # Thứ tự cũ không ổn định (record vắng lấy ngày hiện tại) -> chỉ so sánh số dòng khớp bộ lọc
+            legacy_time, (_, legacy_total) = timed(
+                lambda: legacy_history_page(service, code, args.page_size, **filters),
+                repeat=args.legacy_repeat
+            )
+            assert legacy_total == first.total, name
+
+            worst = max(worst, first_time, deep_time)
+            print(f"{name:<22} | {first.total:>6} | {legacy_time * 1000:>9.1f} | "
+                  f"{first_time * 1000:>9.2f} | {deep_time * 1000:>8.2f}")
+
+        db.close()
+
+    status = "✅" if worst < 0.020 else "⚠️"
+    print(f"\n{status} Trang chậm nhất: {worst * 1000:.2f} ms (mục tiêu < 20 ms)")
+
+
+if __name__ == "__main__":
+    main()
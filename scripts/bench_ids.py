@@ -0,0 +1,83 @@
+"""
+Stress test: Sinh ID từ nhiều thread và nhiều process
+=====================================================
+
+Sinh hàng triệu ID bằng utils.id_generator từ nhiều thread trong mỗi process
+(mỗi process là một node riêng, như nhiều worker của app) rồi kiểm tra:
+- không có ID trùng
+- trong mỗi thread, ID tăng dần (sortable theo thời điểm sinh)
+
+So sánh với cách cũ REC{YYYYmmddHHMMSS}: đếm số ID trùng trong cùng tải.
+
+Cách chạy:
+    python scripts/bench_ids.py
+    python scripts/bench_ids.py --ids 4000000 --threads 16 --processes 4
+"""
+
+import argparse
+import multiprocessing
+import threading
+import time
+from datetime import datetime
+from functools import partial
+
+import bench_utils  # noqa: F401  (thêm project root vào sys.path)
+from utils.id_generator import new_id
+
+
+def legacy_id() -> str:
+    """ID record trước khi có id_generator (để so sánh)."""
+    return f"REC{datetime.now().strftime('%Y%m%d%H%M%S')}"
+
+
+def generate(args) -> tuple:
+    """Một process: `threads` thread, mỗi thread sinh `count` ID; trả về (ids, số thread không tăng dần)."""
+    make, threads, count = args
+    outputs = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads)
+
+    def worker(out):
+        barrier.wait()
+        out.extend(make() for _ in range(count))
+
+    workers = [threading.Thread(target=worker, args=(out,)) for out in outputs]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    unordered = sum(1 for out in outputs if out != sorted(out))
+    return [i for out in outputs for i in out], unordered
+
+
+def run(make, total: int, threads: int, processes: int) -> tuple:
+    per_thread = total // (threads * processes)
+    start = time.perf_counter()
+    with multiprocessing.get_context("fork").Pool(processes) as pool:
+        results = pool.map(generate, [(make, threads, per_thread)] * processes)
+    elapsed = time.perf_counter() - start
+    ids = [i for chunk, _ in results for i in chunk]
+    unordered = sum(u for _, u in results)
+    return elapsed, len(ids), len(ids) - len(set(ids)), unordered
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ID generator stress test")
+    parser.add_argument("--ids", type=int, default=2_000_000, help="Tổng số ID")
+    parser.add_argument("--threads", type=int, default=8, help="Số thread mỗi process")
+    parser.add_argument("--processes", type=int, default=2, help="Số process (node)")
+    parser.add_argument("--legacy-ids", type=int, default=200_000, help="Số ID cho cách cũ")
+    args = parser.parse_args()
+
+    print(f"{args.processes} processes x {args.threads} threads\n")
+    print(f"{'generator':>10} | {'ids':>9} | {'ids/s':>10} | {'duplicates':>10} | {'unordered threads':>17}")
+    print("-" * 68)
+    for name, make, total in (("legacy", legacy_id, args.legacy_ids), ("new_id", partial(new_id, "REC"), args.ids)):
+        elapsed, count, duplicates, unordered = run(make, total, args.threads, args.processes)
+        print(f"{name:>10} | {count:>9} | {count / elapsed:>10.0f} | {duplicates:>10} | {unordered:>17}")
+
+    assert duplicates == 0 and unordered == 0
+    print("\n✅ Không có ID trùng, ID tăng dần trong mỗi thread")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: Ingestion queue cho đợt submit đầu giờ học
+=====================================================
+
+Mô phỏng đợt submit đầu giờ: N sinh viên submit vào một session trong
+--duration giây (mặc định 500 submit trong 10 giây). Thời điểm đến được sinh
+ngẫu nhiên, dồn về đầu khoảng thời gian (phần lớn sinh viên quét mã ngay khi
+giảng viên mở phiên). Mỗi submit chạy trên một thread client riêng.
+
+- direct: mỗi submit một transaction (StudentService.submit_attendance)
+- queue:  AttendanceIngestionQueue, một commit mỗi batch
+
+Báo cáo throughput (submit đã xử lý / thời gian từ submit đầu tới kết quả
+cuối), latency p50/p99 của mỗi submit và số batch. Chạy với profile durable
+(fsync mỗi commit) để thấy chi phí commit.
+
+Cách chạy:
+    python scripts/bench_ingestion.py
+    python scripts/bench_ingestion.py --submits 2000 --duration 2 --profile balanced
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import temp_database, seed_synthetic, student_code
+from bench_submit import SESSION_ID, TOKEN, open_session
+from data.database import Database
+from data.repositories import (
+    AttendanceRecordRepository,
+    AttendanceSessionRepository,
+    ClassRepository,
+    UserRepository,
+)
+from services.attendance_ingestion import AttendanceIngestionQueue
+from services.student_service import StudentService
+
+
+def arrival_offsets(count: int, duration: float, seed: int = 42) -> list:
+    """Thời điểm đến (giây) trong [0, duration), dồn về đầu (phân phối beta(1, 3))."""
+    rng = random.Random(seed)
+    return sorted(rng.betavariate(1, 3) * duration for _ in range(count))
+
+
+def run_burst(submit, codes, offsets, threads: int):
+    """Mỗi client chờ tới thời điểm đến của mình rồi submit; trả về (elapsed, latencies, results)."""
+    latencies = [0.0] * len(codes)
+    results = [None] * len(codes)
+    start = time.perf_counter() + 0.1
+
+    def client(index):
+        delay = start + offsets[index] - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        sent = time.perf_counter()
+        results[index] = submit(codes[index])
+        latencies[index] = time.perf_counter() - sent
+        return time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        finished = list(pool.map(client, range(len(codes))))
+    return max(finished) - (start + offsets[0]), latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attendance ingestion queue benchmark")
+    parser.add_argument("--submits", type=int, default=500, help="Số submit (mỗi sinh viên một lần)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Khoảng thời gian đợt submit (giây)")
+    parser.add_argument("--threads", type=int, default=128, help="Số thread client")
+    parser.add_argument("--batch-size", type=int, default=200, help="INGEST_BATCH_SIZE")
+    parser.add_argument("--linger-ms", type=float, default=10.0, help="INGEST_MAX_LINGER_MS")
+    parser.add_argument("--profile", default="durable", help="Performance profile của database")
+    args = parser.parse_args()
+
+    codes = [student_code(i) for i in range(args.submits)]
+    offsets = arrival_offsets(args.submits, args.duration)
+
+    with temp_database() as db_path:
+        seed_synthetic(db_path, num_students=args.submits, sessions_per_class=1, with_records=False)
+
+        print(f"{args.submits} submit trong {args.duration:g}s, {args.threads} client threads, "
+              f"profile={args.profile}, batch={args.batch_size}, linger={args.linger_ms:g} ms\n")
+        print(f"{'path':>6} | {'submit/s':>9} | {'p50 ms':>7} | {'p99 ms':>7} | {'max ms':>7} | "
+              f"{'ok':>5} | {'batches':>7}")
+        print("-" * 66)
+        for name in ("direct", "queue"):
+            open_session(db_path)
+            db = Database(db_path, profile=args.profile)
+            service = StudentService(
+                UserRepository(db),
+                AttendanceRecordRepository(db),
+                AttendanceSessionRepository(db),
+                ClassRepository(db),
+            )
+            ingestion = None
+            if name == "queue":
+                ingestion = AttendanceIngestionQueue(
+                    service, batch_size=args.batch_size, max_linger_ms=args.linger_ms
+                )
+                submit = lambda code: ingestion.submit(code, SESSION_ID, TOKEN).result()
+            else:
+                submit = lambda code: service.submit_attendance(code, SESSION_ID, TOKEN)
+
+            elapsed, latencies, results = run_burst(submit, codes, offsets, args.threads)
+            batches = "-"
+            if ingestion is not None:
+                ingestion.close()
+                batches = ingestion.batches
+            db.close()
+
+            ok = sum(1 for success, _ in results if success)
+            assert ok == len(codes), {message for success, message in results if not success}
+            quantiles = statistics.quantiles(latencies, n=100)
+            print(f"{name:>6} | {len(results) / elapsed:>9.0f} | {quantiles[49] * 1000:>7.2f} | "
+                  f"{quantiles[98] * 1000:>7.2f} | {max(latencies) * 1000:>7.2f} | {ok:>5} | {batches:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: Bộ nhớ khi load attendance records
+=============================================
+
+So sánh bộ nhớ (tracemalloc) và thời gian load toàn bộ records:
+- legacy: dataclass thường (__dict__ + __post_init__), như model cũ
+- slotted: AttendanceRecord (slots=True) qua AttendanceRecord.trusted
+- batch: AttendanceRecordBatch (các list song song, string được intern)
+
+Cách chạy:
+    python scripts/bench_model_memory.py
+    python scripts/bench_model_memory.py --records 200000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from bench_utils import temp_database, seed_synthetic
+from core.enums import AttendanceStatus
+from data.database import Database
+from data.repositories import AttendanceRecordRepository
+
+
+@dataclass
+class LegacyAttendanceRecord:
+    """Bản sao AttendanceRecord trước khi dùng slots (để so sánh)."""
+
+    record_id: str
+    session_id: str
+    student_code: str
+    status: AttendanceStatus = AttendanceStatus.ABSENT
+    attendance_time: Optional[datetime] = None
+    remark: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+
+    def __post_init__(self):
+        if not self.record_id or not self.session_id or not self.student_code:
+            raise ValueError("Thiếu dữ liệu")
+
+
+def measure(load) -> tuple:
+    """Chạy load(), trả về (MB còn giữ sau khi load, giây, số phần tử)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = len(result)
+    del result
+    return current / 1024 / 1024, elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model memory benchmark")
+    parser.add_argument("--records", type=int, default=1000000, help="Số attendance records tổng hợp")
+    parser.add_argument("--students", type=int, default=500, help="Số sinh viên tổng hợp")
+    args = parser.parse_args()
+
+    sessions = max(1, args.records // args.students)
+
+    with temp_database() as db_path:
+        count = seed_synthetic(db_path, num_students=args.students, sessions_per_class=sessions)
+        db = Database(db_path)
+        repo = AttendanceRecordRepository(db)
+        query = "SELECT * FROM attendance_records"
+
+        def load_legacy():
+            records = []
+            for row in db.iter_rows(query, (), repo.batch_size):
+                records.append(LegacyAttendanceRecord(
+                    record_id=row["record_id"],
+                    session_id=row["session_id"],
+                    student_code=row["student_code"],
+                    status=AttendanceStatus.from_string(row["status"]),
+                    attendance_time=row["attendance_time"],
+                    remark=row["remark"],
+                ))
+            return records
+
+        results = {
+            "legacy": measure(load_legacy),
+            "slotted": measure(lambda: list(repo.iter_all())),
+            "batch": measure(repo.load_batch),
+        }
+        db.close()
+
+    print(f"Records: {count}")
+    print(f"{'model':>8} | {'MB':>8} | {'bytes/rec':>9} | {'load s':>7}")
+    print("-" * 42)
+    for name, (mb, elapsed, size) in results.items():
+        assert size == count
+        print(f"{name:>8} | {mb:>8.1f} | {mb * 1024 * 1024 / count:>9.0f} | {elapsed:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: Nạp danh sách sinh viên của nhiều lớp (trang quản lý lớp của admin)
+==============================================================================
+
+So sánh cách lấy student_codes cho mọi lớp:
+- legacy: get_students_in_class cho từng lớp (1 query mỗi lớp)
+- roster: hydrate_students (một query trên classes_student cho mọi lớp)
+- count:  hydrate_students(count_only=True) (chỉ sĩ số, GROUP BY class_id)
+
+Báo cáo thời gian và số câu SELECT.
+
+Cách chạy:
+    python scripts/bench_rosters.py
+    python scripts/bench_rosters.py --classes 10 50 200 --students 100
+"""
+
+import argparse
+
+from bench_utils import temp_database, seed_synthetic, timed
+from bench_session_reports import count_selects
+from data.database import Database
+from data.repositories import ClassroomRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk classroom roster benchmark")
+    parser.add_argument("--classes", type=int, nargs="+", default=[10, 50, 200], help="Số lớp")
+    parser.add_argument("--students", type=int, default=100, help="Số sinh viên mỗi lớp")
+    parser.add_argument("--repeat", type=int, default=10, help="Số lần đo mỗi cách")
+    args = parser.parse_args()
+
+    print(f"{'classes':>7} | {'legacy ms':>9} | {'selects':>7} | {'roster ms':>9} | {'selects':>7} | "
+          f"{'count ms':>8} | {'selects':>7}")
+    print("-" * 74)
+    for count in args.classes:
+        with temp_database() as db_path:
+            seed_synthetic(db_path, num_students=args.students, num_classes=count, sessions_per_class=1,
+                           with_records=False)
+            db = Database(db_path)
+            repo = ClassroomRepository(db)
+            classes = repo.find_all()
+
+            def legacy():
+                return {c.class_id: repo.get_students_in_class(c.class_id) for c in classes}
+
+            def roster():
+                return {c.class_id: c.student_codes for c in repo.hydrate_students(classes)}
+
+            def count_only():
+                return {c.class_id: c.student_count for c in repo.hydrate_students(classes, count_only=True)}
+
+            legacy_time, legacy_rosters = timed(legacy, repeat=args.repeat)
+            roster_time, rosters = timed(roster, repeat=args.repeat)
+            count_time, counts = timed(count_only, repeat=args.repeat)
+            selects = [count_selects(db, fn) for fn in (legacy, roster, count_only)]
+            db.close()
+
+        for class_id, codes in legacy_rosters.items():
+            assert set(codes) == rosters[class_id] and len(codes) == counts[class_id], class_id
+        print(f"{count:>7} | {legacy_time * 1000:>9.2f} | {selects[0]:>7} | {roster_time * 1000:>9.2f} | "
+              f"{selects[1]:>7} | {count_time * 1000:>8.2f} | {selects[2]:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: Row -> entity mapping
+================================
+
+So sánh tốc độ dựng AttendanceRecord từ kết quả SELECT:
+- legacy: sqlite3.Row + kiểm tra row.keys() mỗi dòng + from_string()
+- compiled: tuple rows + mapper compile một lần theo cursor.description
+
+Cách chạy:
+    python scripts/bench_row_mapping.py
+    python scripts/bench_row_mapping.py --records 200000
+"""
+
+import argparse
+from datetime import datetime
+
+from bench_utils import temp_database, seed_synthetic, timed
+from core.enums import AttendanceStatus
+from core.models import AttendanceRecord
+from data.database import Database
+from data.repositories import AttendanceRecordRepository
+
+QUERY = "SELECT * FROM attendance_records"
+
+
+def legacy_row_to_record(row) -> AttendanceRecord:
+    """Mapper kiểu cũ: tra cứu theo tên cột và row.keys() cho mỗi dòng."""
+    attendance_time = None
+    if "attendance_time" in row.keys() and row["attendance_time"]:
+        value = row["attendance_time"]
+        attendance_time = datetime.fromisoformat(value) if isinstance(value, str) else value
+
+    return AttendanceRecord(
+        record_id=row["record_id"],
+        session_id=row["session_id"],
+        student_code=row["student_code"],
+        status=AttendanceStatus.from_string(row["status"]),
+        attendance_time=attendance_time,
+        remark=row["remark"] if "remark" in row.keys() else None
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Row mapping benchmark")
+    parser.add_argument("--records", type=int, default=1000000, help="Số attendance records tổng hợp")
+    parser.add_argument("--students", type=int, default=500, help="Số sinh viên tổng hợp")
+    args = parser.parse_args()
+
+    sessions = max(1, args.records // args.students)
+
+    with temp_database() as db_path:
+        count = seed_synthetic(db_path, num_students=args.students, sessions_per_class=sessions)
+        db = Database(db_path)
+        repo = AttendanceRecordRepository(db)
+
+        legacy_time, legacy = timed(
+            lambda: [legacy_row_to_record(row) for row in db.iter_rows(QUERY, (), repo.batch_size)]
+        )
+        compiled_time, compiled = timed(lambda: list(repo.iter_all()))
+        db.close()
+
+    assert len(legacy) == len(compiled) == count
+
+    print(f"Records: {count}")
+    print(f"legacy   : {count / legacy_time:>12.0f} rows/s ({legacy_time:.2f}s)")
+    print(f"compiled : {count / compiled_time:>12.0f} rows/s ({compiled_time:.2f}s)")
+    print(f"speed-up : {legacy_time / compiled_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: Báo cáo điểm danh của danh sách session (trang quản lý session)
+==========================================================================
+
+So sánh cách lấy báo cáo cho mọi session giáo viên đang xem:
+- legacy: get_session_report cho từng session (session + stats + lớp: 3 query mỗi session)
+- batch: get_session_reports (một query GROUP BY session_id + một lần nạp sessions)
+
+Báo cáo thời gian và số câu SELECT cho mỗi lần refresh trang.
+
+Cách chạy:
+    python scripts/bench_session_reports.py
+    python scripts/bench_session_reports.py --sessions 10 50 200 --students 100
+"""
+
+import argparse
+
+from bench_utils import temp_database, seed_synthetic, session_id, timed
+from data.database import Database
+from data.repositories import AttendanceRecordRepository, AttendanceSessionRepository, ClassroomRepository
+from services.attendance_session_service import AttendanceSessionService
+from services.qr_service import QRService
+from services.security_service import SecurityService
+
+
+def legacy_session_report(service: AttendanceSessionService, sid: str) -> dict:
+    """Bản sao get_session_report trước khi gộp thành batch (để so sánh)."""
+    session = service.session_repo.find_by_id(sid)
+    stats = service.record_repo.get_attendance_stats(sid)
+    classroom = service.classroom_repo.find_by_id(session.class_id)
+    total_students = len(classroom.student_codes) if classroom else 0
+    return {
+        "total_students": total_students,
+        "present_count": stats.get("PRESENT", 0),
+        "absent_count": stats.get("ABSENT", 0),
+    }
+
+
+def count_selects(db: Database, fn) -> int:
+    statements = []
+    db.connection.set_trace_callback(statements.append)
+    try:
+        fn()
+    finally:
+        db.connection.set_trace_callback(None)
+    return sum(1 for s in statements if s.lstrip().upper().startswith("SELECT"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched session reports benchmark")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 50, 200], help="Số session trên trang")
+    parser.add_argument("--students", type=int, default=100, help="Số sinh viên mỗi lớp")
+    parser.add_argument("--classes", type=int, default=5, help="Số lớp")
+    parser.add_argument("--repeat", type=int, default=10, help="Số lần đo mỗi cách")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>8} | {'legacy ms':>9} | {'selects':>7} | {'batch ms':>8} | {'selects':>7} | {'speed-up':>8}")
+    print("-" * 64)
+    for count in args.sessions:
+        per_class = -(-count // args.classes)
+        with temp_database() as db_path:
+            seed_synthetic(db_path, num_students=args.students, num_classes=args.classes,
+                           sessions_per_class=per_class)
+            db = Database(db_path)
+            security = SecurityService()
+            service = AttendanceSessionService(
+                AttendanceSessionRepository(db), AttendanceRecordRepository(db), ClassroomRepository(db),
+                security, QRService(security)
+            )
+            ids = [session_id(c, i) for c in range(args.classes) for i in range(per_class)][:count]
+
+            def legacy():
+                return {sid: legacy_session_report(service, sid) for sid in ids}
+
+            def batch():
+                return service.get_session_reports(ids)
+
+            legacy_time, legacy_reports = timed(legacy, repeat=args.repeat)
+            batch_time, batch_reports = timed(batch, repeat=args.repeat)
+            # Đo số query khi cache nguội (lần refresh đầu)
+            def clear_caches():
+                service.session_repo.cache.clear()
+                service.classroom_repo.cache.clear()
+
+            clear_caches()
+            legacy_selects = count_selects(db, legacy)
+            clear_caches()
+            batch_selects = count_selects(db, batch)
+            db.close()
+
+        # Bản cũ luôn có total_students = 0 (find_by_id không nạp student_codes) -> chỉ so sánh có mặt / vắng
+        for sid, report in legacy_reports.items():
+            assert (batch_reports[sid]["present_count"], batch_reports[sid]["absent_count"]) == \
+                   (report["present_count"], report["absent_count"]), sid
+        print(f"{count:>8} | {legacy_time * 1000:>9.2f} | {legacy_selects:>7} | {batch_time * 1000:>8.2f} | "
+              f"{batch_selects:>7} | {legacy_time / batch_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark: Submit điểm danh đồng thời
+=====================================
+
+N sinh viên cùng submit vào một session đang mở (mỗi sinh viên gửi hai lần
+song song, như double-click / retry), chạy trên nhiều thread:
+- legacy: find session -> kiểm tra đã có record -> INSERT -> đọc lại để xác nhận
+- upsert: một INSERT ... SELECT ... ON CONFLICT DO NOTHING (cách hiện tại)
+
+Báo cáo throughput, latency và kết quả: mỗi sinh viên phải có đúng một
+record, lần gửi thứ hai phải nhận "đã điểm danh" chứ không phải lỗi.
+
+Cách chạy:
+    python scripts/bench_submit.py
+    python scripts/bench_submit.py --students 1000 --threads 16
+"""
+
+import argparse
+import sqlite3
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from bench_utils import temp_database, seed_synthetic, student_code
+from core.enums import AttendanceStatus
+from core.models import AttendanceRecord
+from data.database import Database
+from data.repositories import (
+    AttendanceRecordRepository,
+    AttendanceSessionRepository,
+    ClassRepository,
+    UserRepository,
+)
+from services.student_service import StudentService
+
+SESSION_ID = "SUBMIT01"
+TOKEN = "BENCHTOKEN"
+
+
+def legacy_submit(service: StudentService, code: str, session_id: str, token: str):
+    """Bản sao submit_attendance trước khi gộp thành một câu lệnh (để so sánh)."""
+    session = service.attendance_session_repo.find_by_id(session_id)
+    if session is None or session.status.value != "OPEN":
+        return False, "Phiên điểm danh đã đóng"
+    current_time = datetime.now()
+    if not session.start_time <= current_time <= session.end_time:
+        return False, "Ngoài giờ"
+    if service.attendance_record_repo.find_by_session_and_student(session_id, code):
+        return False, "Bạn đã điểm danh cho phiên này rồi"
+    if token != session.token:
+        return False, "Token không hợp lệ"
+    record = AttendanceRecord(
+        record_id=service._generate_record_id(),
+        session_id=session_id,
+        student_code=code,
+        attendance_time=current_time,
+        status=AttendanceStatus.PRESENT,
+        remark=""
+    )
+    try:
+        service.attendance_record_repo.create(record)
+        if service.attendance_record_repo.find_by_session_and_student(session_id, code):
+            return True, "Điểm danh thành công!"
+        return False, "Không thể xác nhận lưu điểm danh, vui lòng thử lại"
+    except Exception as e:
+        return False, f"Lỗi khi lưu điểm danh: {type(e).__name__}"
+
+
+def open_session(db_path: str) -> None:
+    """Tạo session đang mở (LINK_TOKEN) cho lớp tổng hợp, xóa record cũ của nó."""
+    now = datetime.now()
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA recursive_triggers = ON")
+    conn.execute("DELETE FROM attendance_records WHERE session_id = ?", (SESSION_ID,))
+    conn.execute(
+        "INSERT OR REPLACE INTO attendance_sessions (session_id, class_id, start_time, end_time, "
+        "attendance_method, status, token) VALUES (?, 'BENCH000', ?, ?, 'LINK_TOKEN', 'OPEN', ?)",
+        (SESSION_ID, (now - timedelta(minutes=5)).isoformat(), (now + timedelta(hours=1)).isoformat(), TOKEN)
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(submit, codes, threads: int):
+    """Mỗi sinh viên submit hai lần, song song trên `threads` thread."""
+    latencies = []
+    lock = threading.Lock()
+
+    def one(code):
+        start = time.perf_counter()
+        result = submit(code)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+        return result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, [code for code in codes for _ in range(2)]))
+    return time.perf_counter() - start, latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent attendance submit benchmark")
+    parser.add_argument("--students", type=int, default=1000, help="Số sinh viên submit vào một session")
+    parser.add_argument("--threads", type=int, default=16, help="Số thread submit song song")
+    args = parser.parse_args()
+
+    with temp_database() as db_path:
+        seed_synthetic(db_path, num_students=args.students, sessions_per_class=1, with_records=False)
+        codes = [student_code(i) for i in range(args.students)]
+
+        print(f"{args.students} sinh viên x 2 submit, {args.threads} threads\n")
+        print(f"{'path':>8} | {'submit/s':>9} | {'p50 ms':>7} | {'p95 ms':>7} | {'records':>7} | outcomes")
+        print("-" * 90)
+        for name in ("legacy", "upsert"):
+            open_session(db_path)
+            db = Database(db_path)
+            service = StudentService(
+                UserRepository(db),
+                AttendanceRecordRepository(db),
+                AttendanceSessionRepository(db),
+                ClassRepository(db),
+            )
+            if name == "legacy":
+                submit = lambda code: legacy_submit(service, code, SESSION_ID, TOKEN)
+            else:
+                submit = lambda code: service.submit_attendance(code, SESSION_ID, TOKEN)
+
+            elapsed, latencies, results = run(submit, codes, args.threads)
+            records = db.fetch_one(
+                "SELECT COUNT(*) AS count FROM attendance_records WHERE session_id = ?", (SESSION_ID,)
+            )["count"]
+            db.close()
+
+            outcomes = Counter(message for _, message in results)
+            quantiles = statistics.quantiles(latencies, n=20)
+            print(f"{name:>8} | {len(results) / elapsed:>9.0f} | {quantiles[9] * 1000:>7.2f} | "
+                  f"{quantiles[18] * 1000:>7.2f} | {records:>7} | {dict(outcomes)}")
+
+
+if __name__ == "__main__":
+    main()
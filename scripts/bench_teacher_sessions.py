@@ -0,0 +1,72 @@
+"""
+Benchmark: Danh sách session của giáo viên theo số session đã tạo
+=================================================================
+
+So sánh AttendanceSessionService.get_sessions_by_teacher (dashboard giáo viên
+và trang quản lý session gọi mỗi 30-60 giây):
+- legacy: find_by_class cho từng lớp, gộp + sort trong Python rồi cắt limit
+- sql: một query JOIN classes -> attendance_sessions, ORDER BY/LIMIT trong SQL
+
+Thời gian của "sql" phải gần như không đổi khi số session tăng.
+
+Cách chạy:
+    python scripts/bench_teacher_sessions.py
+    python scripts/bench_teacher_sessions.py --sessions 1000 10000 --classes 20
+"""
+
+import argparse
+
+from bench_utils import temp_database, seed_synthetic, timed
+from data.database import Database
+from data.repositories import AttendanceRecordRepository, AttendanceSessionRepository, ClassroomRepository
+from services.attendance_session_service import AttendanceSessionService
+from services.qr_service import QRService
+from services.security_service import SecurityService
+
+
+def legacy_sessions_by_teacher(service: AttendanceSessionService, teacher_code: str, limit: int) -> list:
+    """Bản sao get_sessions_by_teacher trước khi gộp thành một query (để so sánh)."""
+    all_sessions = []
+    for c in service.classroom_repo.find_by_teacher(teacher_code):
+        all_sessions.extend(service.session_repo.find_by_class(c.class_id))
+    all_sessions.sort(key=lambda x: x.start_time, reverse=True)
+    return all_sessions[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teacher sessions benchmark")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[100, 1000, 5000],
+                        help="Số session mỗi lớp")
+    parser.add_argument("--classes", type=int, default=10, help="Số lớp của giáo viên")
+    parser.add_argument("--limit", type=int, default=10, help="Số session mỗi lần lấy")
+    parser.add_argument("--repeat", type=int, default=20, help="Số lần đo mỗi cách")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>9} | {'legacy ms':>10} | {'sql ms':>8} | {'speed-up':>8}")
+    print("-" * 45)
+    for per_class in args.sessions:
+        with temp_database() as db_path:
+            seed_synthetic(db_path, num_students=1, num_classes=args.classes,
+                           sessions_per_class=per_class, with_records=False)
+            db = Database(db_path)
+            security = SecurityService()
+            service = AttendanceSessionService(
+                AttendanceSessionRepository(db), AttendanceRecordRepository(db), ClassroomRepository(db),
+                security, QRService(security)
+            )
+            legacy_time, legacy = timed(
+                lambda: legacy_sessions_by_teacher(service, "GV999", args.limit), repeat=args.repeat
+            )
+            sql_time, current = timed(
+                lambda: service.get_sessions_by_teacher("GV999", limit=args.limit), repeat=args.repeat
+            )
+            db.close()
+
+        # Cùng start_time giữa các lớp -> thứ tự legacy trong nhóm trùng không xác định
+        assert [s.start_time for s in legacy] == [s.start_time for s in current]
+        print(f"{per_class * args.classes:>9} | {legacy_time * 1000:>10.2f} | {sql_time * 1000:>8.3f} | "
+              f"{legacy_time / sql_time:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
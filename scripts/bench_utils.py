@@ -0,0 +1,143 @@
+"""
+Benchmark Utilities - Dữ liệu tổng hợp cho benchmark
+====================================================
+
+Helper dùng chung cho các script scripts/bench_*.py:
+- Tạo database tạm với schema đầy đủ
+- Seed dữ liệu tổng hợp (users, classes, sessions, records)
+- Đo thời gian
+
+Cách sử dụng:
+    from bench_utils import temp_database, seed_synthetic, timed
+
+    with temp_database() as db_path:
+        seed_synthetic(db_path, num_students=200, sessions_per_class=50)
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, Tuple
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.migrations.init_db import init_database
+
+BENCH_START = datetime(2024, 1, 1, 8, 0)
+
+
+@contextmanager
+def temp_database() -> Iterator[str]:
+    """Tạo database tạm với schema đầy đủ, trả về đường dẫn file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        init_database(db_path=db_path)
+        yield db_path
+
+
+def student_code(index: int) -> str:
+    """Mã sinh viên tổng hợp thứ index."""
+    return f"SV{index:05d}"
+
+
+def session_id(class_index: int, index: int) -> str:
+    """Mã session tổng hợp."""
+    return f"S{class_index:03d}{index:06d}"
+
+
+def seed_synthetic(
+    db_path: str,
+    num_students: int = 200,
+    num_classes: int = 1,
+    sessions_per_class: int = 100,
+    with_records: bool = True
+) -> int:
+    """
+    Seed dữ liệu tổng hợp.
+
+    Mọi sinh viên được ghi danh vào mọi lớp; mỗi lớp có sessions_per_class
+    buổi (mỗi ngày một buổi, đã đóng), mỗi sinh viên có một record cho mỗi
+    buổi (3/4 PRESENT).
+
+    Returns:
+        Số attendance records đã tạo
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA synchronous = OFF")
+
+    students = [student_code(i) for i in range(num_students)]
+    conn.executemany(
+        "INSERT INTO users (username, password_hash, full_name, role, student_code) "
+        "VALUES (?, 'x', ?, 'STUDENT', ?)",
+        [(code, code, code) for code in students]
+    )
+    conn.execute(
+        "INSERT INTO users (username, password_hash, full_name, role, teacher_code) "
+        "VALUES ('bench_teacher', 'x', 'Bench Teacher', 'TEACHER', 'GV999')"
+    )
+
+    class_ids = [f"BENCH{c:03d}" for c in range(num_classes)]
+    conn.executemany(
+        "INSERT INTO classes (class_id, class_name, subject_code, teacher_code) VALUES (?, ?, 'B101', 'GV999')",
+        [(class_id, f"Bench class {class_id}") for class_id in class_ids]
+    )
+    conn.executemany(
+        "INSERT INTO classes_student (class_id, student_code) VALUES (?, ?)",
+        [(class_id, code) for class_id in class_ids for code in students]
+    )
+
+    def sessions():
+        for c in range(num_classes):
+            for i in range(sessions_per_class):
+                start = BENCH_START + timedelta(days=i, minutes=c)
+                yield (
+                    session_id(c, i), class_ids[c],
+                    start.isoformat(), (start + timedelta(hours=2)).isoformat()
+                )
+
+    conn.executemany(
+        "INSERT INTO attendance_sessions (session_id, class_id, start_time, end_time, attendance_method, status) "
+        "VALUES (?, ?, ?, ?, 'QR', 'CLOSED')",
+        sessions()
+    )
+
+    count = 0
+    if with_records:
+        def records():
+            n = 0
+            for c in range(num_classes):
+                for i in range(sessions_per_class):
+                    start = BENCH_START + timedelta(days=i, minutes=c, seconds=30)
+                    for s, code in enumerate(students):
+                        present = n % 4 != 0
+                        yield (
+                            f"R{n:09d}", session_id(c, i), code,
+                            "PRESENT" if present else "ABSENT",
+                            (start + timedelta(seconds=s)).isoformat() if present else None
+                        )
+                        n += 1
+
+        conn.executemany(
+            "INSERT INTO attendance_records (record_id, session_id, student_code, status, attendance_time) "
+            "VALUES (?, ?, ?, ?, ?)",
+            records()
+        )
+        count = num_classes * sessions_per_class * num_students
+
+    conn.commit()
+    conn.close()
+    return count
+
+
+def timed(fn: Callable, repeat: int = 1) -> Tuple[float, object]:
+    """Chạy fn repeat lần, trả về (thời gian trung bình giây, kết quả lần cuối)."""
+    result = None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
@@ -0,0 +1,394 @@
+"""
+Index Advisor - Đề xuất index từ workload của repositories
+==========================================================
+
+Chạy workload tổng hợp qua các repository thật, ghi lại mọi câu SELECT
+(SQL gốc + params) bằng QueryProfiler, rồi:
+1. EXPLAIN QUERY PLAN từng câu: tìm full scan (SCAN), temp B-tree cho
+   ORDER BY / GROUP BY và điều kiện lọc không nằm trong index đang dùng
+2. Đề xuất index composite / covering / partial (điều kiện literal như
+   status = 'OPEN' thành partial index)
+3. Tạo thử index, EXPLAIN lại, chỉ giữ index được planner dùng; index cũ
+   là prefix của index mới được đề xuất DROP
+4. Chạy lại workload và replay các câu SELECT đã ghi để đo speed-up
+5. Ghi các index được chấp nhận thành file migration mới
+
+--write-migration NAME ghi data/migrations/versions/NNN_NAME.sql với NNN là
+version kế tiếp còn trống. Không bao giờ ghi đè file đã có: migration đã
+áp dụng được MigrationRunner lưu checksum, sửa lại sẽ làm mọi database đã
+migrate lỗi ở lần migrate sau (và index mới không tới được database cũ).
+
+Cách chạy:
+    python scripts/index_advisor.py
+    python scripts/index_advisor.py --students 500 --classes 20 --sessions 60
+    python scripts/index_advisor.py --write-migration workload_indexes
+"""
+
+import argparse
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from bench_utils import temp_database, seed_synthetic, student_code, session_id, timed
+from data.database import Database
+from data.instrumentation import QueryProfiler, normalize_sql
+from data.migrations.runner import Migration
+from data.repositories import (
+    AttendanceRecordRepository,
+    AttendanceSessionRepository,
+    ClassroomRepository,
+)
+
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|INNER\b)(\w+))?", re.I)
+_EQ_PARAM = re.compile(r"(?<![\w.])(?:(\w+)\.)?(\w+)\s*=\s*\?")
+_EQ_LITERAL = re.compile(r"(?<![\w.])(?:(\w+)\.)?(\w+)\s*=\s*('(?:[^']|'')*'|\d+)")
+_WHERE = re.compile(r"\bWHERE\b(.*?)(?=\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|$)", re.I | re.S)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b(.*?)(?=\bLIMIT\b|$)", re.I | re.S)
+_GROUP_BY = re.compile(r"\bGROUP\s+BY\b(.*?)(?=\bHAVING\b|\bORDER\s+BY\b|\bLIMIT\b|$)", re.I | re.S)
+_SEARCH = re.compile(r"^SEARCH (\w+) USING (?:COVERING )?INDEX (\w+) \((.*)\)")
+
+
+class WorkloadRecorder(QueryProfiler):
+    """QueryProfiler ghi lại SQL gốc và mọi bộ params của các câu SELECT."""
+
+    def __init__(self):
+        super().__init__(slow_ms=float("inf"), explain=False, echo=False)
+        self.samples: Dict[str, Tuple[str, Any]] = {}
+        self.calls: List[Tuple[str, Any]] = []
+
+    def record(self, sql, params, duration, connection, many=False):
+        super().record(sql, params, duration, connection, many)
+        if not many and sql.lstrip().upper().startswith("SELECT"):
+            self.samples.setdefault(normalize_sql(sql), (sql, params))
+            self.calls.append((sql, params))
+
+
+@dataclass
+class IndexCandidate:
+    """Một index được đề xuất."""
+
+    table: str
+    columns: List[str]
+    where: Optional[str] = None
+    reasons: List[str] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        suffix = ""
+        if self.where:
+            suffix = "_" + "_".join(re.findall(r"'(\w+)'|\b(\d+)\b", self.where)[0]).strip("_").lower()
+        return f"idx_{self.table}_{'_'.join(self.columns)}{suffix}"
+
+    def create_sql(self) -> str:
+        where = f" WHERE {self.where}" if self.where else ""
+        return f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table}({', '.join(self.columns)}){where};"
+
+
+def build_workload(db: Database, args) -> List[Callable[[], Any]]:
+    """Các lời gọi repository đại diện cho màn hình student/teacher."""
+    records = AttendanceRecordRepository(db)
+    sessions = AttendanceSessionRepository(db)
+    classes = ClassroomRepository(db)
+
+    ops: List[Callable[[], Any]] = []
+    for i in range(0, args.students, max(1, args.students // 20)):
+        code = student_code(i)
+        ops.append(lambda code=code: records.find_by_student(code))
+        ops.append(lambda code=code: records.page_by_student(code, limit=20))
+        ops.append(lambda code=code: classes.get_classes_for_student(code))
+    for c in range(args.classes):
+        class_id = f"BENCH{c:03d}"
+        ops.append(lambda class_id=class_id: sessions.find_by_class(class_id))
+        ops.append(lambda class_id=class_id: sessions.page_by_class(class_id, limit=20))
+        ops.append(lambda class_id=class_id: sessions.find_active_by_class(class_id))
+        for i in range(0, args.sessions, max(1, args.sessions // 5)):
+            sid = session_id(c, i)
+            ops.append(lambda sid=sid: records.get_attendance_stats(sid))
+            ops.append(lambda sid=sid: records.find_by_session(sid))
+    return ops
+
+
+def run_workload(ops: List[Callable[[], Any]], repeat: int) -> float:
+    """Chạy workload (một lần làm nóng + repeat lần), trả về thời gian tốt nhất (giây)."""
+    run = lambda: [op() for op in ops]
+    run()
+    return min(timed(run)[0] for _ in range(repeat))
+
+
+def replay(db: Database, calls: List[Tuple[str, Any]], repeat: int) -> Dict[str, float]:
+    """
+    Chạy lại các câu SELECT đã ghi (chỉ SQL, không map entity).
+
+    Returns:
+        Dict SQL chuẩn hóa -> thời gian tốt nhất qua các lần chạy (giây)
+    """
+    connection = db.connection
+    best: Dict[str, float] = {}
+    for attempt in range(repeat + 1):
+        totals: Dict[str, float] = {}
+        for sql, params in calls:
+            start = time.perf_counter()
+            connection.execute(sql, params).fetchall()
+            key = normalize_sql(sql)
+            totals[key] = totals.get(key, 0.0) + time.perf_counter() - start
+        if attempt:   # lần đầu chỉ để làm nóng cache
+            for key, elapsed in totals.items():
+                best[key] = min(best.get(key, elapsed), elapsed)
+    return best
+
+
+def plan_problems(plan: List[str], sql: str, partial_columns: Dict[str, Set[str]]) -> List[str]:
+    """
+    Tìm các vấn đề trong query plan.
+
+    Args:
+        plan: Các dòng EXPLAIN QUERY PLAN
+        sql: Câu SELECT
+        partial_columns: Tên partial index -> các cột trong điều kiện WHERE của nó
+    """
+    problems = []
+    single = len(_TABLE_REF.findall(sql)) == 1
+    eq_columns = {col for _, col in _EQ_PARAM.findall(sql)} | {col for _, col, _ in _EQ_LITERAL.findall(sql)}
+    for line in plan:
+        detail = line.strip()
+        if detail.startswith("SCAN ") and "CONSTANT ROW" not in detail:
+            problems.append(detail)
+        elif "USE TEMP B-TREE" in detail:
+            problems.append(detail)
+        elif single:
+            # Điều kiện bằng không nằm trong index (hay điều kiện partial index) -> lọc từng dòng
+            match = _SEARCH.match(detail)
+            if match:
+                used = set(re.findall(r"(\w+)[=<>]", match.group(3)))
+                residual = eq_columns - used - partial_columns.get(match.group(2), set())
+                if residual:
+                    problems.append(f"{detail} + filter {', '.join(sorted(residual))}")
+    return problems
+
+
+def propose(sql: str, problems: List[str]) -> List[IndexCandidate]:
+    """Đề xuất index cho một câu SELECT dựa trên WHERE / GROUP BY / ORDER BY."""
+    refs = _TABLE_REF.findall(sql)
+    aliases = {(alias or table): table for table, alias in refs}
+    single = len(refs) == 1
+    where_match = _WHERE.search(sql)
+    where = where_match.group(1) if where_match else ""
+
+    candidates: Dict[str, IndexCandidate] = {}
+    for alias, table in aliases.items():
+        def belongs(owner: str) -> bool:
+            return owner == alias or (single and not owner)
+
+        columns = [col for owner, col in _EQ_PARAM.findall(where) if belongs(owner)]
+        literals = [(col, value) for owner, col, value in _EQ_LITERAL.findall(where) if belongs(owner)]
+
+        if single:
+            for clause in (_GROUP_BY.search(sql), _ORDER_BY.search(sql)):
+                if clause:
+                    columns += [part.split()[0].split(".")[-1] for part in clause.group(1).split(",")]
+
+        literal_columns = {col for col, _ in literals}
+        columns = [c for c in dict.fromkeys(columns) if c not in literal_columns]
+        if not columns:
+            continue
+
+        partial = " AND ".join(f"{col} = {value}" for col, value in literals) or None
+        candidate = IndexCandidate(table, columns, partial, list(problems))
+        candidates[candidate.name] = candidate
+    return list(candidates.values())
+
+
+def merge_candidates(candidates: List[IndexCandidate]) -> List[IndexCandidate]:
+    """Gộp trùng lặp và bỏ index là prefix của index khác (cùng bảng, cùng partial)."""
+    unique: Dict[str, IndexCandidate] = {}
+    for candidate in candidates:
+        existing = unique.get(candidate.name)
+        if existing:
+            existing.reasons += [r for r in candidate.reasons if r not in existing.reasons]
+        else:
+            unique[candidate.name] = candidate
+
+    kept = []
+    for candidate in unique.values():
+        covered_by = next((
+            other for other in unique.values()
+            if other is not candidate and other.table == candidate.table
+            and other.where == candidate.where
+            and other.columns[:len(candidate.columns)] == candidate.columns
+            and len(other.columns) > len(candidate.columns)
+        ), None)
+        if covered_by:
+            covered_by.reasons += [r for r in candidate.reasons if r not in covered_by.reasons]
+        else:
+            kept.append(candidate)
+    return kept
+
+
+def existing_indexes(db: Database, table: str) -> List[Tuple[str, List[str], bool]]:
+    """Các index tạo bằng CREATE INDEX của bảng: (tên, cột, partial)."""
+    result = []
+    for row in db.fetch_all(f"PRAGMA index_list({table})"):
+        if row["origin"] != "c":
+            continue
+        columns = [info["name"] for info in db.fetch_all(f"PRAGMA index_info({row['name']})")]
+        result.append((row["name"], columns, bool(row["partial"])))
+    return result
+
+
+def partial_index_columns(db: Database) -> Dict[str, Set[str]]:
+    """Tên partial index -> các cột được so sánh bằng trong điều kiện WHERE của nó."""
+    result = {}
+    for row in db.fetch_all("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql LIKE '% WHERE %'"):
+        where = row["sql"].split(" WHERE ", 1)[1]
+        result[row["name"]] = {col for _, col, _ in _EQ_LITERAL.findall(where)}
+    return result
+
+
+def explain_all(db: Database, samples: Dict[str, Tuple[str, Any]]) -> Dict[str, List[str]]:
+    """EXPLAIN QUERY PLAN cho mọi câu lệnh đã ghi lại."""
+    return {
+        key: QueryProfiler.explain_plan(sql, params, db.connection)
+        for key, (sql, params) in samples.items()
+    }
+
+
+VERSIONS_DIR = Path(__file__).resolve().parent.parent / "data" / "migrations" / "versions"
+
+
+def next_migration_path(name: str, versions_dir: Path = VERSIONS_DIR) -> Path:
+    """Đường dẫn NNN_name.sql với NNN = version lớn nhất trong versions_dir + 1."""
+    if not re.fullmatch(r"\w+", name):
+        raise ValueError(f"Tên migration không hợp lệ: {name!r} (chỉ chữ, số, _)")
+    versions = [int(Migration.from_path(path).version) for path in versions_dir.glob("*.sql")]
+    return versions_dir / f"{max(versions, default=0) + 1:03d}_{name}.sql"
+
+
+def write_migration(path: Path, accepted: List[IndexCandidate], drops: List[str], speedup: float) -> None:
+    """Ghi các index được chấp nhận thành file migration SQL mới (lỗi nếu file đã tồn tại)."""
+    lines = [
+        "-- ============================================================================",
+        f"-- Workload indexes (generated by scripts/index_advisor.py, {date.today().isoformat()})",
+        f"-- SQL replay speed-up khi đo: {speedup:.2f}x",
+        "-- ============================================================================",
+        "",
+    ]
+    for candidate in accepted:
+        lines.append(f"-- {'; '.join(candidate.reasons[:3])}")
+        lines.append(candidate.create_sql())
+        lines.append("")
+    if drops:
+        lines.append("-- Index cũ là prefix của index mới (thừa, chỉ làm chậm ghi)")
+        lines += [f"DROP INDEX IF EXISTS {name};" for name in drops]
+        lines.append("")
+    with open(path, "x", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index advisor")
+    parser.add_argument("--students", type=int, default=300, help="Số sinh viên tổng hợp")
+    parser.add_argument("--classes", type=int, default=10, help="Số lớp tổng hợp")
+    parser.add_argument("--sessions", type=int, default=40, help="Số buổi mỗi lớp")
+    parser.add_argument("--repeat", type=int, default=5, help="Số lần chạy workload khi đo")
+    parser.add_argument("--write-migration", metavar="NAME",
+                        help="Ghi index được chấp nhận ra migration mới versions/NNN_NAME.sql")
+    args = parser.parse_args()
+
+    with temp_database() as db_path:
+        seed_synthetic(db_path, num_students=args.students, num_classes=args.classes,
+                       sessions_per_class=args.sessions)
+        db = Database(db_path)
+        # Buổi mới nhất của mỗi lớp đang mở (cho find_active_by_class)
+        db.execute(
+            "UPDATE attendance_sessions SET status = 'OPEN' WHERE session_id IN "
+            "(SELECT MAX(session_id) FROM attendance_sessions GROUP BY class_id)"
+        )
+        db.execute("ANALYZE")
+
+        ops = build_workload(db, args)
+        recorder = WorkloadRecorder()
+        db.profiler = recorder
+        run_workload(ops, 1)
+        db.disable_profiling()
+        samples = recorder.samples
+
+        before_time = run_workload(ops, args.repeat)
+        before_sql = replay(db, recorder.calls, args.repeat)
+        before_plans = explain_all(db, samples)
+
+        print(f"Workload: {len(ops)} calls, {len(samples)} distinct SELECT statements")
+        partials = partial_index_columns(db)
+        candidates = []
+        flagged = []
+        for key, plan in before_plans.items():
+            problems = plan_problems(plan, samples[key][0], partials)
+            if problems:
+                print(f"\n⚠️  {key}")
+                for problem in problems:
+                    print(f"    {problem}")
+                candidates += propose(samples[key][0], problems)
+                flagged.append(key)
+        candidates = merge_candidates(candidates)
+        if not candidates:
+            db.close()
+            print("\n✅ Không có câu lệnh nào cần thêm index")
+            return
+
+        for candidate in candidates:
+            db.execute(candidate.create_sql())
+        db.execute("ANALYZE")
+        after_plans = explain_all(db, samples)
+        used = "\n".join(line for plan in after_plans.values() for line in plan)
+        accepted = [c for c in candidates if re.search(rf"\b{c.name}\b", used)]
+        for candidate in candidates:
+            if candidate not in accepted:
+                db.execute(f"DROP INDEX {candidate.name}")
+
+        drops = []
+        for table in {c.table for c in accepted}:
+            for name, columns, partial in existing_indexes(db, table):
+                if partial or any(name == c.name for c in accepted):
+                    continue
+                if any(c.where is None and c.columns[:len(columns)] == columns
+                       and len(c.columns) > len(columns) for c in accepted if c.table == table):
+                    drops.append(name)
+        for name in drops:
+            db.execute(f"DROP INDEX {name}")
+        db.execute("ANALYZE")
+
+        after_time = run_workload(ops, args.repeat)
+        after_sql = replay(db, recorder.calls, args.repeat)
+        db.close()
+
+    before_flagged = sum(before_sql[key] for key in flagged)
+    after_flagged = sum(after_sql[key] for key in flagged)
+    speedup = before_flagged / after_flagged if after_flagged else 1.0
+    print("\n✅ Accepted indexes:")
+    for candidate in accepted:
+        print(f"    {candidate.create_sql()}")
+    for name in sorted(drops):
+        print(f"    DROP INDEX IF EXISTS {name};")
+    rejected = [c.name for c in candidates if c not in accepted]
+    if rejected:
+        print(f"❎ Không được planner dùng: {', '.join(rejected)}")
+    print(f"\n{'before ms':>10} | {'after ms':>9} | {'speed-up':>8} | sql")
+    print("-" * 80)
+    for key in flagged:
+        print(f"{before_sql[key] * 1000:>10.1f} | {after_sql[key] * 1000:>9.1f} | "
+              f"{before_sql[key] / after_sql[key]:>7.2f}x | {key[:60]}")
+    print(f"\nSQL replay (câu lệnh có vấn đề): {before_flagged * 1000:.1f} ms -> "
+          f"{after_flagged * 1000:.1f} ms ({speedup:.2f}x)")
+    print(f"Workload (gồm map entity): {before_time * 1000:.1f} ms -> {after_time * 1000:.1f} ms "
+          f"({before_time / after_time:.2f}x)")
+
+    if args.write_migration:
+        path = next_migration_path(args.write_migration)
+        write_migration(path, accepted, sorted(drops), speedup)
+        print(f"📝 Migration: {path}")
+
+
+if __name__ == "__main__":
+    main()
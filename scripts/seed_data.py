@@ -27,7 +27,10 @@ except ImportError:
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'attendance.db')
 
 def get_db_connection():
-    return sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH)
+    # INSERT OR REPLACE phải chạy delete trigger để student_attendance_summary đúng
+    conn.execute("PRAGMA recursive_triggers = ON")
+    return conn
 
 def seed_data():
     conn = get_db_connection()
@@ -13,6 +13,8 @@ Package chứa các service classes:
 - security_service.py: Password hashing, tokens
 - student_service.py: Student operations
 - session_service.py: Session management
+- attendance_ingestion.py: Batched (group-commit) attendance submit queue
+- session_expiry_scheduler.py: Background auto-close of expired sessions
 
 Services chứa business logic, gọi repositories để truy cập data.
 
@@ -31,6 +33,8 @@ from .admin_service import AdminService
 from .report_service import ReportService
 from .student_service import StudentService
 from .session_service import SessionService
+from .attendance_ingestion import AttendanceIngestionQueue
+from .session_expiry_scheduler import SessionExpiryScheduler
 
 __all__ = [
     "AuthService",
@@ -40,5 +44,7 @@ __all__ = [
     "AdminService",
     "ReportService",
     "StudentService",
-    "SessionService"
+    "SessionService",
+    "AttendanceIngestionQueue",
+    "SessionExpiryScheduler"
 ]
@@ -12,9 +12,11 @@ Service xử lý logic nghiệp vụ cho admin:
 from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 
+from config.database import ADMIN_DASHBOARD_CACHE_TTL
 from core.enums import UserRole
 from core.models import User, Admin, Teacher, Student, Classroom
-from data.repositories import UserRepository, ClassroomRepository, AttendanceSessionRepository
+from data.cache import MISSING, EntityCache
+from data.repositories import UserRepository, ClassroomRepository, AttendanceSessionRepository, StatsRepository
 from services.security_service import SecurityService
 
 
@@ -39,7 +41,9 @@ class AdminService:
         user_repo: UserRepository,
         classroom_repo: ClassroomRepository,
         attendance_repo: AttendanceSessionRepository,
-        security_service: SecurityService
+        security_service: SecurityService,
+        stats_repo: Optional[StatsRepository] = None,
+        stats_cache_ttl: float = ADMIN_DASHBOARD_CACHE_TTL
     ):
         """
         Khởi tạo AdminService.
@@ -49,51 +53,62 @@ class AdminService:
             classroom_repo: ClassroomRepository instance
             attendance_repo: AttendanceSessionRepository instance
             security_service: SecurityService instance
+            stats_repo: StatsRepository cho số đếm dashboard (mặc định: cùng database với user_repo)
+            stats_cache_ttl: Thời gian (giây) giữ snapshot dashboard (0 = không cache)
         """
         self.user_repo = user_repo
         self.classroom_repo = classroom_repo
         self.attendance_repo = attendance_repo
         self.security = security_service
+        self.stats_repo = stats_repo if stats_repo is not None else StatsRepository(user_repo.db)
+        self._stats_cache = EntityCache(max_size=1, ttl=stats_cache_ttl) if stats_cache_ttl > 0 else None
     
     # ==================== Dashboard ====================
     
-    def get_dashboard_stats(self) -> Dict[str, Any]:
+    def get_dashboard_stats(self, refresh: bool = False) -> Dict[str, Any]:
         """
         Lấy thống kê cho admin dashboard.
         
+        Mọi số đếm lấy từ một query aggregate (không nạp users / classes), kết
+        quả được giữ làm snapshot trong stats_cache_ttl giây.
+        
+        Args:
+            refresh: Bỏ qua snapshot đang cache, đọc lại từ database
+        
         Returns:
             Dict chứa các thống kê:
-            - total_users
+            - total_users, total_admins, total_teachers, total_students
             - total_classes
-            - total_sessions
+            - total_sessions: Số session bắt đầu trong tháng này
+            - attendance_today: Số lượt điểm danh trong hôm nay
             - recent_activity
         """
-        # Count users
-        all_users = self.user_repo.find_all()
-        total_users = len(all_users)
-        
-        # Count by role
-        admins = len([u for u in all_users if u.role == UserRole.ADMIN])
-        teachers = len([u for u in all_users if u.role == UserRole.TEACHER])
-        students = len([u for u in all_users if u.role == UserRole.STUDENT])
-        
-        # Count classes
-        all_classes = self.classroom_repo.find_all()
-        total_classes = len(all_classes)
+        if self._stats_cache is not None and not refresh:
+            cached = self._stats_cache.get("stats")
+            if cached is not MISSING:
+                return dict(cached)
+            generation = self._stats_cache.generation
         
-        # Count sessions (this month)
-        # TODO: Implement once AttendanceSessionRepository is available
-        total_sessions = 0
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        month_start = today.replace(day=1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1)
+        counts = self.stats_repo.get_system_counts(
+            month_start, month_end, today, today + timedelta(days=1)
+        )
         
-        return {
-            "total_users": total_users,
-            "total_admins": admins,
-            "total_teachers": teachers,
-            "total_students": students,
-            "total_classes": total_classes,
-            "total_sessions": total_sessions,
+        stats = {
+            "total_users": counts["admins"] + counts["teachers"] + counts["students"],
+            "total_admins": counts["admins"],
+            "total_teachers": counts["teachers"],
+            "total_students": counts["students"],
+            "total_classes": counts["classes"],
+            "total_sessions": counts["sessions"],
+            "attendance_today": counts["submissions"],
             "recent_activity": []  # TODO: Implement activity log
         }
+        if self._stats_cache is not None:
+            self._stats_cache.put("stats", stats, None if refresh else generation)
+        return dict(stats)
     
     # ==================== User Management ====================
     
@@ -166,8 +181,9 @@ class AdminService:
             password = self.security.generate_code(8)
             password_hash = self.security.hash_password(password)
             
-            # Create user object based on role
-            user_id = self._get_next_user_id()
+            # Create user object based on role: user_id do database cấp
+            # (AUTOINCREMENT), mã theo role bỏ trống được sinh từ user_id khi insert
+            user_id = 0
             
             if role == UserRole.ADMIN:
                 user = Admin(
@@ -177,7 +193,7 @@ class AdminService:
                     full_name=full_name,
                     role=role,
                     email=user_data.get("email"),
-                    admin_id=user_data.get("admin_id", f"AD{user_id:03d}")
+                    admin_id=user_data.get("admin_id") or ""
                 )
             elif role == UserRole.TEACHER:
                 user = Teacher(
@@ -187,7 +203,7 @@ class AdminService:
                     full_name=full_name,
                     role=role,
                     email=user_data.get("email"),
-                    teacher_code=user_data.get("teacher_code", f"GV{user_id:03d}")
+                    teacher_code=user_data.get("teacher_code") or ""
                 )
             elif role == UserRole.STUDENT:
                 user = Student(
@@ -197,7 +213,7 @@ class AdminService:
                     full_name=full_name,
                     role=role,
                     email=user_data.get("email"),
-                    student_code=user_data.get("student_code", f"SV{user_id:03d}")
+                    student_code=user_data.get("student_code") or ""
                 )
             else:
                 user = User(
@@ -211,6 +227,7 @@ class AdminService:
             
             # Save to database
             created_user = self.user_repo.create(user)
+            self._invalidate_stats()
             
             if created_user:
                 return True, "User created successfully", password
@@ -240,7 +257,7 @@ class AdminService:
             if not user:
                 return False, "User not found"
             
-            # Update fields
+            # Update fields (user là bản sao, cache chỉ đổi sau update())
             if "full_name" in user_data:
                 user.full_name = user_data["full_name"]
             
@@ -287,6 +304,7 @@ class AdminService:
                     return False, "Cannot delete the last admin user"
             
             success = self.user_repo.delete(user_id)
+            self._invalidate_stats()
             
             if success:
                 return True, "User deleted successfully"
@@ -315,17 +333,9 @@ class AdminService:
         Returns:
             List các class dicts
         """
-        classes = self.classroom_repo.find_all()
-        result = []
-        
-        for classroom in classes:
-            class_dict = classroom.to_dict()
-            # Add student codes
-            students = self.classroom_repo.get_students_in_class(classroom.class_id)
-            class_dict["student_codes"] = students
-            result.append(class_dict)
-        
-        return result
+        # Danh sách sinh viên của mọi lớp trong một query
+        classes = self.classroom_repo.hydrate_students(self.classroom_repo.find_all())
+        return [classroom.to_dict() for classroom in classes]
     
     def get_class(self, class_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -341,11 +351,7 @@ class AdminService:
         if not classroom:
             return None
         
-        class_dict = classroom.to_dict()
-        students = self.classroom_repo.get_students_in_class(class_id)
-        class_dict["student_codes"] = students
-        
-        return class_dict
+        return self.classroom_repo.hydrate_students([classroom])[0].to_dict()
     
     def create_class(self, class_data: Dict[str, Any]) -> Tuple[bool, str]:
         """
@@ -391,6 +397,7 @@ class AdminService:
             )
             
             created = self.classroom_repo.create(classroom)
+            self._invalidate_stats()
             
             if created:
                 return True, "Class created successfully"
@@ -420,7 +427,12 @@ class AdminService:
             if not classroom:
                 return False, "Class not found"
             
-            # Update fields
+            # Validate teacher trước khi sửa field nào
+            teacher_code = class_data.get("teacher_code")
+            if teacher_code and not self.user_repo.find_by_teacher_code(teacher_code):
+                return False, f"Teacher '{teacher_code}' not found"
+            
+            # Update fields (classroom là bản sao, cache chỉ đổi sau update())
             if "class_name" in class_data:
                 classroom.class_name = class_data["class_name"]
             
@@ -428,11 +440,6 @@ class AdminService:
                 classroom.subject_code = class_data["subject_code"]
             
             if "teacher_code" in class_data:
-                teacher_code = class_data["teacher_code"]
-                if teacher_code:
-                    teacher = self.user_repo.find_by_teacher_code(teacher_code)
-                    if not teacher:
-                        return False, f"Teacher '{teacher_code}' not found"
                 classroom.teacher_code = teacher_code
             
             # Save changes
@@ -468,6 +475,7 @@ class AdminService:
             # Note: The repository.delete() handles cascading delete for students
             
             success = self.classroom_repo.delete(class_id)
+            self._invalidate_stats()
             
             if success:
                 print(f"✅ Class deleted successfully: {class_id}")
@@ -538,9 +546,7 @@ class AdminService:
     
     # ==================== Helper Methods ====================
     
-    def _get_next_user_id(self) -> int:
-        """Generate next user ID."""
-        all_users = self.user_repo.find_all()
-        if not all_users:
-            return 1
-        return max(user.user_id for user in all_users) + 1
+    def _invalidate_stats(self) -> None:
+        """Bỏ snapshot dashboard sau khi admin thêm / xóa user hoặc class."""
+        if self._stats_cache is not None:
+            self._stats_cache.clear()
@@ -0,0 +1,173 @@
+"""
+Attendance Ingestion - Gom submit điểm danh thành batch
+=======================================================
+
+Lúc đầu giờ học hàng trăm sinh viên submit gần như cùng lúc; mỗi submit một
+transaction nghĩa là mỗi submit một lần fsync và tranh nhau write lock.
+AttendanceIngestionQueue đưa submit vào một queue giới hạn kích thước, một
+writer thread riêng gom chúng lại và ghi bằng INSERT nhiều dòng, một commit
+cho mỗi batch. Mỗi caller nhận một Future chứa (success, message) của riêng
+submission đó.
+
+Cách sử dụng:
+    with AttendanceIngestionQueue(student_service) as ingestion:
+        future = ingestion.submit("SV001", "SESSION123", "TOKEN456")
+        success, message = future.result()
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from config.database import INGEST_BATCH_SIZE, INGEST_MAX_LINGER_MS, INGEST_QUEUE_SIZE
+from core.models import AttendanceSubmission
+
+from .student_service import StudentService
+
+# Đánh dấu dừng writer thread (đặt vào queue bởi close())
+_STOP = object()
+
+
+class AttendanceIngestionQueue:
+    """
+    Queue ghi điểm danh theo batch (group commit) với một writer thread.
+
+    Writer lấy submission đầu tiên, gom thêm cho tới khi đủ batch_size hoặc
+    hết max_linger_ms kể từ submission đầu, rồi ghi cả batch bằng
+    StudentService.submit_attendance_many. Khi tải thấp batch chỉ có một
+    submission và độ trễ thêm tối đa là max_linger_ms.
+
+    Attributes:
+        batches: Số batch đã ghi
+        submissions: Số submission đã xử lý
+
+    Example:
+        >>> ingestion = AttendanceIngestionQueue(student_service, batch_size=100, max_linger_ms=5)
+        >>> ingestion.submit("SV001", "SESSION123", "TOKEN456").result()
+        (True, 'Điểm danh thành công!')
+        >>> ingestion.close()
+    """
+
+    def __init__(
+        self,
+        student_service: StudentService,
+        batch_size: int = INGEST_BATCH_SIZE,
+        max_linger_ms: float = INGEST_MAX_LINGER_MS,
+        max_pending: int = INGEST_QUEUE_SIZE
+    ):
+        """
+        Khởi tạo queue và start writer thread.
+
+        Args:
+            student_service: StudentService dùng để ghi batch
+            batch_size: Số submission tối đa mỗi batch
+            max_linger_ms: Thời gian tối đa (ms) chờ gom batch
+            max_pending: Số submission tối đa đang chờ trong queue
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        self.student_service = student_service
+        self.batch_size = batch_size
+        self.max_linger = max_linger_ms / 1000
+        self.batches = 0
+        self.submissions = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._run, name="attendance-ingestion", daemon=True)
+        self._writer.start()
+
+    def submit(
+        self,
+        student_code: str,
+        session_id: str,
+        verification_data: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> "Future[Tuple[bool, str]]":
+        """
+        Đưa một submit điểm danh vào queue.
+
+        Thời điểm điểm danh là lúc gọi submit (không phải lúc batch được ghi).
+
+        Args:
+            student_code: Mã sinh viên
+            session_id: ID của session điểm danh
+            verification_data: Token hoặc QR code data (tùy phương thức)
+            idempotency_key: Key retry của client
+            timeout: Số giây chờ khi queue đầy (None: không chờ)
+
+        Returns:
+            Future với kết quả (success, message) như submit_attendance; queue
+            đầy quá timeout -> (False, "Hệ thống đang bận, vui lòng thử lại")
+
+        Raises:
+            RuntimeError: Nếu queue đã đóng
+        """
+        future: "Future[Tuple[bool, str]]" = Future()
+        submission = AttendanceSubmission(student_code, session_id, verification_data, idempotency_key)
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("Attendance ingestion queue is closed")
+            try:
+                self._queue.put((submission, future), block=timeout is not None, timeout=timeout)
+            except queue.Full:
+                future.set_result((False, "Hệ thống đang bận, vui lòng thử lại"))
+        return future
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Ghi nốt các submission đang chờ rồi dừng writer thread.
+
+        Args:
+            timeout: Số giây chờ writer dừng (None: chờ tới khi xong)
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join(timeout)
+
+    def __enter__(self) -> "AttendanceIngestionQueue":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        """Vòng lặp của writer thread: gom batch -> ghi -> trả kết quả."""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_linger
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: List[Tuple[AttendanceSubmission, Future]]) -> None:
+        """Ghi một batch và đặt kết quả cho từng Future."""
+        futures = [future for _, future in batch]
+        try:
+            results = self.student_service.submit_attendance_many([submission for submission, _ in batch])
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+        else:
+            for future, result in zip(futures, results):
+                future.set_result(result)
+        self.batches += 1
+        self.submissions += len(batch)
@@ -6,14 +6,16 @@ Service quản lý phiên điểm danh cho giáo viên.
 """
 
 from datetime import datetime, timedelta
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Sequence, Tuple, Dict
 
 from core.enums import AttendanceMethod, AttendanceStatus
 from core.models import AttendanceSession
 from core.models.attendance_session import SessionStatus
 from data.repositories import AttendanceSessionRepository, AttendanceRecordRepository, ClassroomRepository
+from utils.id_generator import new_id
 from .security_service import SecurityService
 from .qr_service import QRService
+from .session_expiry_scheduler import SessionExpiryScheduler
 
 
 class AttendanceSessionService:
@@ -31,7 +33,8 @@ class AttendanceSessionService:
         record_repo: AttendanceRecordRepository,
         classroom_repo: ClassroomRepository,
         security_service: SecurityService,
-        qr_service: QRService
+        qr_service: QRService,
+        expiry_scheduler: Optional[SessionExpiryScheduler] = None
     ):
         """
         Khởi tạo AttendanceSessionService.
@@ -42,12 +45,15 @@ class AttendanceSessionService:
             classroom_repo: ClassroomRepository instance
             security_service: SecurityService instance
             qr_service: QRService instance
+            expiry_scheduler: SessionExpiryScheduler (optional) - được báo
+                end_time của session mới để đóng đúng lúc hết giờ
         """
         self.session_repo = session_repo
         self.record_repo = record_repo
         self.classroom_repo = classroom_repo
         self.security = security_service
         self.qr_service = qr_service
+        self.expiry_scheduler = expiry_scheduler
     
     def create_session(
         self,
@@ -90,7 +96,7 @@ class AttendanceSessionService:
             return False, "Thời gian kết thúc phải sau thời gian bắt đầu", None
         
         # Generate session ID
-        session_id = f"SS{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        session_id = new_id("SS")
         
         # Generate token/link if needed
         token = None
@@ -118,34 +124,40 @@ class AttendanceSessionService:
         created_session = self.session_repo.create(session)
         
         if created_session:
+            if self.expiry_scheduler is not None:
+                self.expiry_scheduler.schedule(created_session.end_time)
             return True, "Tạo phiên điểm danh thành công", created_session
         else:
             return False, "Không thể tạo phiên điểm danh", None
     
-    def get_sessions_by_teacher(self, teacher_code: str, limit: int = 50) -> List[AttendanceSession]:
+    def get_sessions_by_teacher(
+        self,
+        teacher_code: str,
+        limit: int = 50,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        status: Optional[SessionStatus] = None
+    ) -> List[AttendanceSession]:
         """
-        Lấy danh sách phiên điểm danh của giáo viên.
+        Lấy danh sách phiên điểm danh của giáo viên (mới nhất trước).
+        
+        Một query JOIN classes -> attendance_sessions với ORDER BY/LIMIT trong
+        SQL; chi phí không tăng theo tổng số session đã tạo (dashboard và trang
+        quản lý session gọi hàm này mỗi 30-60 giây).
         
         Args:
             teacher_code: Mã giáo viên
             limit: Số lượng session tối đa
+            start_date: Chỉ lấy session bắt đầu từ thời điểm này (optional)
+            end_date: Chỉ lấy session bắt đầu trước thời điểm này (optional)
+            status: Lọc theo trạng thái session (optional)
             
         Returns:
             List of AttendanceSession
         """
-        # Get teacher's classes
-        classes = self.classroom_repo.find_by_teacher(teacher_code)
-        class_ids = [c.class_id for c in classes]
-        
-        # Get all sessions for these classes
-        all_sessions = []
-        for class_id in class_ids:
-            sessions = self.session_repo.find_by_class(class_id)
-            all_sessions.extend(sessions)
-        
-        # Sort by start_time descending and limit
-        all_sessions.sort(key=lambda x: x.start_time, reverse=True)
-        return all_sessions[:limit]
+        return self.session_repo.find_by_teacher(
+            teacher_code, limit=limit, start=start_date, end=end_date, status=status
+        )
     
     def get_sessions_by_class(self, class_id: str) -> List[AttendanceSession]:
         """
@@ -212,19 +224,14 @@ class AttendanceSessionService:
         """
         Tự động đóng các session đã hết hạn.
         
+        Một câu UPDATE ... WHERE status = 'OPEN' AND end_time < now trên
+        partial index: chi phí theo số session hết hạn, không theo kích thước
+        bảng. Thường được gọi bởi SessionExpiryScheduler.
+        
         Returns:
             Số lượng session đã đóng
         """
-        # Get all open sessions
-        all_sessions = self.session_repo.find_all()
-        closed_count = 0
-        
-        for session in all_sessions:
-            if session.auto_close_if_expired():
-                self.session_repo.close_session(session.session_id)
-                closed_count += 1
-        
-        return closed_count
+        return len(self.session_repo.close_expired(datetime.now()))
     
     def get_session_report(self, session_id: str) -> Optional[Dict]:
         """
@@ -241,30 +248,49 @@ class AttendanceSessionService:
             >>> print(report['total_students'])
             >>> print(report['present_count'])
         """
-        session = self.session_repo.find_by_id(session_id)
-        
-        if not session:
-            return None
-        
-        # Get attendance stats
-        stats = self.record_repo.get_attendance_stats(session_id)
+        return self.get_session_reports([session_id]).get(session_id)
+    
+    def get_session_reports(self, session_ids: Sequence[str]) -> Dict[str, Dict]:
+        """
+        Lấy báo cáo điểm danh của nhiều session.
         
-        # Get all students in class
-        classroom = self.classroom_repo.find_by_id(session.class_id)
-        total_students = len(classroom.student_codes) if classroom else 0
+        Số query không phụ thuộc số session: một query GROUP BY session_id cho
+        số có mặt / vắng / sĩ số, một lần nạp sessions (qua entity cache).
         
-        return {
-            "session_id": session_id,
-            "class_id": session.class_id,
-            "start_time": session.start_time.isoformat(),
-            "end_time": session.end_time.isoformat(),
-            "method": session.method.value,
-            "status": session.status.value,
-            "total_students": total_students,
-            "present_count": stats.get("PRESENT", 0),
-            "absent_count": stats.get("ABSENT", 0),
-            "attendance_rate": (stats.get("PRESENT", 0) / total_students * 100) if total_students > 0 else 0
-        }
+        Args:
+            session_ids: Các mã phiên điểm danh
+            
+        Returns:
+            Dict session_id -> báo cáo (cùng format với get_session_report),
+            theo thứ tự session_ids; session không tồn tại bị bỏ qua
+            
+        Example:
+            >>> reports = service.get_session_reports([s.session_id for s in sessions])
+            >>> reports["SS001"]["attendance_rate"]
+        """
+        stats = self.record_repo.get_session_stats_many(session_ids)
+        sessions = self.session_repo.find_many_by_ids(list(stats))
+        
+        reports = {}
+        for session_id in session_ids:
+            session = sessions.get(session_id)
+            if session is None or session_id not in stats:
+                continue
+            present_count = stats[session_id]["PRESENT"]
+            total_students = stats[session_id]["enrolled"]
+            reports[session_id] = {
+                "session_id": session_id,
+                "class_id": session.class_id,
+                "start_time": session.start_time.isoformat(),
+                "end_time": session.end_time.isoformat(),
+                "method": session.method.value,
+                "status": session.status.value,
+                "total_students": total_students,
+                "present_count": present_count,
+                "absent_count": stats[session_id]["ABSENT"],
+                "attendance_rate": (present_count / total_students * 100) if total_students > 0 else 0
+            }
+        return reports
     
     def generate_qr_for_session(self, session_id: str) -> Tuple[Optional[any], str]:
         """
@@ -14,6 +14,8 @@ from typing import Optional
 
 import bcrypt
 
+from utils.id_generator import new_id
+
 
 class SecurityService:
     """
@@ -105,26 +107,20 @@ class SecurityService:
         Generate unique session ID.
         
         Returns:
-            Session ID string (format: SS + timestamp + random)
+            Session ID string (format: SS + ID tăng dần, xem utils.id_generator)
             
         Example:
             >>> session_id = security.generate_session_id()
             >>> session_id
-            'SS20240120143052ABC'
+            'SS01HQ3K5V8R0BPN4W2C0000000'
         """
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        random_part = "".join(secrets.choice(string.ascii_uppercase) for _ in range(3))
-        return f"SS{timestamp}{random_part}"
+        return new_id("SS")
     
     def generate_record_id(self) -> str:
         """
         Generate unique record ID.
         
         Returns:
-            Record ID string
+            Record ID string (format: REC + ID tăng dần, xem utils.id_generator)
         """
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        random_part = "".join(secrets.choice(string.ascii_uppercase) for _ in range(3))
-        return f"REC{timestamp}{random_part}"
+        return new_id("REC")
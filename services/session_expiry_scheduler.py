@@ -0,0 +1,146 @@
+"""
+Session Expiry Scheduler - Tự động đóng session hết hạn
+=======================================================
+
+Thread nền đóng các phiên điểm danh đang mở ngay khi hết giờ. Thay vì poll
+định kỳ, scheduler giữ một timer heap các end_time đã biết và ngủ tới
+end_time sớm nhất:
+
+- khi khởi động: end_time sớm nhất của session đang mở (AttendanceSessionRepository.next_expiry)
+- khi tạo session mới: schedule(end_time) đẩy vào heap và đánh thức thread
+- sau mỗi lần đóng: đẩy next_expiry() mới vào heap
+
+Mỗi lần thức dậy chạy một câu UPDATE (close_expired) trên partial index
+(end_time) WHERE status = 'OPEN', nên chi phí theo số session hết hạn.
+
+Cách sử dụng:
+    scheduler = SessionExpiryScheduler(session_repo)
+    scheduler.start()
+    ...
+    scheduler.schedule(session.end_time)   # sau khi tạo session
+    ...
+    scheduler.stop()
+"""
+
+import heapq
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from data.repositories import AttendanceSessionRepository
+
+
+class SessionExpiryScheduler:
+    """
+    Đóng session hết hạn đúng lúc bằng timer heap + một thread nền.
+
+    Attributes:
+        runs: Số lần đã chạy close_expired
+        closed: Tổng số session đã đóng
+
+    Example:
+        >>> scheduler = SessionExpiryScheduler(session_repo)
+        >>> scheduler.start()
+        >>> scheduler.schedule(datetime.now() + timedelta(minutes=15))
+        >>> scheduler.stop()
+    """
+
+    # Lỗi khi đóng (VD: database đang bận): thử lại sau khoảng này
+    RETRY_DELAY = timedelta(seconds=30)
+
+    def __init__(
+        self,
+        session_repo: AttendanceSessionRepository,
+        on_closed: Optional[Callable[[List[str]], None]] = None,
+        clock: Callable[[], datetime] = datetime.now
+    ):
+        """
+        Khởi tạo scheduler (chưa start thread).
+
+        Args:
+            session_repo: AttendanceSessionRepository
+            on_closed: Callback nhận danh sách session_id vừa được đóng (optional)
+            clock: Hàm lấy thời điểm hiện tại (thay được trong test)
+        """
+        self.session_repo = session_repo
+        self.on_closed = on_closed
+        self.clock = clock
+        self.runs = 0
+        self.closed = 0
+        self._heap: List[datetime] = []
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SessionExpiryScheduler":
+        """Nạp end_time sớm nhất từ database rồi start thread nền."""
+        if self._thread is not None:
+            return self
+        self._stopped = False
+        self.schedule(self.session_repo.next_expiry())
+        self._thread = threading.Thread(target=self._run, name="session-expiry", daemon=True)
+        self._thread.start()
+        return self
+
+    def schedule(self, end_time: Optional[datetime]) -> None:
+        """
+        Báo scheduler một end_time mới (VD: vừa tạo / gia hạn session).
+
+        Args:
+            end_time: Thời điểm session hết hạn (None: bỏ qua)
+        """
+        if end_time is None:
+            return
+        with self._condition:
+            heapq.heappush(self._heap, end_time)
+            # Chỉ cần đánh thức khi end_time mới sớm hơn mốc thread đang chờ
+            if self._heap[0] == end_time:
+                self._condition.notify()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Dừng thread nền."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_due(self) -> List[str]:
+        """
+        Đóng mọi session đã hết hạn tới thời điểm hiện tại, lên lịch mốc kế tiếp.
+
+        Returns:
+            session_id của các session vừa được đóng
+        """
+        closed = self.session_repo.close_expired(self.clock())
+        self.runs += 1
+        self.closed += len(closed)
+        self.schedule(self.session_repo.next_expiry())
+        if closed and self.on_closed is not None:
+            self.on_closed(closed)
+        return closed
+
+    def _run(self) -> None:
+        """Vòng lặp thread nền: ngủ tới end_time sớm nhất rồi run_due()."""
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    delay = (self._heap[0] - self.clock()).total_seconds()
+                    if delay < 0:
+                        break
+                    self._condition.wait(delay)
+                if self._stopped:
+                    return
+                # Bỏ mọi mốc đã tới (close_expired xử lý tất cả trong một câu UPDATE)
+                now = self.clock()
+                while self._heap and self._heap[0] < now:
+                    heapq.heappop(self._heap)
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"❌ Error closing expired sessions: {e}")
+                self.schedule(self.clock() + self.RETRY_DELAY)
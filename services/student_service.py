@@ -5,21 +5,26 @@ Student Service - Student Business Logic
 Service xử lý các nghiệp vụ liên quan đến sinh viên:
 - View dashboard statistics
 - Submit attendance
-- View attendance history
+- View / export attendance history
 - Edit profile
 """
 
-from typing import List, Dict, Any, Optional, Tuple
+import csv
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 
-from core.models import Student, AttendanceRecord, AttendanceSession
+from core.models import (
+    Student, AttendanceRecord, AttendanceSession, AttendanceHistoryRow, AttendanceSubmission
+)
 from core.enums import AttendanceStatus, AttendanceMethod
 from core.exceptions import ValidationError, NotFoundError
+from utils.id_generator import new_id
 from data.repositories import (
     UserRepository, 
     AttendanceRecordRepository,
     AttendanceSessionRepository,
-    ClassRepository
+    ClassRepository,
+    Page
 )
 
 
@@ -73,30 +78,28 @@ class StudentService:
             >>> stats = service.get_dashboard_stats("SV001")
             >>> print(f"Tỷ lệ điểm danh: {stats['attendance_rate']}%")
         """
-        # Lấy tất cả attendance records của sinh viên
-        records = self.attendance_record_repo.find_by_student(student_code)
-        
-        total_sessions = len(records)
-        present_count = sum(1 for r in records if r.status == AttendanceStatus.PRESENT)
+        # Số đếm đọc từ bảng tổng hợp, 5 bản ghi gần nhất bằng một query JOIN
+        # (chi phí không tăng theo số records của sinh viên)
+        summary = self.attendance_record_repo.get_student_summary(student_code)
+        total_sessions = summary["total"]
+        present_count = summary["present"]
         absent_count = total_sessions - present_count
         
         # Tính tỷ lệ điểm danh
         attendance_rate = (present_count / total_sessions * 100) if total_sessions > 0 else 0
         
-        # Lấy 5 bản ghi gần nhất
-        # Sort by attendance_time (handle None values by treating them as oldest)
-        recent_records = sorted(
-            records, 
-            key=lambda r: r.attendance_time if r.attendance_time else datetime.min, 
-            reverse=True
-        )[:5]
+        # Lấy 5 bản ghi gần nhất (chưa điểm danh - attendance_time NULL - xếp cuối)
+        recent_attendance = [
+            self._format_history_row(row)
+            for row in self.attendance_record_repo.find_history_rows(student_code, limit=5)
+        ]
         
         return {
             "attendance_rate": round(attendance_rate, 2),
             "total_sessions": total_sessions,
             "present_count": present_count,
             "absent_count": absent_count,
-            "recent_attendance": [self._format_attendance_record(r) for r in recent_records]
+            "recent_attendance": recent_attendance
         }
     
     def get_class_schedule(self, student_code: str) -> List[Dict[str, Any]]:
@@ -128,52 +131,37 @@ class StudentService:
             student_code: Mã sinh viên
             
         Returns:
-            List các session trong ngày
+            List các session trong ngày, sắp theo giờ bắt đầu
         """
         try:
-            # Get classes for student
-            classes = self.class_repo.get_classes_for_student(student_code)
+            # Chỉ sessions bắt đầu trong hôm nay, đã sắp theo giờ (một query theo index)
+            today = datetime.combine(datetime.now().date(), datetime.min.time())
+            sessions = self.attendance_session_repo.find_by_student_between(
+                student_code, today, today + timedelta(days=1)
+            )
+            classes = self.class_repo.find_many_by_ids(session.class_id for session in sessions)
             
-            today = datetime.now().date()
             sessions_today = []
-            
-            for cls in classes:
-                # Find active sessions for this class
-                # Note: This finds all sessions, we filter for today
-                all_sessions = self.attendance_session_repo.find_by_class(cls.class_id)
+            for session in sessions:
+                cls = classes.get(session.class_id)
+                method_val = session.method.value
+                # Determine room based on method
+                room = "Online" if method_val == "LINK_TOKEN" else "TBA"
                 
-                for session in all_sessions:
-                    # Ensure start_time is a datetime object
-                    session_start_time = session.start_time
-                    if isinstance(session_start_time, str):
-                        session_start_time = datetime.fromisoformat(session_start_time)
-                    
-                    session_end_time = session.end_time
-                    if isinstance(session_end_time, str):
-                        session_end_time = datetime.fromisoformat(session_end_time)
-                    
-                    # Check if session is today
-                    if session_start_time.date() == today:
-                        # Determine room based on method
-                        method_val = session.method.value if hasattr(session.method, 'value') else str(session.method)
-                        room = "Online" if method_val == "LINK_TOKEN" else "TBA"
-                        
-                        sessions_today.append({
-                            "session_id": session.session_id,
-                            "class_id": cls.class_id,
-                            "class_name": cls.class_name,
-                            "subject_code": cls.subject_code,
-                            "start_time": session_start_time.strftime("%H:%M"),
-                            "end_time": session_end_time.strftime("%H:%M"),
-                            "raw_start_time": session_start_time, # For sorting
-                            "room": room,
-                            "status": session.status.value if hasattr(session.status, 'value') else str(session.status),
-                            "method": method_val,
-                            "is_active": (session.status.value if hasattr(session.status, 'value') else str(session.status)) == "OPEN"
-                        })
+                sessions_today.append({
+                    "session_id": session.session_id,
+                    "class_id": session.class_id,
+                    "class_name": cls.class_name if cls else None,
+                    "subject_code": cls.subject_code if cls else None,
+                    "start_time": session.start_time.strftime("%H:%M"),
+                    "end_time": session.end_time.strftime("%H:%M"),
+                    "raw_start_time": session.start_time,
+                    "room": room,
+                    "status": session.status.value,
+                    "method": method_val,
+                    "is_active": session.status.value == "OPEN"
+                })
             
-            # Sort by start time
-            sessions_today.sort(key=lambda x: x["raw_start_time"])
             return sessions_today
         except Exception as e:
             print(f"❌ Error in get_todays_sessions: {e}")
@@ -185,98 +173,136 @@ class StudentService:
         self, 
         student_code: str, 
         session_id: str,
-        verification_data: Optional[str] = None
+        verification_data: Optional[str] = None,
+        idempotency_key: Optional[str] = None
     ) -> Tuple[bool, str]:
         """
         Submit điểm danh cho một phiên.
         
+        Trường hợp thành công chỉ chạy một câu lệnh: INSERT có điều kiện
+        (session mở, trong giờ, verification hợp lệ) + ON CONFLICT DO NOTHING
+        trên UNIQUE(session_id, student_code), nên hai submit song song không
+        thể cùng ghi. Lý do thất bại chỉ được tra khi không ghi được.
+        
         Args:
             student_code: Mã sinh viên
             session_id: ID của session điểm danh
             verification_data: Token hoặc QR code data (tùy phương thức)
+            idempotency_key: Key do client tạo cho một lần submit; gửi lại
+                cùng key (retry) nhận lại kết quả thành công
             
         Returns:
             Tuple (success, message)
             
         Raises:
             NotFoundError: Nếu session không tồn tại
-            ValidationError: Nếu không trong thời gian cho phép
             
         Example:
             >>> success, msg = service.submit_attendance("SV001", "SESSION123", "TOKEN456")
             >>> if success:
             ...     print("Điểm danh thành công!")
         """
-        print(f"📝 Submit attendance: student={student_code}, session={session_id}")
+        current_time = datetime.now()
+        try:
+            if self.attendance_record_repo.submit_present(
+                self._generate_record_id(), session_id, student_code, current_time,
+                verification_data, idempotency_key
+            ):
+                return True, "Điểm danh thành công!"
+        except Exception as e:
+            print(f"❌ Error saving attendance: {str(e)}")
+            return False, f"Lỗi khi lưu điểm danh: {str(e)}"
+        
+        return self._submit_rejection(student_code, session_id, verification_data, idempotency_key, current_time)
+    
+    def submit_attendance_many(
+        self,
+        submissions: Sequence[AttendanceSubmission]
+    ) -> List[Tuple[bool, str]]:
+        """
+        Submit điểm danh cho nhiều sinh viên trong một transaction (một commit).
+        
+        Dùng bởi AttendanceIngestionQueue: cùng điều kiện và cùng message như
+        submit_attendance, mỗi submission lấy submitted_at làm thời điểm điểm danh.
+        Trùng (session_id, student_code) trong cùng batch: submission đến trước
+        được ghi, các submission sau nhận "đã điểm danh".
+        
+        Args:
+            submissions: Các submission theo thứ tự đến
+            
+        Returns:
+            List (success, message) theo đúng thứ tự submissions. Session không
+            tồn tại trả về (False, message) thay vì raise NotFoundError để không
+            làm hỏng kết quả của các submission khác trong batch.
+            
+        Example:
+            >>> results = service.submit_attendance_many([
+            ...     AttendanceSubmission("SV001", "SESSION123", "TOKEN456"),
+            ...     AttendanceSubmission("SV002", "SESSION123", "TOKEN456"),
+            ... ])
+        """
+        rows = [
+            (self._generate_record_id(), s.session_id, s.student_code, s.submitted_at,
+             s.verification_data, s.idempotency_key)
+            for s in submissions
+        ]
+        try:
+            written = self.attendance_record_repo.submit_present_many(rows)
+        except Exception as e:
+            print(f"❌ Error saving attendance batch: {str(e)}")
+            return [(False, f"Lỗi khi lưu điểm danh: {str(e)}")] * len(submissions)
+        
+        results = []
+        for row, s in zip(rows, submissions):
+            if row[0] in written:
+                results.append((True, "Điểm danh thành công!"))
+                continue
+            try:
+                results.append(self._submit_rejection(
+                    s.student_code, s.session_id, s.verification_data, s.idempotency_key, s.submitted_at
+                ))
+            except NotFoundError as e:
+                results.append((False, str(e)))
+        return results
+    
+    def _submit_rejection(
+        self,
+        student_code: str,
+        session_id: str,
+        verification_data: Optional[str],
+        idempotency_key: Optional[str],
+        current_time: datetime
+    ) -> Tuple[bool, str]:
+        """Lý do submit không được ghi (cùng thứ tự kiểm tra như trước khi gộp thành một câu lệnh)."""
+        submission = self.attendance_record_repo.find_submission(session_id, student_code)
+        if submission is not None and idempotency_key is not None and submission[1] == idempotency_key:
+            # Client retry một lần submit đã được ghi
+            return True, "Điểm danh thành công!"
         
-        # Kiểm tra session có tồn tại không
         session = self.attendance_session_repo.find_by_id(session_id)
         if not session:
             raise NotFoundError(f"Phiên điểm danh {session_id} không tồn tại")
         
-        # Kiểm tra session có đang mở không
-        if not (hasattr(session, 'status') and 
-                (session.status == "OPEN" or 
-                 (hasattr(session.status, 'value') and session.status.value == "OPEN"))):
+        if session.status.value != "OPEN":
             return False, "Phiên điểm danh đã đóng"
         
-        # Kiểm tra thời gian
-        current_time = datetime.now()
         if current_time < session.start_time:
             return False, "Phiên điểm danh chưa bắt đầu"
         
         if current_time > session.end_time:
             return False, "Phiên điểm danh đã kết thúc"
         
-        # Kiểm tra đã điểm danh chưa
-        existing_record = self.attendance_record_repo.find_by_session_and_student(
-            session_id, student_code
-        )
-        if existing_record:
+        if submission is not None:
             return False, "Bạn đã điểm danh cho phiên này rồi"
         
-        # Verify theo phương thức
-        session_method = session.method if hasattr(session, 'method') else session.attendance_method
-        if session_method == AttendanceMethod.LINK_TOKEN:
+        if session.method == AttendanceMethod.LINK_TOKEN:
             if not verification_data or verification_data != session.token:
                 return False, "Token không hợp lệ"
-        elif session_method == AttendanceMethod.QR:
-            # QR code verification (sẽ được xử lý bởi QR service)
+        elif session.method == AttendanceMethod.QR:
             if not verification_data:
                 return False, "Vui lòng quét mã QR"
         
-        # Tạo attendance record
-        record = AttendanceRecord(
-            record_id=self._generate_record_id(),
-            session_id=session_id,
-            student_code=student_code,
-            attendance_time=current_time,
-            status=AttendanceStatus.PRESENT,
-            remark=""
-        )
-        
-        # Lưu vào database
-        try:
-            print(f"💾 Creating attendance record: {record.record_id}")
-            created_record = self.attendance_record_repo.create(record)
-            print(f"✅ Record created: {created_record}")
-            
-            # Verify record was actually saved by querying it back
-            verify_record = self.attendance_record_repo.find_by_session_and_student(
-                session_id, student_code
-            )
-            
-            if verify_record:
-                print(f"✅ Record verified in database: {verify_record.record_id}")
-                return True, "Điểm danh thành công!"
-            else:
-                print(f"❌ Record NOT found in database after create!")
-                return False, "Không thể xác nhận lưu điểm danh, vui lòng thử lại"
-        except Exception as e:
-            print(f"❌ Error saving attendance: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return False, f"Lỗi khi lưu điểm danh: {str(e)}"
+        return False, "Không thể ghi điểm danh, vui lòng thử lại"
     
     def get_attendance_history(
         self,
@@ -287,10 +313,16 @@ class StudentService:
         class_id: Optional[str] = None,
         status: Optional[str] = None,
         sort_by: str = 'date',
-        sort_order: str = 'desc'
-    ) -> List[Dict[str, Any]]:
+        sort_order: str = 'desc',
+        cursor: Optional[Tuple] = None,
+        limit: int = 50,
+        include_total: bool = True
+    ) -> Page[Dict[str, Any]]:
         """
-        Lấy lịch sử điểm danh của sinh viên.
+        Lấy một trang lịch sử điểm danh của sinh viên.
+        
+        Lọc, sắp xếp và phân trang đều chạy trong SQL (keyset pagination),
+        chỉ các dòng của trang được đọc và format.
         
         Args:
             student_code: Mã sinh viên
@@ -301,66 +333,75 @@ class StudentService:
             status: Lọc theo trạng thái (optional)
             sort_by: Sắp xếp theo 'date' hoặc 'class_name' (default: 'date')
             sort_order: 'asc' hoặc 'desc' (default: 'desc')
+            cursor: page.next_key của trang trước (None: trang đầu)
+            limit: Số bản ghi mỗi trang
+            include_total: Đếm tổng số bản ghi khớp bộ lọc (page.total)
             
         Returns:
-            List các bản ghi điểm danh
+            Page các bản ghi điểm danh (next_key là cursor trang kế tiếp)
             
         Example:
-            >>> history = service.get_attendance_history("SV001")
-            >>> for record in history:
+            >>> page = service.get_attendance_history("SV001", limit=10)
+            >>> for record in page.items:
             ...     print(f"{record['date']}: {record['status']}")
+            >>> if page.has_more:
+            ...     page = service.get_attendance_history("SV001", cursor=page.next_key, limit=10)
         """
-        # Lấy tất cả records
-        records = self.attendance_record_repo.find_by_student(student_code)
-        
-        # Filter theo date range
-        if start_date:
-            records = [r for r in records if r.attendance_time >= start_date]
-        if end_date:
-            records = [r for r in records if r.attendance_time <= end_date]
-        
-        # Filter theo class_id
-        if class_id:
-            # Lấy sessions của class đó
-            class_sessions = self.attendance_session_repo.find_by_class(class_id)
-            session_ids = {s.session_id for s in class_sessions}
-            records = [r for r in records if r.session_id in session_ids]
-        
-        # Filter theo status
-        if status:
-            records = [r for r in records if r.status.value == status]
-        
-        # Helper function to get class name safely for filtering
-        def get_class_name_safe(record):
-            session = self.attendance_session_repo.find_by_id(record.session_id)
-            if not session: return ""
-            cls = self.class_repo.find_by_id(session.class_id)
-            return cls.class_name if cls else ""
-
-        # Filter theo search query (Class Name or Date)
-        if search_query:
-            query = search_query.lower()
-            filtered_records = []
-            for r in records:
-                class_name = get_class_name_safe(r).lower()
-                date_str = r.attendance_time.strftime("%d %b %Y").lower()
-                date_str_iso = r.attendance_time.strftime("%Y-%m-%d").lower()
-                
-                if query in class_name or query in date_str or query in date_str_iso:
-                    filtered_records.append(r)
-            records = filtered_records
-
-        # Format và sort
-        formatted_records = [self._format_attendance_record(r) for r in records]
+        filters = dict(
+            start_date=start_date,
+            end_date=end_date,
+            class_id=class_id,
+            status=status,
+            search=search_query or None
+        )
+        page = self.attendance_record_repo.page_history_rows(
+            student_code,
+            sort_by='class_name' if sort_by == 'class_name' else 'date',
+            descending=(sort_order.lower() == 'desc'),
+            after_key=cursor,
+            limit=limit,
+            **filters
+        )
+        total = self.attendance_record_repo.count_history_rows(student_code, **filters) if include_total else None
+        
+        return Page(
+            items=[self._format_history_row(r) for r in page.items],
+            next_key=page.next_key,
+            total=total
+        )
+    
+    def export_attendance_history(self, student_code: str, filename: str) -> int:
+        """
+        Export toàn bộ lịch sử điểm danh của sinh viên ra CSV.
         
-        # Sort
-        reverse = (sort_order.lower() == 'desc')
-        if sort_by == 'class_name':
-            formatted_records.sort(key=lambda x: (x['class_name'] or "").lower(), reverse=reverse)
-        else: # date
-            formatted_records.sort(key=lambda x: x['date'] + x['time'], reverse=reverse)
+        Đọc read model theo từng chunk và ghi thẳng ra file, không giữ toàn
+        bộ lịch sử trong bộ nhớ.
         
-        return formatted_records
+        Args:
+            student_code: Mã sinh viên
+            filename: File CSV đích
+            
+        Returns:
+            Số dòng đã ghi
+        """
+        def fmt(value: Optional[datetime]) -> str:
+            return value.strftime("%Y-%m-%d %H:%M:%S") if value else ""
+        
+        count = 0
+        with open(filename, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow([
+                "Record ID", "Class ID", "Class Name", "Session Start", "Session End",
+                "Attendance Time", "Status", "Remark"
+            ])
+            for row in self.attendance_record_repo.iter_history_rows(student_code):
+                writer.writerow([
+                    row.record_id, row.class_id or "", row.class_name or "",
+                    fmt(row.session_start), fmt(row.session_end), fmt(row.attendance_time),
+                    row.status.value, row.remark or ""
+                ])
+                count += 1
+        return count
     
     def update_profile(
         self,
@@ -431,19 +472,12 @@ class StudentService:
     
     # Helper methods
     
-    def _format_attendance_record(self, record: AttendanceRecord) -> Dict[str, Any]:
-        """Format attendance record thành dictionary."""
-        # Lấy session info
-        session = self.attendance_session_repo.find_by_id(record.session_id)
-        
+    def _format_history_row(self, row: AttendanceHistoryRow) -> Dict[str, Any]:
+        """Format một dòng lịch sử (đã join session + class) thành dictionary."""
         # Ensure attendance_time is properly formatted
-        if record.attendance_time:
-            if isinstance(record.attendance_time, str):
-                att_time = datetime.fromisoformat(record.attendance_time)
-            else:
-                att_time = record.attendance_time
-            date_str = att_time.strftime("%Y-%m-%d")
-            time_str = att_time.strftime("%H:%M:%S")
+        if row.attendance_time:
+            date_str = row.attendance_time.strftime("%Y-%m-%d")
+            time_str = row.attendance_time.strftime("%H:%M:%S")
         else:
             # For absent records, use current date
             now = datetime.now()
@@ -451,22 +485,16 @@ class StudentService:
             time_str = now.strftime("%H:%M:%S")
         
         return {
-            "record_id": record.record_id,
-            "session_id": record.session_id,
-            "class_id": session.class_id if session else None,
-            "class_name": self._get_class_name(session.class_id) if session else None,
+            "record_id": row.record_id,
+            "session_id": row.session_id,
+            "class_id": row.class_id,
+            "class_name": row.class_name,
             "date": date_str,
             "time": time_str,
-            "status": record.status.value if hasattr(record.status, 'value') else str(record.status),
-            "remark": record.remark or ""
+            "status": row.status.value,
+            "remark": row.remark or ""
         }
     
-    def _get_class_name(self, class_id: str) -> Optional[str]:
-        """Lấy tên lớp từ class_id."""
-        cls = self.class_repo.find_by_id(class_id)
-        return cls.class_name if cls else None
-    
     def _generate_record_id(self) -> str:
-        """Generate record ID."""
-        # Simple implementation: timestamp-based
-        return f"REC{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        """Generate record ID (tăng dần, không trùng giữa các thread/process)."""
+        return new_id("REC")
@@ -26,25 +26,23 @@ class TestAdminService(unittest.TestCase):
         self.classroom_repo = Mock()
         self.attendance_repo = Mock()
         self.security = Mock()
+        self.stats_repo = Mock()
         
         self.service = AdminService(
             self.user_repo,
             self.classroom_repo,
             self.attendance_repo,
-            self.security
+            self.security,
+            self.stats_repo
         )
     
     def test_get_dashboard_stats(self):
         """Test get dashboard statistics."""
-        # Setup mock data
-        admin_user = Admin(1, "admin", "hash", "Admin User", UserRole.ADMIN)
-        teacher_user = Teacher(2, "teacher", "hash", "Teacher User", UserRole.TEACHER, teacher_code="GV001")
-        student_user = Student(3, "student", "hash", "Student User", UserRole.STUDENT, student_code="SV001")
-        
-        self.user_repo.find_all.return_value = [admin_user, teacher_user, student_user]
-        
-        classroom = Classroom("CS101", "Intro to CS", "CS101", "GV001")
-        self.classroom_repo.find_all.return_value = [classroom]
+        # Setup mock data (một query aggregate, không nạp entity)
+        self.stats_repo.get_system_counts.return_value = {
+            "admins": 1, "teachers": 1, "students": 1,
+            "classes": 1, "sessions": 4, "submissions": 2
+        }
         
         # Execute
         stats = self.service.get_dashboard_stats()
@@ -55,6 +53,41 @@ class TestAdminService(unittest.TestCase):
         self.assertEqual(stats["total_teachers"], 1)
         self.assertEqual(stats["total_students"], 1)
         self.assertEqual(stats["total_classes"], 1)
+        self.assertEqual(stats["total_sessions"], 4)
+        self.assertEqual(stats["attendance_today"], 2)
+        self.user_repo.find_all.assert_not_called()
+        self.classroom_repo.find_all.assert_not_called()
+        
+        month_start, month_end, day_start, day_end = self.stats_repo.get_system_counts.call_args[0]
+        self.assertEqual(month_start.day, 1)
+        self.assertEqual(month_end.day, 1)
+        self.assertLessEqual(month_start, day_start)
+        self.assertLessEqual(day_end, month_end)
+    
+    def test_get_dashboard_stats_snapshot(self):
+        """Snapshot được dùng lại trong TTL, bị bỏ khi refresh hoặc khi tạo user."""
+        self.stats_repo.get_system_counts.return_value = {
+            "admins": 1, "teachers": 0, "students": 0,
+            "classes": 0, "sessions": 0, "submissions": 0
+        }
+        
+        first = self.service.get_dashboard_stats()
+        first["total_users"] = 99
+        self.assertEqual(self.service.get_dashboard_stats()["total_users"], 1)
+        self.assertEqual(self.stats_repo.get_system_counts.call_count, 1)
+        
+        self.service.get_dashboard_stats(refresh=True)
+        self.assertEqual(self.stats_repo.get_system_counts.call_count, 2)
+        
+        self.service._invalidate_stats()
+        self.service.get_dashboard_stats()
+        self.assertEqual(self.stats_repo.get_system_counts.call_count, 3)
+        
+        uncached = AdminService(self.user_repo, self.classroom_repo, self.attendance_repo, self.security,
+                                self.stats_repo, stats_cache_ttl=0)
+        uncached.get_dashboard_stats()
+        uncached.get_dashboard_stats()
+        self.assertEqual(self.stats_repo.get_system_counts.call_count, 5)
     
     def test_get_all_users(self):
         """Test get all users."""
@@ -106,6 +139,11 @@ class TestAdminService(unittest.TestCase):
         self.assertTrue(success, f"Expected success=True, but got: {message}")
         self.assertEqual(password, "testpass")
         self.user_repo.create.assert_called_once()
+        
+        # ID và mã sinh viên do repository cấp khi insert, không quét toàn bộ users
+        self.user_repo.find_all.assert_not_called()
+        new_user = self.user_repo.create.call_args[0][0]
+        self.assertEqual((new_user.user_id, new_user.student_code), (0, ""))
     
     def test_create_user_duplicate_username(self):
         """Test create user with duplicate username."""
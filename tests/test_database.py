@@ -0,0 +1,1452 @@
+"""
+Database Tests
+==============
+
+Unit tests cho data layer:
+- Database connection pool
+- Performance profiles
+- Transaction / unit of work
+- Repository bulk operations
+- Streaming iteration / keyset pagination
+- Compiled row mappers
+- Slotted models / AttendanceRecordBatch
+- Entity cache (LRU + TTL, invalidation)
+- find_many_by_ids
+- Query instrumentation
+- Workload indexes (migrations)
+- Migration runner
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import PropertyMock, patch
+
+from core.enums import AttendanceMethod, AttendanceStatus, UserRole
+from core.exceptions import NotFoundError
+from core.models import (
+    Admin, AttendanceRecord, AttendanceRecordBatch, AttendanceSession, AttendanceSubmission, Classroom, Student,
+    Teacher
+)
+from core.models.attendance_session import SessionStatus
+from data.cache import MISSING, EntityCache
+from data.database import Database, casefold
+from data.instrumentation import QueryProfiler, normalize_sql
+from data.migrations.init_db import init_database
+from data.migrations.runner import MigrationError, MigrationRunner, split_statements
+from data.repositories import (
+    AttendanceRecordRepository,
+    AttendanceSessionRepository,
+    ClassroomRepository,
+    StatsRepository,
+    UserRepository,
+)
+from services.admin_service import AdminService
+from services.attendance_ingestion import AttendanceIngestionQueue
+from services.attendance_session_service import AttendanceSessionService
+from services.qr_service import QRService
+from services.security_service import SecurityService
+from services.session_expiry_scheduler import SessionExpiryScheduler
+from services.student_service import StudentService
+from utils.id_generator import IdGenerator
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Base class: tạo database tạm với schema đầy đủ cho mỗi test."""
+
+    def setUp(self):
+        """Setup test fixtures."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "test.db")
+        init_database(db_path=self.db_path)
+        self.db = Database(self.db_path)
+
+    def tearDown(self):
+        """Cleanup database tạm."""
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def add_class(self, class_id: str) -> None:
+        """Thêm một lớp học đơn giản."""
+        self.db.execute(
+            "INSERT INTO classes (class_id, class_name, subject_code) VALUES (?, ?, ?)",
+            (class_id, f"Class {class_id}", "SUB")
+        )
+
+    def count_classes(self) -> int:
+        """Đếm số lớp học trong database."""
+        return self.db.fetch_one("SELECT COUNT(*) AS count FROM classes")["count"]
+
+
+class TestConnectionPool(DatabaseTestCase):
+    """Test cases cho connection pool."""
+
+    def test_wal_journal_mode(self):
+        """Connection được mở ở chế độ WAL."""
+        row = self.db.fetch_one("PRAGMA journal_mode")
+        self.assertEqual(row[0].lower(), "wal")
+
+    def test_connection_per_thread(self):
+        """Mỗi thread có connection riêng."""
+        main_conn = self.db.connection
+        other = []
+
+        thread = threading.Thread(target=lambda: other.append(self.db.connection))
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(main_conn, other[0])
+        self.assertIs(main_conn, self.db.connection)
+
+    def test_writes_visible_across_threads(self):
+        """Dữ liệu ghi ở thread khác đọc được ở main thread."""
+        thread = threading.Thread(target=self.add_class, args=("C1",))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(self.count_classes(), 1)
+
+
+class TestPerformanceProfile(DatabaseTestCase):
+    """Test cases cho performance profile."""
+
+    def test_profile_applied_to_every_connection(self):
+        """PRAGMA của profile được áp dụng cho connection của mọi thread."""
+        db = Database(self.db_path, profile="durable")
+        other = []
+
+        thread = threading.Thread(target=lambda: other.append(db.active_pragmas()))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(db.active_pragmas()["synchronous"], "FULL")
+        self.assertEqual(other[0]["synchronous"], "FULL")
+        db.close()
+
+    def test_invalid_profile(self):
+        """Profile không tồn tại báo lỗi."""
+        with self.assertRaises(ValueError):
+            Database(self.db_path, profile="turbo")
+
+
+class TestTransaction(DatabaseTestCase):
+    """Test cases cho transaction / unit of work."""
+
+    def test_commit_once_at_end_of_scope(self):
+        """Bên trong scope, dữ liệu chưa được commit cho connection khác."""
+        seen_inside = []
+
+        with self.db.transaction():
+            self.add_class("C1")
+            self.add_class("C2")
+            self.assertTrue(self.db.in_transaction)
+
+            thread = threading.Thread(target=lambda: seen_inside.append(self.count_classes()))
+            thread.start()
+            thread.join()
+
+        self.assertEqual(seen_inside, [0])
+        self.assertFalse(self.db.in_transaction)
+        self.assertEqual(self.count_classes(), 2)
+
+    def test_rollback_on_error(self):
+        """Lỗi trong scope rollback toàn bộ."""
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.add_class("C1")
+                raise RuntimeError("boom")
+
+        self.assertEqual(self.count_classes(), 0)
+
+    def test_nested_scope_uses_savepoint(self):
+        """Lỗi trong scope con chỉ rollback phần việc của scope con."""
+        with self.db.transaction():
+            self.add_class("C1")
+            try:
+                with self.db.transaction():
+                    self.add_class("C2")
+                    raise RuntimeError("boom")
+            except RuntimeError:
+                pass
+            self.add_class("C3")
+
+        rows = self.db.fetch_all("SELECT class_id FROM classes ORDER BY class_id")
+        self.assertEqual([r["class_id"] for r in rows], ["C1", "C3"])
+
+    def test_failed_statement_outside_scope_is_rolled_back(self):
+        """Lệnh lỗi ngoài scope không để lại transaction dang dở."""
+        self.add_class("C1")
+        with self.assertRaises(Exception):
+            self.add_class("C1")
+
+        self.assertFalse(self.db.connection.in_transaction)
+
+
+class TestBulkOperations(DatabaseTestCase):
+    """Test cases cho create_many / upsert_many."""
+
+    def setUp(self):
+        """Setup một lớp, một session và vài sinh viên."""
+        super().setUp()
+        self.user_repo = UserRepository(self.db)
+        self.class_repo = ClassroomRepository(self.db)
+        self.session_repo = AttendanceSessionRepository(self.db)
+        self.record_repo = AttendanceRecordRepository(self.db)
+
+        self.user_repo.create_many([
+            Student(0, f"sv{i}", "hash", f"Student {i}", UserRole.STUDENT, student_code=f"SV{i:03d}")
+            for i in range(5)
+        ])
+        self.class_repo.create_many([
+            Classroom("C1", "Class 1", "SUB", student_codes=[f"SV{i:03d}" for i in range(5)])
+        ])
+        now = datetime.now()
+        self.session_repo.create(
+            AttendanceSession("SS1", "C1", now, now + timedelta(hours=1), AttendanceMethod.QR)
+        )
+
+    def make_records(self, status: AttendanceStatus, prefix: str = "R"):
+        """Tạo records cho 5 sinh viên của session SS1."""
+        return [
+            AttendanceRecord(f"{prefix}{i}", "SS1", f"SV{i:03d}", status=status)
+            for i in range(5)
+        ]
+
+    def test_create_many_users_autoincrement(self):
+        """User không có user_id được database tự cấp ID."""
+        users = self.user_repo.find_by_role(UserRole.STUDENT)
+        self.assertEqual(len(users), 5)
+        self.assertEqual(len({u.user_id for u in users}), 5)
+
+    def test_create_user_derives_role_code_from_id(self):
+        """create() để database cấp user_id, mã theo role trống được sinh từ ID."""
+        teacher = self.user_repo.create(Teacher(0, "gv", "hash", "Teacher", UserRole.TEACHER))
+        self.assertEqual(teacher.teacher_code, f"GV{teacher.user_id:03d}")
+
+        student = self.user_repo.create({
+            "username": "sv_new", "password_hash": "hash", "full_name": "New", "role": "STUDENT",
+            "student_code": "SV999"
+        })
+        self.assertEqual((student.user_id, student.student_code), (teacher.user_id + 1, "SV999"))
+
+    def test_reserve_ids_skips_block(self):
+        """Khối ID đã giữ không bị cấp lại cho insert AUTOINCREMENT."""
+        top = max(u.user_id for u in self.user_repo.find_all())
+        ids = self.user_repo.reserve_ids(3)
+        self.assertEqual(ids, range(top + 1, top + 4))
+
+        self.user_repo.create_many([
+            Student(user_id, f"bulk{user_id}", "hash", "Bulk", UserRole.STUDENT,
+                    student_code=UserRepository.role_code(UserRole.STUDENT, user_id))
+            for user_id in ids[:2]
+        ])
+        created = self.user_repo.create(Student(0, "after", "hash", "After", UserRole.STUDENT))
+        self.assertEqual(created.user_id, top + 4)
+        self.assertEqual(self.user_repo.reserve_ids(1), range(top + 5, top + 6))
+        self.assertEqual(self.user_repo.find_by_student_code(f"SV{top + 1:03d}").username, f"bulk{top + 1}")
+
+    def test_create_many_classroom_enrolls_students(self):
+        """create_many của Classroom ghi danh luôn student_codes."""
+        self.assertEqual(len(self.class_repo.get_students_in_class("C1")), 5)
+
+    def test_create_many_chunks(self):
+        """Chia batch không làm mất dòng nào."""
+        count = self.record_repo.create_many(self.make_records(AttendanceStatus.ABSENT), batch_size=2)
+        self.assertEqual(count, 5)
+        self.assertEqual(self.record_repo.count(), 5)
+
+    def test_create_many_is_atomic(self):
+        """Một dòng lỗi rollback cả lần ghi."""
+        records = self.make_records(AttendanceStatus.ABSENT)
+        records.append(AttendanceRecord("R0", "SS1", "SV000"))
+        with self.assertRaises(Exception):
+            self.record_repo.create_many(records, batch_size=2)
+        self.assertEqual(self.record_repo.count(), 0)
+
+    def test_upsert_many_on_natural_key(self):
+        """Upsert record theo (session_id, student_code), giữ record_id cũ."""
+        self.record_repo.create_many(self.make_records(AttendanceStatus.ABSENT))
+        self.record_repo.upsert_many(self.make_records(AttendanceStatus.PRESENT, prefix="NEW"))
+
+        records = self.record_repo.find_by_session("SS1")
+        self.assertEqual(len(records), 5)
+        self.assertTrue(all(r.status == AttendanceStatus.PRESENT for r in records))
+        self.assertEqual({r.record_id for r in records}, {f"R{i}" for i in range(5)})
+
+
+class TestStreamingAndPagination(DatabaseTestCase):
+    """Test cases cho iter_* và page_* (keyset pagination)."""
+
+    def setUp(self):
+        """Setup 1 lớp, 7 sessions, records của 1 sinh viên (có cả vắng mặt)."""
+        super().setUp()
+        self.class_repo = ClassroomRepository(self.db)
+        self.session_repo = AttendanceSessionRepository(self.db)
+        self.record_repo = AttendanceRecordRepository(self.db)
+
+        self.db.execute(
+            "INSERT INTO users (username, password_hash, full_name, role, student_code) "
+            "VALUES ('sv1', 'x', 'Student', 'STUDENT', 'SV001')"
+        )
+        self.class_repo.create(Classroom("C1", "Class 1", "SUB"))
+
+        start = datetime(2024, 1, 1, 8, 0)
+        sessions = [
+            AttendanceSession(f"SS{i}", "C1", start + timedelta(days=i), start + timedelta(days=i, hours=1))
+            for i in range(7)
+        ]
+        self.session_repo.create_many(sessions)
+        self.record_repo.create_many([
+            AttendanceRecord(
+                f"R{i}", s.session_id, "SV001",
+                status=AttendanceStatus.PRESENT if i % 3 else AttendanceStatus.ABSENT,
+                attendance_time=s.start_time if i % 3 else None
+            )
+            for i, s in enumerate(sessions)
+        ])
+
+    def test_iter_all_matches_find_all(self):
+        """iter_all trả về cùng dữ liệu với find_all, theo từng chunk nhỏ."""
+        streamed = [s.session_id for s in self.session_repo.iter_all(chunk_size=2)]
+        self.assertEqual(sorted(streamed), sorted(s.session_id for s in self.session_repo.find_all()))
+
+    def test_page_by_primary_key(self):
+        """page() duyệt đủ mọi entity, không trùng lặp."""
+        ids = []
+        page = self.session_repo.page(limit=3, class_id="C1")
+        ids.extend(s.session_id for s in page.items)
+        while page.has_more:
+            page = self.session_repo.page(after_key=page.next_key, limit=3, class_id="C1")
+            ids.extend(s.session_id for s in page.items)
+        self.assertEqual(ids, sorted(f"SS{i}" for i in range(7)))
+
+    def test_page_by_class_matches_find_by_class(self):
+        """page_by_class giữ đúng thứ tự start_time DESC."""
+        ids = []
+        page = self.session_repo.page_by_class("C1", limit=2)
+        ids.extend(s.session_id for s in page.items)
+        while page.has_more:
+            page = self.session_repo.page_by_class("C1", after_key=page.next_key, limit=2)
+            ids.extend(s.session_id for s in page.items)
+        self.assertEqual(ids, [s.session_id for s in self.session_repo.find_by_class("C1")])
+
+    def test_page_by_student_includes_absent_records(self):
+        """page_by_student duyệt qua cả records có attendance_time NULL."""
+        ids = []
+        page = self.record_repo.page_by_student("SV001", limit=2)
+        ids.extend(r.record_id for r in page.items)
+        while page.has_more:
+            page = self.record_repo.page_by_student("SV001", after_key=page.next_key, limit=2)
+            ids.extend(r.record_id for r in page.items)
+        self.assertEqual(ids, [r.record_id for r in self.record_repo.iter_by_student("SV001", chunk_size=3)])
+        self.assertEqual(len(ids), 7)
+
+
+class TestRowMapping(DatabaseTestCase):
+    """Test cases cho compiled row mapper."""
+
+    def setUp(self):
+        """Setup một session với các cột optional."""
+        super().setUp()
+        self.class_repo = ClassroomRepository(self.db)
+        self.session_repo = AttendanceSessionRepository(self.db)
+        self.class_repo.create(Classroom("C1", "Class 1", "SUB"))
+        start = datetime(2024, 1, 1, 8, 0)
+        self.session_repo.create(
+            AttendanceSession("SS1", "C1", start, start + timedelta(hours=1), AttendanceMethod.QR,
+                              token="tok", qr_window_minutes=3)
+        )
+
+    def test_mapper_compiled_once_per_column_set(self):
+        """Mapper được cache theo bộ cột của SELECT."""
+        self.session_repo.find_all()
+        self.session_repo.find_by_class("C1")
+        self.assertEqual(len(self.session_repo._mappers), 1)
+
+    def test_partial_columns_use_defaults(self):
+        """SELECT thiếu cột optional dùng giá trị mặc định như trước."""
+        session = self.session_repo._fetch_entity(
+            "SELECT session_id, class_id, start_time, end_time, attendance_method, status "
+            "FROM attendance_sessions"
+        )
+        self.assertEqual(session.method, AttendanceMethod.QR)
+        self.assertIsInstance(session.start_time, datetime)
+        self.assertIsNone(session.token)
+        self.assertEqual(session.late_window_minutes, 15)
+
+    def test_row_to_entity_matches_compiled_mapper(self):
+        """_row_to_entity (sqlite3.Row) cho cùng kết quả với tuple mapper."""
+        row = self.db.fetch_one("SELECT * FROM attendance_sessions")
+        session = self.session_repo._row_to_entity(row)
+        self.assertEqual(session.token, "tok")
+        self.assertEqual(session.qr_window_minutes, 3)
+        self.assertEqual(session.session_id, self.session_repo.find_by_id("SS1").session_id)
+
+
+class TestRecordBatch(DatabaseTestCase):
+    """Test cases cho slotted models và AttendanceRecordBatch."""
+
+    def setUp(self):
+        """Setup 1 session với 4 records (3 có mặt)."""
+        super().setUp()
+        self.user_repo = UserRepository(self.db)
+        self.session_repo = AttendanceSessionRepository(self.db)
+        self.record_repo = AttendanceRecordRepository(self.db)
+
+        self.user_repo.create_many([
+            Student(0, f"sv{i}", "hash", f"Student {i}", UserRole.STUDENT, student_code=f"SV{i:03d}")
+            for i in range(4)
+        ])
+        ClassroomRepository(self.db).create(Classroom("C1", "Class 1", "SUB"))
+        start = datetime(2024, 1, 1, 8, 0)
+        self.session_repo.create(AttendanceSession("SS1", "C1", start, start + timedelta(hours=1)))
+        self.record_repo.create_many([
+            AttendanceRecord(
+                f"R{i}", "SS1", f"SV{i:03d}",
+                status=AttendanceStatus.PRESENT if i else AttendanceStatus.ABSENT,
+                attendance_time=start if i else None
+            )
+            for i in range(4)
+        ])
+
+    def test_models_are_slotted(self):
+        """Model không có __dict__."""
+        record = self.record_repo.find_by_id("R1")
+        student = self.user_repo.find_by_student_code("SV001")
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertFalse(hasattr(student, "__dict__"))
+        self.assertIsInstance(student, Student)
+        self.assertEqual(student.role, UserRole.STUDENT)
+
+    def test_trusted_skips_validation(self):
+        """trusted() không chạy __post_init__, constructor thường vẫn validate."""
+        with self.assertRaises(ValueError):
+            AttendanceRecord("", "SS1", "SV001")
+        record = AttendanceRecord.trusted("", "SS1", "SV001", AttendanceStatus.ABSENT)
+        self.assertEqual(record.record_id, "")
+        self.assertIsNone(record.remark)
+
+    def test_load_batch_matches_entities(self):
+        """load_batch cho cùng dữ liệu với find_by_session."""
+        batch = self.record_repo.load_batch(session_id="SS1")
+        self.assertEqual(len(batch), 4)
+        self.assertEqual(batch.count_by_status(), {"PRESENT": 3, "ABSENT": 1})
+        self.assertEqual(batch.present_by_student(), {"SV001": 1, "SV002": 1, "SV003": 1})
+
+        expected = {r.record_id: r for r in self.record_repo.find_by_session("SS1")}
+        for record in batch.iter_records():
+            self.assertEqual(record.status, expected[record.record_id].status)
+            self.assertEqual(record.attendance_time, expected[record.record_id].attendance_time)
+
+    def test_batch_interns_repeated_values(self):
+        """session_id lặp lại dùng chung một string object."""
+        batch = self.record_repo.load_batch()
+        self.assertTrue(all(sid is batch.session_ids[0] for sid in batch.session_ids))
+        self.assertEqual(len(AttendanceRecordBatch.from_records(batch.iter_records())), 4)
+
+
+class TestEntityCache(DatabaseTestCase):
+    """Test cases cho EntityCache và cache của repositories."""
+
+    def setUp(self):
+        """Setup 1 lớp, 1 session đang mở."""
+        super().setUp()
+        self.class_repo = ClassroomRepository(self.db)
+        self.session_repo = AttendanceSessionRepository(self.db)
+        self.class_repo.create(Classroom("C1", "Class 1", "SUB"))
+        start = datetime(2024, 1, 1, 8, 0)
+        self.session_repo.create(AttendanceSession("SS1", "C1", start, start + timedelta(hours=1)))
+
+    def test_lru_eviction_and_ttl(self):
+        """Vượt max_size bỏ entry cũ nhất; entry quá TTL bị coi là miss."""
+        now = [0.0]
+        cache = EntityCache(max_size=2, ttl=10, clock=lambda: now[0])
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertIs(cache.get("b"), MISSING)
+        self.assertEqual(cache.get("a"), 1)
+        now[0] = 11
+        self.assertIs(cache.get("c"), MISSING)
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 2))
+        self.assertEqual((stats["evictions"], stats["expirations"]), (1, 1))
+
+    def test_stale_put_after_invalidate_is_ignored(self):
+        """Giá trị đọc trước khi invalidate không được ghi lại vào cache."""
+        cache = EntityCache()
+        generation = cache.generation
+        cache.invalidate("a")
+        self.assertFalse(cache.put("a", "old", generation))
+        self.assertIs(cache.get("a"), MISSING)
+
+    def test_find_by_id_hits_cache(self):
+        """Lookup lặp lại đọc từ cache, mỗi caller nhận một bản sao."""
+        first = self.class_repo.find_by_id("C1")
+        second = self.class_repo.find_by_id("C1")
+        self.assertIsNot(second, first)
+        self.assertEqual(second, first)
+        self.assertEqual(self.db.cache_stats()["classes"]["hits"], 1)
+
+    def test_cached_entity_not_mutated_by_callers(self):
+        """Sửa entity rồi bỏ dở (không update) không làm bẩn cache."""
+        self.class_repo.find_by_id("C1").class_name = "HACKED"
+        self.class_repo.find_many_by_ids(["C1"])["C1"].student_codes.add("SV999")
+
+        cached = self.class_repo.find_by_id("C1")
+        self.assertEqual((cached.class_name, cached.student_codes), ("Class 1", set()))
+        self.assertEqual(self.db.cache_stats()["classes"]["hits"], 2)
+
+    def test_failed_class_update_leaves_cache_clean(self):
+        """update_class với teacher không tồn tại không để lại dữ liệu chưa lưu."""
+        admin = AdminService(UserRepository(self.db), self.class_repo, self.session_repo, SecurityService())
+        self.class_repo.find_by_id("C1")
+
+        success, message = admin.update_class({"class_id": "C1", "class_name": "HACKED", "teacher_code": "NOPE"})
+
+        self.assertFalse(success)
+        self.assertIn("NOPE", message)
+        self.assertEqual(self.class_repo.find_by_id("C1").class_name, "Class 1")
+
+    def test_write_invalidates_for_every_repository_instance(self):
+        """close_session qua repository khác vẫn invalidate cache dùng chung."""
+        self.assertTrue(self.session_repo.find_by_id("SS1").is_open())
+        AttendanceSessionRepository(self.db).close_session("SS1")
+        self.assertFalse(self.session_repo.find_by_id("SS1").is_open())
+
+        self.class_repo.update(Classroom("C1", "Renamed", "SUB"))
+        self.assertEqual(self.class_repo.find_by_id("C1").class_name, "Renamed")
+
+        self.session_repo.delete("SS1")
+        self.assertIsNone(self.session_repo.find_by_id("SS1"))
+
+    def test_user_code_lookup_invalidated_by_profile_update(self):
+        """Cập nhật profile theo student_code làm mới cache theo mã."""
+        user_repo = UserRepository(self.db)
+        user_repo.create_many([
+            Student(0, "sv1", "hash", "Old Name", UserRole.STUDENT, student_code="SV001")
+        ])
+        self.assertEqual(user_repo.find_by_student_code("SV001").full_name, "Old Name")
+        user_repo.update_student_profile("SV001", {"full_name": "New Name"})
+        self.assertEqual(user_repo.find_by_student_code("SV001").full_name, "New Name")
+
+    def test_uncommitted_reads_not_cached(self):
+        """Đọc trong transaction bị rollback không để lại dữ liệu trong cache."""
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.class_repo.update(Classroom("C1", "Tmp", "SUB"))
+                self.class_repo.find_by_id("C1")
+                raise RuntimeError("boom")
+        self.assertEqual(self.class_repo.find_by_id("C1").class_name, "Class 1")
+
+
+class StudentDataTestCase(DatabaseTestCase):
+    """Base class: 3 lớp, mỗi lớp 2 sessions, 1 sinh viên có record ở mọi session."""
+
+    def setUp(self):
+        """Setup 3 lớp, mỗi lớp 2 sessions, 1 sinh viên có record ở mọi session."""
+        super().setUp()
+        self.user_repo = UserRepository(self.db)
+        self.class_repo = ClassroomRepository(self.db)
+        self.session_repo = AttendanceSessionRepository(self.db)
+        self.record_repo = AttendanceRecordRepository(self.db)
+
+        self.user_repo.create_many([
+            Student(0, "sv1", "hash", "Student", UserRole.STUDENT, student_code="SV001")
+        ])
+        self.class_repo.create_many([
+            Classroom(f"C{c}", f"Class {c}", "SUB", student_codes=["SV001"]) for c in range(3)
+        ])
+        start = datetime(2024, 1, 1, 8, 0)
+        self.session_repo.create_many([
+            AttendanceSession(f"SS{c}{i}", f"C{c}", start + timedelta(days=i), start + timedelta(days=i, hours=1))
+            for c in range(3) for i in range(2)
+        ])
+        self.record_repo.create_many([
+            AttendanceRecord(f"R{c}{i}", f"SS{c}{i}", "SV001", AttendanceStatus.PRESENT,
+                             attendance_time=start + timedelta(days=i))
+            for c in range(3) for i in range(2)
+        ])
+
+    def count_selects(self, fn):
+        """Chạy fn, trả về (kết quả, số câu SELECT đã chạy trên connection hiện tại)."""
+        statements = []
+        self.db.connection.set_trace_callback(statements.append)
+        try:
+            result = fn()
+        finally:
+            self.db.connection.set_trace_callback(None)
+        return result, sum(1 for s in statements if s.lstrip().upper().startswith("SELECT"))
+
+
+class TestFindManyByIds(StudentDataTestCase):
+    """Test cases cho find_many_by_ids."""
+
+    def test_find_many_by_ids_chunks_by_variable_limit(self):
+        """find_many_by_ids chia chunk theo giới hạn tham số, bỏ qua ID không tồn tại."""
+        ids = ["SS00", "SS01", "SS10", "SS11", "SS20", "MISSING", "SS00"]
+        with patch.object(Database, "max_variables", new_callable=PropertyMock, return_value=2):
+            found, selects = self.count_selects(lambda: self.session_repo.find_many_by_ids(ids))
+
+        self.assertEqual(set(found), {"SS00", "SS01", "SS10", "SS11", "SS20"})
+        self.assertEqual(selects, 3)
+        self.assertEqual(found["SS10"].class_id, "C1")
+
+
+class TestStudentReadQueries(StudentDataTestCase):
+    """Test cases cho các query đọc của StudentService (aggregate / JOIN)."""
+
+    def setUp(self):
+        super().setUp()
+        self.service = StudentService(self.user_repo, self.record_repo, self.session_repo, self.class_repo)
+
+    def test_dashboard_stats_in_two_queries(self):
+        """Dashboard: một query aggregate + một query JOIN top-5, dict trả về giữ nguyên."""
+        self.db.execute(
+            "UPDATE attendance_records SET status = 'ABSENT', attendance_time = NULL WHERE record_id = 'R00'"
+        )
+
+        stats, selects = self.count_selects(lambda: self.service.get_dashboard_stats("SV001"))
+
+        self.assertEqual(selects, 2)
+        self.assertEqual(
+            {k: stats[k] for k in ("attendance_rate", "total_sessions", "present_count", "absent_count")},
+            {"attendance_rate": 83.33, "total_sessions": 6, "present_count": 5, "absent_count": 1}
+        )
+        recent = stats["recent_attendance"]
+        self.assertEqual(len(recent), 5)
+        self.assertEqual([r["date"] for r in recent], ["2024-01-02"] * 3 + ["2024-01-01"] * 2)
+        self.assertNotIn("R00", [r["record_id"] for r in recent])
+        self.assertEqual(recent[0]["class_name"], f"Class {recent[0]['class_id'][1]}")
+        self.assertEqual(set(recent[0]), {"record_id", "session_id", "class_id", "class_name",
+                                          "date", "time", "status", "remark"})
+
+    def test_history_query_count_independent_of_records(self):
+        """get_attendance_history không query session/class cho từng record."""
+        page, selects = self.count_selects(
+            lambda: self.service.get_attendance_history(
+                "SV001", search_query="class", class_id="C1", include_total=False
+            )
+        )
+        self.assertEqual(len(page.items), 2)
+        self.assertEqual({h["class_name"] for h in page.items}, {"Class 1"})
+        # Tra các lớp khớp search + một trang records JOIN sessions JOIN classes
+        self.assertEqual(selects, 2)
+
+    def test_history_page_filters_in_sql(self):
+        """Filter status / ngày / search chạy trong SQL, total khớp số dòng."""
+        self.db.execute("UPDATE attendance_records SET status = 'ABSENT', attendance_time = NULL "
+                        "WHERE record_id = 'R20'")
+
+        def record_ids(**filters):
+            page = self.service.get_attendance_history("SV001", **filters)
+            self.assertEqual(page.total, len(page.items))
+            return [h["record_id"] for h in page.items]
+
+        self.assertEqual(record_ids(status="ABSENT"), ["R20"])
+        self.assertEqual(record_ids(start_date=datetime(2024, 1, 2)), ["R21", "R11", "R01"])
+        self.assertEqual(record_ids(end_date=datetime(2024, 1, 1, 23, 59)), ["R10", "R00"])
+        self.assertEqual(record_ids(search_query="02 jan 2024"), ["R21", "R11", "R01"])
+        self.assertEqual(record_ids(search_query="2024-01-01"), ["R10", "R00"])
+        self.assertEqual(record_ids(search_query="CLASS 2"), ["R21", "R20"])
+        self.assertEqual(record_ids(search_query="100%"), [])
+        self.assertEqual(record_ids(search_query="an 2024", status="PRESENT", class_id="C0"), ["R01", "R00"])
+        self.assertEqual(self.service.get_attendance_history("SV001").total, 6)
+
+    def test_history_search_folds_vietnamese_case(self):
+        """Tìm tên lớp tiếng Việt không phân biệt hoa thường (kể cả Đ/đ, chữ có dấu)."""
+        self.db.execute("UPDATE classes SET class_name = 'Lập Trình Đa Nền Tảng' WHERE class_id = 'C1'")
+
+        def record_ids(search_query):
+            return [h["record_id"] for h in self.service.get_attendance_history(
+                "SV001", search_query=search_query).items]
+
+        self.assertEqual(record_ids("lập trình"), ["R11", "R10"])
+        self.assertEqual(record_ids("ĐA NỀN"), ["R11", "R10"])
+        self.assertEqual(record_ids("đa nền tảng"), ["R11", "R10"])
+        # Dạng tổ hợp (NFD) của "Lập" vẫn khớp dạng dựng sẵn (NFC) trong database
+        self.assertEqual(record_ids("la\u0323\u0302p"), ["R11", "R10"])
+        self.assertEqual(record_ids("lap trinh"), [])
+
+    def test_history_sort_by_class_folds_vietnamese_case(self):
+        """Sắp theo tên lớp dùng cùng casefold với tìm kiếm: "Đại số" và "đại số" là một key."""
+        for class_id, class_name in (("C0", "đại số"), ("C1", "Đại số"), ("C2", "Cơ sở")):
+            self.db.execute("UPDATE classes SET class_name = ? WHERE class_id = ?", (class_name, class_id))
+
+        seen, cursor = [], None
+        while True:
+            page = self.service.get_attendance_history(
+                "SV001", sort_by="class_name", sort_order="asc", cursor=cursor, limit=2, include_total=False
+            )
+            seen += [h["record_id"] for h in page.items]
+            if not page.has_more:
+                break
+            cursor = page.next_key
+
+        # Hai lớp cùng key -> xen kẽ theo attendance_time rồi record_id
+        self.assertEqual(seen, ["R20", "R21", "R00", "R10", "R01", "R11"])
+
+    def test_history_page_cursor_covers_every_order(self):
+        """Đi hết các trang bằng cursor cho mọi kiểu sort: đủ dòng, đúng thứ tự, không trùng."""
+        self.db.execute("UPDATE attendance_records SET status = 'ABSENT', attendance_time = NULL "
+                        "WHERE record_id IN ('R10', 'R21')")
+        rows = self.record_repo.find_history_rows("SV001")
+        expected = {
+            "date": sorted(rows, key=lambda r: (r.attendance_time is not None,
+                                                r.attendance_time or datetime.min, r.record_id)),
+            "class_name": sorted(rows, key=lambda r: (casefold(r.class_name),
+                                                      r.attendance_time.isoformat() if r.attendance_time else "",
+                                                      r.record_id)),
+        }
+
+        for sort_by, ascending in expected.items():
+            for sort_order in ("asc", "desc"):
+                seen, cursor = [], None
+                while True:
+                    page = self.service.get_attendance_history(
+                        "SV001", sort_by=sort_by, sort_order=sort_order, cursor=cursor, limit=4,
+                        include_total=False
+                    )
+                    seen += [h["record_id"] for h in page.items]
+                    if not page.has_more:
+                        break
+                    cursor = page.next_key
+                order = [r.record_id for r in ascending]
+                self.assertEqual(seen, order if sort_order == "asc" else order[::-1], (sort_by, sort_order))
+
+    def test_history_rows_joined_and_paged(self):
+        """find_history_rows trả dòng đã join, phân trang bằng after_key."""
+        # Session đã bị xóa (dữ liệu cũ không có FK): class_id/class_name là None
+        self.db.execute("PRAGMA foreign_keys = OFF")
+        self.db.execute("DELETE FROM attendance_sessions WHERE session_id = 'SS20'")
+
+        first = self.record_repo.find_history_rows("SV001", limit=4)
+        rest = self.record_repo.find_history_rows(
+            "SV001", after_key=(first[-1].attendance_time, first[-1].record_id)
+        )
+
+        rows = first + rest
+        self.assertEqual([r.record_id for r in rows], ["R21", "R11", "R01", "R20", "R10", "R00"])
+        self.assertEqual(rows[0].class_name, "Class 2")
+        self.assertEqual(rows[0].session_start, datetime(2024, 1, 2, 8, 0))
+        self.assertEqual((rows[3].class_id, rows[3].class_name), (None, None))
+        self.assertEqual(rows, list(self.record_repo.iter_history_rows("SV001", chunk_size=4)))
+
+    def test_export_history_csv(self):
+        """Export ghi header + một dòng cho mỗi record."""
+        filename = os.path.join(self.tmp_dir, "history.csv")
+        self.assertEqual(self.service.export_attendance_history("SV001", filename), 6)
+        with open(filename, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertIn("Class 2", lines[1])
+
+    def test_student_summary_follows_writes(self):
+        """Bảng tổng hợp khớp với COUNT thật sau update, delete, upsert và INSERT OR REPLACE."""
+        def actual():
+            row = self.db.fetch_one(
+                "SELECT COUNT(*) AS total, COALESCE(SUM(status = 'PRESENT'), 0) AS present "
+                "FROM attendance_records WHERE student_code = 'SV001'"
+            )
+            return {"total": row["total"], "present": row["present"]}
+
+        self.db.execute("UPDATE attendance_records SET status = 'ABSENT' WHERE record_id = 'R00'")
+        self.db.execute("DELETE FROM attendance_records WHERE record_id = 'R01'")
+        self.db.execute(
+            "INSERT OR REPLACE INTO attendance_records (record_id, session_id, student_code, status) "
+            "VALUES ('R10', 'SS10', 'SV001', 'ABSENT')"
+        )
+        self.record_repo.upsert_many([
+            AttendanceRecord("R11", "SS11", "SV001", AttendanceStatus.ABSENT),
+            AttendanceRecord("R01", "SS01", "SV001", AttendanceStatus.PRESENT),
+        ])
+
+        self.assertEqual(actual(), {"total": 6, "present": 3})
+        self.assertEqual(self.record_repo.get_student_summary("SV001"), actual())
+
+    def test_todays_sessions_only_reads_today(self):
+        """Sessions hôm nay của mọi lớp đang học, sắp theo giờ; lớp khác / ngày khác bị bỏ qua."""
+        self.class_repo.create_many([Classroom("C9", "Class 9", "SUB")])
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        self.session_repo.create_many([
+            AttendanceSession(session_id, class_id, start, start + timedelta(hours=1))
+            for session_id, class_id, start in [
+                ("T1", "C1", today + timedelta(hours=13)),
+                ("T0", "C0", today + timedelta(hours=8)),
+                ("T9", "C9", today + timedelta(hours=9)),
+                ("Y0", "C0", today - timedelta(minutes=30)),
+                ("N2", "C2", today + timedelta(days=1)),
+            ]
+        ])
+
+        sessions, selects = self.count_selects(lambda: self.service.get_todays_sessions("SV001"))
+
+        self.assertEqual([s["session_id"] for s in sessions], ["T0", "T1"])
+        self.assertEqual((sessions[0]["class_name"], sessions[0]["start_time"]), ("Class 0", "08:00"))
+        self.assertLessEqual(selects, 2)
+
+    def test_sessions_by_teacher_newest_first_with_filters(self):
+        """Sessions của các lớp giáo viên dạy: mới nhất trước, LIMIT/khoảng ngày/trạng thái trong SQL."""
+        self.db.execute(
+            "INSERT INTO users (username, password_hash, full_name, role, teacher_code) "
+            "VALUES ('gv1', 'hash', 'Teacher', 'TEACHER', 'GV001')"
+        )
+        self.db.execute("UPDATE classes SET teacher_code = 'GV001' WHERE class_id IN ('C0', 'C1')")
+        self.session_repo.close_session("SS01")
+
+        def ids(**kwargs):
+            return [s.session_id for s in self.session_repo.find_by_teacher("GV001", **kwargs)]
+
+        self.assertEqual(ids(limit=3), ["SS11", "SS01", "SS10"])
+        self.assertEqual(ids(start=datetime(2024, 1, 2)), ["SS11", "SS01"])
+        self.assertEqual(ids(end=datetime(2024, 1, 2)), ["SS10", "SS00"])
+        self.assertEqual(ids(status=SessionStatus.CLOSED), ["SS01"])
+        self.assertEqual(ids(limit=1, status=SessionStatus.OPEN, end=datetime(2024, 1, 2)), ["SS10"])
+
+    def test_dashboard_stats_empty_student(self):
+        """Sinh viên chưa có record: các số đếm bằng 0."""
+        stats = self.service.get_dashboard_stats("NOBODY")
+        self.assertEqual((stats["total_sessions"], stats["attendance_rate"], stats["recent_attendance"]),
+                         (0, 0, []))
+
+
+class TestSessionExpiry(StudentDataTestCase):
+    """Test cases cho tự động đóng session hết hạn (UPDATE set-based + scheduler)."""
+
+    def setUp(self):
+        super().setUp()
+        self.now = datetime.now()
+        self.session_repo.create_many([
+            AttendanceSession("LIVE1", "C0", self.now - timedelta(minutes=5), self.now + timedelta(hours=1)),
+        ])
+
+    def statuses(self):
+        return {row["session_id"]: row["status"]
+                for row in self.db.fetch_all("SELECT session_id, status FROM attendance_sessions")}
+
+    def test_close_expired_closes_only_expired_open_sessions(self):
+        """Một UPDATE đóng đúng các session đang mở đã hết giờ; cache không giữ trạng thái cũ."""
+        self.session_repo.close_session("SS00")
+        self.assertEqual(self.session_repo.find_by_id("SS01").status, SessionStatus.OPEN)
+
+        closed = self.session_repo.close_expired(self.now)
+
+        self.assertEqual(sorted(closed), ["SS01", "SS10", "SS11", "SS20", "SS21"])
+        self.assertEqual(self.session_repo.find_by_id("SS01").status, SessionStatus.CLOSED)
+        self.assertEqual(self.statuses()["LIVE1"], "OPEN")
+        self.assertEqual(self.session_repo.next_expiry(), self.now + timedelta(hours=1))
+        self.assertEqual(self.session_repo.close_expired(self.now), [])
+
+    def test_scheduler_starts_on_baseline_schema(self):
+        """Database chỉ có schema.sql (chưa chạy migration 005): scheduler vẫn start và đóng session."""
+        legacy_path = os.path.join(self.tmp_dir, "baseline.db")
+        legacy = sqlite3.connect(legacy_path)
+        with open(os.path.join(os.path.dirname(__file__), "..", "data", "migrations", "schema.sql"),
+                  encoding="utf-8") as f:
+            legacy.executescript(f.read())
+        legacy.execute("INSERT INTO classes (class_id, class_name, subject_code) VALUES ('C1', 'C', 'S')")
+        legacy.execute(
+            "INSERT INTO attendance_sessions (session_id, class_id, start_time, end_time, attendance_method, status) "
+            "VALUES ('OLD', 'C1', ?, ?, 'QR', 'OPEN')",
+            (self.now - timedelta(hours=2), self.now - timedelta(hours=1))
+        )
+        legacy.commit()
+        legacy.close()
+
+        db = Database(legacy_path)
+        done = threading.Event()
+        closed = []
+        scheduler = SessionExpiryScheduler(
+            AttendanceSessionRepository(db), on_closed=lambda ids: (closed.extend(ids), done.set())
+        )
+        try:
+            scheduler.start()
+            self.assertTrue(done.wait(5))
+            self.assertEqual(closed, ["OLD"])
+        finally:
+            scheduler.stop(timeout=5)
+            db.close()
+
+    def test_scheduler_wakes_at_next_end_time(self):
+        """Scheduler ngủ tới end_time sớm nhất (không poll), session mới được schedule đánh thức."""
+        self.session_repo.close_expired(self.now)
+        done = threading.Event()
+        closed = []
+        scheduler = SessionExpiryScheduler(
+            self.session_repo, on_closed=lambda ids: (closed.extend(ids), done.set())
+        ).start()
+        try:
+            time.sleep(0.1)
+            self.assertEqual(scheduler.runs, 0)
+
+            end_time = datetime.now() + timedelta(milliseconds=200)
+            self.session_repo.create_many([
+                AttendanceSession("SOON1", "C0", self.now - timedelta(minutes=5), end_time),
+            ])
+            scheduler.schedule(end_time)
+
+            self.assertTrue(done.wait(5))
+            self.assertGreaterEqual(datetime.now(), end_time)
+        finally:
+            scheduler.stop(timeout=5)
+
+        self.assertEqual(closed, ["SOON1"])
+        self.assertEqual(scheduler.runs, 1)
+        self.assertEqual(self.statuses()["LIVE1"], "OPEN")
+
+
+class TestSessionReports(StudentDataTestCase):
+    """Test cases cho báo cáo nhiều session (một query GROUP BY session_id)."""
+
+    def setUp(self):
+        super().setUp()
+        security = SecurityService()
+        self.service = AttendanceSessionService(
+            self.session_repo, self.record_repo, self.class_repo, security, QRService(security)
+        )
+        self.user_repo.create_many([
+            Student(0, "sv2", "hash", "Student 2", UserRole.STUDENT, student_code="SV002")
+        ])
+        self.class_repo.add_students_to_class("C0", ["SV002"])
+        self.record_repo.create_many([
+            AttendanceRecord("R00B", "SS00", "SV002", AttendanceStatus.ABSENT)
+        ])
+
+    def test_reports_for_many_sessions_in_constant_queries(self):
+        """Có mặt / vắng / sĩ số đúng cho từng session; số query không tăng theo số session."""
+        self.session_repo.cache.clear()
+        reports, selects = self.count_selects(
+            lambda: self.service.get_session_reports(["SS00", "SS10", "MISSING", "SS00"])
+        )
+
+        self.assertEqual(list(reports), ["SS00", "SS10"])
+        self.assertEqual(
+            {k: reports["SS00"][k] for k in ("total_students", "present_count", "absent_count", "attendance_rate")},
+            {"total_students": 2, "present_count": 1, "absent_count": 1, "attendance_rate": 50.0}
+        )
+        self.assertEqual((reports["SS10"]["total_students"], reports["SS10"]["present_count"]), (1, 1))
+        self.assertEqual(reports["SS10"]["start_time"], "2024-01-01T08:00:00")
+        self.assertLessEqual(selects, 2)
+
+        all_ids = [f"SS{c}{i}" for c in range(3) for i in range(2)]
+        self.session_repo.cache.clear()
+        _, selects_all = self.count_selects(lambda: self.service.get_session_reports(all_ids))
+        self.assertEqual(selects_all, selects)
+        self.assertEqual(self.service.get_session_report("SS00"), reports["SS00"])
+        self.assertIsNone(self.service.get_session_report("MISSING"))
+
+
+class TestClassroomRosters(StudentDataTestCase):
+    """Test cases cho hydrate_students (roster / sĩ số của nhiều lớp trong một query)."""
+
+    def setUp(self):
+        super().setUp()
+        self.user_repo.create_many([
+            Student(0, "sv2", "hash", "Student 2", UserRole.STUDENT, student_code="SV002")
+        ])
+        self.class_repo.add_students_to_class("C0", ["SV002"])
+
+    def test_rosters_in_one_query(self):
+        """Roster của mọi lớp được nạp bằng một SELECT, student_codes là set."""
+        classes = self.class_repo.find_all()
+        hydrated, selects = self.count_selects(lambda: self.class_repo.hydrate_students(classes))
+
+        self.assertEqual(selects, 1)
+        rosters = {c.class_id: c.student_codes for c in hydrated}
+        self.assertEqual(rosters, {"C0": {"SV001", "SV002"}, "C1": {"SV001"}, "C2": {"SV001"}})
+        self.assertIn("SV002", hydrated[0].student_codes)
+        self.assertEqual(hydrated[0].to_dict()["student_codes"], ["SV001", "SV002"])
+
+    def test_count_only(self):
+        """count_only chỉ nạp sĩ số, không nạp roster."""
+        with patch.object(Database, "max_variables", new_callable=PropertyMock, return_value=2):
+            classes = self.class_repo.hydrate_students(self.class_repo.find_all(), count_only=True)
+        self.assertEqual([c.student_count for c in classes], [2, 1, 1])
+        self.assertEqual(classes[0].student_codes, set())
+
+    def test_hydrate_does_not_mutate_cached_entity(self):
+        """hydrate_students trả bản sao: entity dùng chung trong cache giữ nguyên."""
+        cached = self.class_repo.find_by_id("C0")
+        counted = self.class_repo.hydrate_students([cached], count_only=True)[0]
+        roster = self.class_repo.hydrate_students([cached])[0]
+
+        self.assertIsNot(counted, cached)
+        self.assertEqual((counted.student_count, counted.student_codes), (2, set()))
+        self.assertEqual(roster.student_codes, {"SV001", "SV002"})
+        cached = self.class_repo.find_by_id("C0")
+        self.assertEqual((cached.student_codes, cached.enrolled_count), (set(), None))
+
+    def test_is_student_in_class(self):
+        """Kiểm tra ghi danh bằng một lookup, không nạp roster."""
+        (in_class, selects) = self.count_selects(lambda: self.class_repo.is_student_in_class("C0", "SV002"))
+        self.assertTrue(in_class)
+        self.assertEqual(selects, 1)
+        self.assertFalse(self.class_repo.is_student_in_class("C1", "SV002"))
+
+    def test_enrollment_invalidates_cache(self):
+        """Ghi danh / hủy ghi danh làm mới lớp trong cache."""
+        classroom = self.class_repo.hydrate_students([self.class_repo.find_by_id("C1")])[0]
+        self.assertEqual(classroom.student_count, 1)
+        self.class_repo.add_student_to_class("C1", "SV002")
+        fresh = self.class_repo.hydrate_students([self.class_repo.find_by_id("C1")])[0]
+        self.assertEqual(fresh.student_codes, {"SV001", "SV002"})
+        self.class_repo.remove_student_from_class("C1", "SV001")
+        self.assertEqual(self.class_repo.hydrate_students([self.class_repo.find_by_id("C1")])[0].student_codes,
+                         {"SV002"})
+
+
+class TestSystemCounts(StudentDataTestCase):
+    """Test cases cho StatsRepository.get_system_counts (admin dashboard, một query aggregate)."""
+
+    def test_counts_in_one_query(self):
+        """Số user theo role, số lớp, session trong tháng và lượt điểm danh trong ngày."""
+        self.user_repo.create_many([
+            Admin(0, "admin", "hash", "Admin", UserRole.ADMIN),
+            Teacher(0, "gv1", "hash", "Teacher", UserRole.TEACHER, teacher_code="GV001"),
+        ])
+        counts, selects = self.count_selects(lambda: StatsRepository(self.db).get_system_counts(
+            datetime(2024, 1, 1), datetime(2024, 2, 1), datetime(2024, 1, 2), datetime(2024, 1, 3)
+        ))
+
+        self.assertEqual(selects, 1)
+        self.assertEqual(counts, {
+            "admins": 1, "teachers": 1, "students": 1,
+            "classes": 3, "sessions": 6, "submissions": 3
+        })
+
+
+class TestSubmitAttendance(StudentDataTestCase):
+    """Test cases cho submit điểm danh (INSERT có điều kiện + ON CONFLICT DO NOTHING)."""
+
+    def setUp(self):
+        super().setUp()
+        now = datetime.now()
+        self.session_repo.create_many([
+            AttendanceSession("OPEN1", "C0", now - timedelta(minutes=5), now + timedelta(hours=1),
+                              AttendanceMethod.LINK_TOKEN, SessionStatus.OPEN, token="TOKEN"),
+            AttendanceSession("DONE1", "C0", now - timedelta(hours=2), now - timedelta(hours=1),
+                              AttendanceMethod.LINK_TOKEN, SessionStatus.OPEN, token="TOKEN"),
+        ])
+        self.service = StudentService(self.user_repo, self.record_repo, self.session_repo, self.class_repo)
+
+    def count_records(self, session_id):
+        return self.db.fetch_one(
+            "SELECT COUNT(*) AS count FROM attendance_records WHERE session_id = ?", (session_id,)
+        )["count"]
+
+    def test_submit_is_one_statement_and_rejects_duplicate(self):
+        """Submit thành công chỉ chạy một câu lệnh; lần hai báo đã điểm danh."""
+        statements = []
+        self.db.connection.set_trace_callback(statements.append)
+        try:
+            result = self.service.submit_attendance("SV001", "OPEN1", "TOKEN")
+        finally:
+            self.db.connection.set_trace_callback(None)
+
+        self.assertEqual(result, (True, "Điểm danh thành công!"))
+        # Trace lặp lại câu lệnh cho mỗi trigger; BEGIN/COMMIT là transaction ngầm của sqlite3
+        self.assertEqual({s for s in statements if s not in ("BEGIN ", "COMMIT")}, {statements[1]})
+        self.assertIn("ON CONFLICT", statements[1])
+        self.assertEqual(self.service.submit_attendance("SV001", "OPEN1", "TOKEN"),
+                         (False, "Bạn đã điểm danh cho phiên này rồi"))
+        self.assertEqual(self.count_records("OPEN1"), 1)
+
+    def test_idempotency_key_replays_success(self):
+        """Retry với cùng idempotency key nhận lại thành công, không tạo record mới."""
+        self.assertTrue(self.service.submit_attendance("SV001", "OPEN1", "TOKEN", idempotency_key="k1")[0])
+        self.assertEqual(self.service.submit_attendance("SV001", "OPEN1", "TOKEN", idempotency_key="k1"),
+                         (True, "Điểm danh thành công!"))
+        self.assertFalse(self.service.submit_attendance("SV001", "OPEN1", "TOKEN", idempotency_key="k2")[0])
+        self.assertEqual(self.count_records("OPEN1"), 1)
+
+    def test_rejection_reasons(self):
+        """Token sai, hết giờ, đã đóng: không ghi, báo đúng lý do."""
+        self.assertEqual(self.service.submit_attendance("SV001", "OPEN1", "WRONG"), (False, "Token không hợp lệ"))
+        self.assertEqual(self.service.submit_attendance("SV001", "DONE1", "TOKEN"),
+                         (False, "Phiên điểm danh đã kết thúc"))
+        self.session_repo.close_session("OPEN1")
+        self.assertEqual(self.service.submit_attendance("SV001", "OPEN1", "TOKEN"), (False, "Phiên điểm danh đã đóng"))
+        self.assertEqual(self.count_records("OPEN1") + self.count_records("DONE1"), 0)
+        with self.assertRaises(NotFoundError):
+            self.service.submit_attendance("SV001", "MISSING", "TOKEN")
+
+    def test_concurrent_duplicate_submits_write_once(self):
+        """Nhiều thread submit cùng sinh viên: đúng một record, một lần thành công, không lỗi."""
+        results = []
+        barrier = threading.Barrier(8)
+
+        def submit():
+            barrier.wait()
+            results.append(self.service.submit_attendance("SV001", "OPEN1", "TOKEN"))
+
+        threads = [threading.Thread(target=submit) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(sorted(success for success, _ in results), [False] * 7 + [True])
+        self.assertEqual({message for success, message in results if not success},
+                         {"Bạn đã điểm danh cho phiên này rồi"})
+        self.assertEqual(self.count_records("OPEN1"), 1)
+
+    def add_students(self, count):
+        """Thêm sinh viên SV100.. để submit theo batch."""
+        codes = [f"SV{100 + i}" for i in range(count)]
+        self.user_repo.create_many([
+            Student(0, f"u{code}", "hash", "Student", UserRole.STUDENT, student_code=code) for code in codes
+        ])
+        return codes
+
+    def test_submit_many_matches_single_submit(self):
+        """Batch: cùng kết quả như submit từng cái, trùng trong batch chỉ ghi một lần."""
+        sv1, sv2 = self.add_students(2)
+        results = self.service.submit_attendance_many([
+            AttendanceSubmission(sv1, "OPEN1", "TOKEN"),
+            AttendanceSubmission(sv1, "OPEN1", "TOKEN"),
+            AttendanceSubmission(sv2, "OPEN1", "WRONG"),
+            AttendanceSubmission(sv2, "DONE1", "TOKEN"),
+            AttendanceSubmission(sv2, "MISSING", "TOKEN"),
+        ])
+        self.assertEqual(results[:4], [
+            (True, "Điểm danh thành công!"),
+            (False, "Bạn đã điểm danh cho phiên này rồi"),
+            (False, "Token không hợp lệ"),
+            (False, "Phiên điểm danh đã kết thúc"),
+        ])
+        self.assertFalse(results[4][0])
+        self.assertEqual(self.count_records("OPEN1"), 1)
+
+    def test_ingestion_queue_groups_submits_into_batches(self):
+        """Queue trả kết quả riêng cho từng submit và ghi ít batch hơn số submit."""
+        codes = self.add_students(30)
+        with AttendanceIngestionQueue(self.service, batch_size=16, max_linger_ms=200) as ingestion:
+            futures = [ingestion.submit(code, "OPEN1", "TOKEN") for code in codes]
+            futures.append(ingestion.submit(codes[0], "OPEN1", "TOKEN"))
+            results = [future.result(timeout=5) for future in futures]
+
+        self.assertEqual(results[:-1], [(True, "Điểm danh thành công!")] * 30)
+        self.assertEqual(results[-1], (False, "Bạn đã điểm danh cho phiên này rồi"))
+        self.assertEqual(ingestion.submissions, 31)
+        self.assertLess(ingestion.batches, 31)
+        self.assertEqual(self.count_records("OPEN1"), 30)
+        with self.assertRaises(RuntimeError):
+            ingestion.submit(codes[0], "OPEN1", "TOKEN")
+
+    def test_ingestion_queue_full_reports_busy(self):
+        """Queue đầy: submit trả về "đang bận" ngay, không chặn caller."""
+        writing, release = threading.Event(), threading.Event()
+        submit_many = self.service.submit_attendance_many
+
+        def slow_submit_many(submissions):
+            writing.set()
+            release.wait(5)
+            return submit_many(submissions)
+
+        with patch.object(self.service, "submit_attendance_many", side_effect=slow_submit_many):
+            with AttendanceIngestionQueue(self.service, batch_size=1, max_linger_ms=0, max_pending=1) as ingestion:
+                first = ingestion.submit("SV001", "OPEN1", "TOKEN")
+                self.assertTrue(writing.wait(5))
+                queued = ingestion.submit("SV001", "OPEN1", "TOKEN")
+                busy = ingestion.submit("SV001", "OPEN1", "TOKEN")
+                self.assertEqual(busy.result(timeout=0), (False, "Hệ thống đang bận, vui lòng thử lại"))
+                release.set()
+                self.assertTrue(first.result(timeout=5)[0])
+                self.assertEqual(queued.result(timeout=5), (False, "Bạn đã điểm danh cho phiên này rồi"))
+
+
+class TestQueryProfiler(DatabaseTestCase):
+    """Test cases cho query instrumentation."""
+
+    def test_disabled_by_default(self):
+        """Mặc định không có profiler."""
+        self.assertIsNone(self.db.profiler)
+
+    def test_normalize_sql(self):
+        """Literal và IN-list được chuẩn hóa, khoảng trắng được gộp."""
+        self.assertEqual(
+            normalize_sql("SELECT *\n  FROM t WHERE id IN (?, ?,?) AND x = 5 AND y = 'a''b'"),
+            "SELECT * FROM t WHERE id IN (...) AND x = ? AND y = ?"
+        )
+
+    def test_stats_grouped_by_normalized_sql(self):
+        """Thống kê gộp theo SQL chuẩn hóa, kể cả fetch_one/fetch_all/execute_many."""
+        profiler = self.db.enable_profiling(echo=False)
+        self.add_class("C1")
+        self.add_class("C2")
+        self.db.fetch_all("SELECT * FROM classes WHERE class_id IN (?, ?)", ("C1", "C2"))
+        self.db.fetch_all("SELECT * FROM classes WHERE class_id IN (?)", ("C1",))
+        self.db.execute_many("DELETE FROM classes WHERE class_id = ?", [("C1",), ("C2",)])
+
+        stats = {s.sql: s for s in profiler.stats()}
+        self.assertEqual(stats["INSERT INTO classes (class_id, class_name, subject_code) VALUES (?, ?, ?)"].count, 2)
+        self.assertEqual(stats["SELECT * FROM classes WHERE class_id IN (...)"].count, 2)
+        self.assertEqual(sum(stats["DELETE FROM classes WHERE class_id = ?"].histogram), 1)
+        self.assertIn("SELECT * FROM classes", profiler.report())
+
+    def test_counting_scope(self):
+        """counting() đếm query trong scope, lồng nhau được."""
+        profiler = self.db.enable_profiling(echo=False)
+        with profiler.counting() as outer:
+            self.count_classes()
+            with profiler.counting() as inner:
+                self.count_classes()
+        self.count_classes()
+        self.assertEqual((outer.count, inner.count), (2, 1))
+
+    def test_slow_query_log_captures_plan(self):
+        """Câu lệnh vượt ngưỡng được ghi kèm EXPLAIN QUERY PLAN."""
+        profiler = self.db.enable_profiling(slow_ms=0, echo=False)
+        self.db.fetch_all("SELECT * FROM attendance_records WHERE session_id = ?", ("SS1",))
+
+        slow = profiler.slow_log[-1]
+        self.assertEqual(slow.sql, "SELECT * FROM attendance_records WHERE session_id = ?")
+        self.assertTrue(any("USING INDEX idx_attendance_records_session_id_status" in line for line in slow.plan))
+
+    def test_fetch_time_counts_toward_slow_log(self):
+        """SELECT chậm lúc fetch (không phải lúc execute) vẫn vào slow_log, kể cả select/iter_rows."""
+        # Mỗi dòng tốn ~2 ms lúc SQLite sinh ra -> 25 dòng ~50 ms, hầu hết trong fetch
+        self.db.connection.create_function("nap", 1, lambda x: time.sleep(0.002) or x)
+        sql = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 25) SELECT nap(i) FROM n"
+        profiler = self.db.enable_profiling(slow_ms=20, explain=False, echo=False)
+
+        self.assertEqual(len(self.db.fetch_all(sql)), 25)
+        self.assertEqual(len(self.db.select(sql).fetchall()), 25)
+        self.assertEqual(sum(1 for _ in self.db.iter_rows(sql, chunk_size=5)), 25)
+
+        self.assertEqual(len(profiler.slow_log), 3)
+        self.assertTrue(all(slow.duration_ms >= 40 for slow in profiler.slow_log))
+        self.assertEqual(profiler.stats()[0].count, 3)
+
+
+
+class TestWorkloadIndexes(DatabaseTestCase):
+    """Test cases cho các index trong data/migrations/versions."""
+
+    def plan(self, sql, params):
+        return "\n".join(QueryProfiler.explain_plan(sql, params, self.db.connection))
+
+    def test_migration_indexes_created(self):
+        """init_database áp dụng migration, index prefix thừa đã bị bỏ."""
+        names = {row["name"] for row in self.db.fetch_all("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn("idx_attendance_sessions_class_id_open", names)
+        self.assertIn("idx_attendance_records_student_code_attendance_time_record_id", names)
+        self.assertNotIn("idx_records_student", names)
+
+    def test_history_queries_avoid_temp_btree(self):
+        """ORDER BY / GROUP BY của các query nóng đi theo index, không sort tạm."""
+        queries = [
+            ("SELECT * FROM attendance_records WHERE student_code = ? ORDER BY attendance_time DESC", ("SV1",)),
+            ("SELECT * FROM attendance_sessions WHERE class_id = ? ORDER BY start_time DESC", ("C1",)),
+            ("SELECT status, COUNT(*) as count FROM attendance_records WHERE session_id = ? GROUP BY status", ("SS1",)),
+        ]
+        for sql, params in queries:
+            self.assertNotIn("TEMP B-TREE", self.plan(sql, params), sql)
+
+    def test_admin_dashboard_counts_use_indexes(self):
+        """Đếm session theo tháng / record theo ngày đọc range trên index, không quét bảng."""
+        plan = self.plan(
+            "SELECT (SELECT COUNT(*) FROM attendance_sessions WHERE start_time >= ? AND start_time < ?), "
+            "(SELECT COUNT(*) FROM attendance_records WHERE attendance_time >= ? AND attendance_time < ?)",
+            ("2024-01-01T00:00:00", "2024-02-01T00:00:00", "2024-01-02T00:00:00", "2024-01-03T00:00:00")
+        )
+        self.assertIn("idx_attendance_sessions_start_time (start_time>? AND start_time<?)", plan)
+        self.assertIn("idx_attendance_records_attendance_time (attendance_time>? AND attendance_time<?)", plan)
+
+    def test_sessions_in_range_for_student_use_index(self):
+        """Sessions trong một khoảng của các lớp sinh viên đọc range (class_id, start_time)."""
+        plan = self.plan(
+            "SELECT s.* FROM classes_student cs JOIN attendance_sessions s ON s.class_id = cs.class_id "
+            "WHERE cs.student_code = ? AND s.start_time >= ? AND s.start_time < ?",
+            ("SV1", "2024-01-01T00:00:00", "2024-01-02T00:00:00")
+        )
+        self.assertIn(
+            "idx_attendance_sessions_class_id_start_time_session_id (class_id=? AND start_time>? AND start_time<?)",
+            plan
+        )
+        self.assertNotIn("SCAN", plan)
+
+    def test_sessions_by_teacher_read_limit_per_class(self):
+        """Sessions của giáo viên: mỗi lớp đọc ngược index (class_id, start_time), không quét bảng."""
+        plan = self.plan(
+            "SELECT s.* FROM classes c JOIN attendance_sessions s ON s.session_id IN ("
+            "SELECT x.session_id FROM attendance_sessions x WHERE x.class_id = c.class_id "
+            "ORDER BY x.start_time DESC, x.session_id DESC LIMIT ?) "
+            "WHERE c.teacher_code = ? ORDER BY s.start_time DESC, s.session_id DESC LIMIT ?",
+            (10, "GV1", 10)
+        )
+        self.assertIn("idx_attendance_sessions_class_id_start_time_session_id (class_id=?)", plan)
+        self.assertNotIn("SCAN", plan)
+
+    def test_expiry_reads_open_sessions_partial_index(self):
+        """Đóng session hết hạn / mốc hết hạn kế tiếp chỉ đọc partial index của session đang mở."""
+        for sql, params in (
+            ("UPDATE attendance_sessions SET status = 'CLOSED' "
+             "WHERE status = 'OPEN' AND end_time < ?", ("2024-01-01T00:00:00",)),
+            ("SELECT MIN(end_time) FROM attendance_sessions WHERE status = 'OPEN'", ()),
+        ):
+            plan = self.plan(sql, params)
+            self.assertIn("idx_attendance_sessions_end_time_open", plan, sql)
+            self.assertNotIn("SCAN", plan, sql)
+
+    def test_open_sessions_use_partial_index(self):
+        """Lọc buổi OPEN theo lớp dùng partial index."""
+        plan = self.plan(
+            "SELECT * FROM attendance_sessions WHERE class_id = ? AND status = 'OPEN'", ("C1",)
+        )
+        self.assertIn("idx_attendance_sessions_class_id_open", plan)
+
+
+
+class TestMigrationRunner(DatabaseTestCase):
+    """Test cases cho versioned migration runner."""
+
+    def setUp(self):
+        super().setUp()
+        self.versions_dir = os.path.join(self.tmp_dir, "versions")
+        shutil.copytree(os.path.join(os.path.dirname(__file__), "..", "data", "migrations", "versions"),
+                        self.versions_dir)
+
+    def write_migration(self, filename, sql):
+        with open(os.path.join(self.versions_dir, filename), "w", encoding="utf-8") as f:
+            f.write(sql)
+
+    def migrate(self):
+        return MigrationRunner(self.db_path, versions_dir=self.versions_dir).migrate(echo=False)
+
+    def columns(self, table):
+        return {row["name"] for row in self.db.fetch_all(f"PRAGMA table_info({table})")}
+
+    def test_split_statements(self):
+        """Tách script theo câu lệnh hoàn chỉnh, bỏ comment."""
+        sql = "-- comment\nCREATE TRIGGER t AFTER INSERT ON classes BEGIN\n  SELECT 1;\nEND;\nDROP TABLE x;"
+        self.assertEqual(len(split_statements(sql)), 2)
+
+    def test_init_is_idempotent_and_keeps_data(self):
+        """Chạy lại init_database không xóa dữ liệu và không áp dụng lại migration."""
+        self.add_class("C1")
+        self.assertEqual(init_database(db_path=self.db_path), [])
+        self.assertEqual(self.count_classes(), 1)
+        versions = [row["version"] for row in self.db.fetch_all("SELECT version FROM schema_migrations")]
+        self.assertEqual(versions[:2], ["000", "001"])
+
+    def test_new_migration_applied_with_online_index(self):
+        """Migration mới: index trên bảng có sẵn được build riêng, index phụ thuộc ADD COLUMN chạy sau."""
+        self.add_class("C1")
+        self.write_migration("900_class_room.sql", (
+            "CREATE INDEX idx_classes_name ON classes(class_name);\n"
+            "ALTER TABLE classes ADD COLUMN room TEXT;\n"
+            "CREATE INDEX idx_classes_room ON classes(room);\n"
+        ))
+        results = self.migrate()
+
+        self.assertEqual([(r.version, r.online_indexes) for r in results], [("900", ["idx_classes_name"])])
+        self.assertIn("room", self.columns("classes"))
+        self.assertIn("idx_classes_room", [row["name"] for row in self.db.fetch_all("PRAGMA index_list(classes)")])
+        self.assertEqual(self.count_classes(), 1)
+        row = self.db.fetch_one("SELECT duration_ms FROM schema_migrations WHERE version = '900'")
+        self.assertGreater(row["duration_ms"], 0)
+        self.assertEqual(self.migrate(), [])
+
+    def test_failed_migration_rolls_back(self):
+        """Migration lỗi được rollback toàn bộ và không được ghi version."""
+        self.write_migration("900_broken.sql", (
+            "ALTER TABLE classes ADD COLUMN room TEXT;\n"
+            "INSERT INTO no_such_table VALUES (1);\n"
+        ))
+        with self.assertRaises(sqlite3.Error):
+            self.migrate()
+        self.assertNotIn("room", self.columns("classes"))
+        self.assertIsNone(self.db.fetch_one("SELECT 1 FROM schema_migrations WHERE version = '900'"))
+
+    def test_edited_or_unknown_migration_rejected(self):
+        """Migration đã chạy bị sửa, hoặc database có version lạ: từ chối chạy."""
+        with open(os.path.join(self.versions_dir, "001_workload_indexes.sql"), "a", encoding="utf-8") as f:
+            f.write("\n-- edited\n")
+        with self.assertRaises(MigrationError):
+            self.migrate()
+
+        self.db.execute("INSERT INTO schema_migrations (version, name, checksum) VALUES ('999', 'future', '')")
+        with self.assertRaises(MigrationError):
+            MigrationRunner(self.db_path).migrate(echo=False)
+
+    def test_existing_database_adopts_baseline(self):
+        """Database tạo trước khi có runner: baseline được đánh dấu, migration sau vẫn chạy."""
+        legacy_path = os.path.join(self.tmp_dir, "legacy.db")
+        legacy = sqlite3.connect(legacy_path)
+        with open(os.path.join(os.path.dirname(__file__), "..", "data", "migrations", "schema.sql"),
+                  encoding="utf-8") as f:
+            legacy.executescript(f.read())
+        legacy.execute("INSERT INTO classes (class_id, class_name, subject_code) VALUES ('C1', 'C', 'S')")
+        legacy.commit()
+        legacy.close()
+
+        results = MigrationRunner(legacy_path, versions_dir=self.versions_dir).migrate(echo=False)
+
+        self.assertTrue(results[0].adopted)
+        self.assertIn("idx_attendance_sessions_class_id_start_time_session_id", results[1].online_indexes)
+        db = Database(legacy_path)
+        try:
+            self.assertEqual(db.fetch_one("SELECT COUNT(*) AS count FROM classes")["count"], 1)
+        finally:
+            db.close()
+
+
+class TestIdGenerator(unittest.TestCase):
+    """Test cases cho ID tăng dần, không trùng (utils.id_generator)."""
+
+    def test_ids_unique_across_threads(self):
+        """8 thread cùng sinh ID: không trùng, trong mỗi thread ID tăng dần."""
+        generator = IdGenerator()
+        per_thread = [[] for _ in range(8)]
+        barrier = threading.Barrier(len(per_thread))
+
+        def generate(out):
+            barrier.wait()
+            out.extend(generator.next_id("REC") for _ in range(50_000))
+
+        threads = [threading.Thread(target=generate, args=(out,)) for out in per_thread]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        all_ids = [i for out in per_thread for i in out]
+        self.assertEqual(len(set(all_ids)), len(all_ids))
+        for out in per_thread:
+            self.assertEqual(out, sorted(out))
+        self.assertEqual({len(i) for i in all_ids}, {24})
+
+    def test_clock_backwards_and_sequence_overflow_stay_monotonic(self):
+        """Đồng hồ lùi hoặc tràn sequence trong một ms: ID vẫn tăng, int và chuỗi cùng thứ tự."""
+        generator = IdGenerator(node=7)
+        clock = [1_700_000_000_000 * 1_000_000]
+        with patch("utils.id_generator.time.time_ns", side_effect=lambda: clock[0]), \
+                patch("utils.id_generator._SEQUENCE_MAX", 3):
+            ids = [generator.next_id() for _ in range(6)]
+            clock[0] -= 5_000_000_000
+            ids += [generator.next_id() for _ in range(3)]
+            ints = [generator.next_int() for _ in range(3)]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ints, sorted(set(ints)))
+
+    def test_nodes_separate_generators(self):
+        """Hai process (node khác nhau) cùng ms không sinh trùng ID."""
+        with patch("utils.id_generator.time.time_ns", return_value=1_700_000_000_000 * 1_000_000):
+            first, second = IdGenerator(node=1), IdGenerator(node=2)
+            a = [first.next_id() for _ in range(3)]
+            b = [second.next_id() for _ in range(3)]
+        self.assertEqual(len(set(a) | set(b)), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
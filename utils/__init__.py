@@ -6,6 +6,7 @@ Package chứa các helper functions:
 - validators.py: Input validation
 - formatters.py: Date, time, string formatters
 - helpers.py: General utilities
+- id_generator.py: Sortable, collision-free IDs (session, record)
 - logger.py: Logging configuration
 
 Cách sử dụng:
@@ -0,0 +1,154 @@
+"""
+ID Generator - Sinh ID tăng dần, không trùng
+============================================
+
+ID dạng Snowflake/ULID cho session và record: prefix + 21 ký tự Crockford
+base32, mỗi phần được mã hóa riêng với độ dài cố định:
+
+    | 10 ký tự timestamp (ms) | 6 ký tự node (30 bit) | 5 ký tự sequence (25 bit) |
+
+- timestamp: mili giây Unix, không bao giờ lùi (đồng hồ lùi -> giữ ms cũ)
+- node: mỗi process một giá trị (22 bit PID + 8 bit ngẫu nhiên), tạo lại
+  sau fork, nên hai process chạy cùng lúc không sinh trùng ID
+- sequence: đếm trong cùng mili giây; tràn 2^25 thì mượn mili giây kế tiếp
+
+ID có độ dài cố định nên so sánh chuỗi = so sánh thời điểm sinh (trong một
+process ID tăng nghiêm ngặt).
+
+Cách sử dụng:
+    from utils.id_generator import new_id
+
+    session_id = new_id("SS")    # 'SS01HQ3K5V8R0BPN4W2C0000000'
+    record_id = new_id("REC")
+"""
+
+import os
+import secrets
+import threading
+import time
+from typing import Optional, Tuple
+
+# Crockford base32 (không có I, L, O, U), thứ tự ký tự = thứ tự giá trị
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# Mọi cặp ký tự: mã hóa 10 bit mỗi lần tra
+_PAIRS = [a + b for a in _ALPHABET for b in _ALPHABET]
+
+_NODE_BITS = 30
+_SEQUENCE_BITS = 25
+_SEQUENCE_MAX = (1 << _SEQUENCE_BITS) - 1
+
+
+def _encode(value: int, length: int) -> str:
+    """Mã hóa value thành đúng `length` ký tự base32 (bit cao trước)."""
+    return "".join(_ALPHABET[(value >> (5 * i)) & 31] for i in reversed(range(length)))
+
+
+def _process_node() -> int:
+    """Node của process hiện tại: 22 bit PID + 8 bit ngẫu nhiên."""
+    return ((os.getpid() & 0x3FFFFF) << 8) | secrets.randbits(8)
+
+
+class IdGenerator:
+    """
+    Sinh ID tăng dần, không trùng, an toàn khi dùng từ nhiều thread.
+
+    Example:
+        >>> generator = IdGenerator()
+        >>> a, b = generator.next_id("REC"), generator.next_id("REC")
+        >>> a < b
+        True
+    """
+
+    def __init__(self, node: Optional[int] = None):
+        """
+        Khởi tạo generator.
+
+        Args:
+            node: Node cố định 30 bit (mặc định: theo process, tạo lại sau fork)
+        """
+        if node is not None and not 0 <= node < (1 << _NODE_BITS):
+            raise ValueError(f"node must fit in {_NODE_BITS} bits")
+        self._fixed_node = node
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+        self._set_node(node if node is not None else _process_node())
+
+    def _set_node(self, node: int) -> None:
+        self.node = node
+        self._node_chars = _encode(node, 6)
+        # (ms, timestamp + node đã mã hóa) của ms gần nhất; một attribute để
+        # thread khác không đọc ms mới cùng chuỗi cũ
+        self._head = (-1, "")
+
+    def _reset_after_fork(self) -> None:
+        """Process con: node mới, lock mới (lock của process cha có thể đang bị giữ)."""
+        self._lock = threading.Lock()
+        if self._fixed_node is None:
+            self._set_node(_process_node())
+
+    def _next(self) -> Tuple[int, int]:
+        """(ms, sequence) kế tiếp, lớn hơn mọi cặp đã trả về."""
+        now_ms = time.time_ns() // 1_000_000
+        with self._lock:
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            elif self._sequence < _SEQUENCE_MAX:
+                self._sequence += 1
+            else:
+                # Tràn sequence (hoặc đồng hồ lùi đúng lúc tràn): mượn mili giây kế tiếp
+                self._last_ms += 1
+                self._sequence = 0
+            return self._last_ms, self._sequence
+
+    def next_int(self) -> int:
+        """
+        Sinh ID dạng số nguyên (timestamp | node | sequence).
+
+        Returns:
+            Số nguyên lớn hơn mọi giá trị đã sinh trước đó bởi generator này
+        """
+        ms, sequence = self._next()
+        return (((ms << _NODE_BITS) | self.node) << _SEQUENCE_BITS) | sequence
+
+    def next_id(self, prefix: str = "") -> str:
+        """
+        Sinh ID dạng chuỗi.
+
+        Args:
+            prefix: Tiền tố loại entity (VD: "SS", "REC")
+
+        Returns:
+            prefix + 21 ký tự Crockford base32
+        """
+        ms, sequence = self._next()
+        head_ms, head = self._head
+        if head_ms != ms:
+            head = _encode(ms, 10) + self._node_chars
+            self._head = (ms, head)
+        return (prefix + head + _PAIRS[sequence >> 15] + _PAIRS[(sequence >> 5) & 1023]
+                + _ALPHABET[sequence & 31])
+
+
+_default_generator = IdGenerator()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_default_generator._reset_after_fork)
+
+
+def new_id(prefix: str = "") -> str:
+    """
+    Sinh ID mới từ generator dùng chung của process.
+
+    Args:
+        prefix: Tiền tố loại entity (VD: "SS", "REC")
+
+    Returns:
+        ID tăng dần, không trùng
+
+    Example:
+        >>> new_id("REC")
+        'REC01HQ3K5V8R0BPN4W2C00000'
+    """
+    return _default_generator.next_id(prefix)
@@ -10,6 +10,7 @@ import customtkinter as ctk
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 import tkinter as tk
+from tkinter import filedialog, messagebox
 
 from views.styles.theme import COLORS, FONTS, SPACING, RADIUS
 from services import StudentService
@@ -45,6 +46,9 @@ class HistoryPage(ctk.CTkFrame):
         self.current_page = 1
         self.items_per_page = 10
         self.total_records = 0
+        # Cursor (keyset) của từng trang đã xem: _page_cursors[i] mở trang i + 1
+        self._page_cursors = [None]
+        self._has_more = False
         
         # Layout
         self.content_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -241,7 +245,7 @@ class HistoryPage(ctk.CTkFrame):
     def _on_search(self):
         query = self.search_entry.get()
         self.current_filters["search_query"] = query
-        self.current_page = 1 # Reset to first page
+        self._reset_paging()
         self.refresh_data()
 
     def _on_sort(self, sort_key):
@@ -254,6 +258,7 @@ class HistoryPage(ctk.CTkFrame):
             self.current_filters["sort_by"] = sort_key
             self.current_filters["sort_order"] = "asc" # Default for new sort
             
+        self._reset_paging()
         self.refresh_data()
 
     def _show_filter_dialog(self):
@@ -275,12 +280,33 @@ class HistoryPage(ctk.CTkFrame):
         btn_text = f"Filter: {new_status}" if new_status else "Filter"
         self.filter_btn.configure(text=f" Y  {btn_text}")
         
+        self._reset_paging()
         self.refresh_data()
 
+    def _reset_paging(self):
+        # Filter/sort thay đổi -> cursor cũ không còn hợp lệ
+        self.current_page = 1
+        self._page_cursors = [None]
+
     def _export_data(self):
-        # Placeholder for export functionality
-        print("Exporting data...")
-        # Could show a success toast here
+        if not self.student_service:
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")],
+            initialfile=f"attendance_{self.student_code}.csv"
+        )
+        if not filename:
+            return
+        
+        try:
+            count = self.student_service.export_attendance_history(self.student_code, filename)
+            print(f"📥 Exported {count} records to {filename}")
+            messagebox.showinfo("Export Data", f"Exported {count} records")
+        except Exception as e:
+            print(f"Error exporting history: {e}")
+            messagebox.showerror("Export Data", f"Export failed: {e}")
 
     def refresh_data(self):
         # Reset UI
@@ -294,30 +320,34 @@ class HistoryPage(ctk.CTkFrame):
             # Fetch data using controller implementation directly calling service here for simplicity
             # In pure MVC, controller should be calling this update, or via observer
             # We will use the service directly as passed in init
-           
-            history = self.student_service.get_attendance_history(
+            # Only the visible page is fetched; total is counted once per filter (first page)
+            page = self.student_service.get_attendance_history(
                 student_code=self.student_code,
                 search_query=self.current_filters["search_query"],
                 status=self.current_filters["status"],
                 sort_by=self.current_filters["sort_by"],
-                sort_order=self.current_filters["sort_order"]
+                sort_order=self.current_filters["sort_order"],
+                cursor=self._page_cursors[self.current_page - 1],
+                limit=self.items_per_page,
+                include_total=(self.current_page == 1)
             )
             
-            self.total_records = len(history)
-            
-            # Pagination Logic
-            start_idx = (self.current_page - 1) * self.items_per_page
-            end_idx = start_idx + self.items_per_page
-            page_data = history[start_idx:end_idx]
+            if page.total is not None:
+                self.total_records = page.total
+            self._has_more = page.has_more
+            if self._has_more and len(self._page_cursors) == self.current_page:
+                self._page_cursors.append(page.next_key)
+            page_data = page.items
             
             # Update Footer
+            end_idx = (self.current_page - 1) * self.items_per_page + len(page_data)
             self.record_count_label.configure(
-                text=f"Showing {min(end_idx, self.total_records)} of {self.total_records} records"
+                text=f"Showing {end_idx} of {self.total_records} records"
             )
             
             # Enable/Disable buttons
             self.prev_btn.configure(state="normal" if self.current_page > 1 else "disabled")
-            self.next_btn.configure(state="normal" if end_idx < self.total_records else "disabled")
+            self.next_btn.configure(state="normal" if self._has_more else "disabled")
 
             # Render Rows
             if not page_data:
@@ -410,7 +440,6 @@ class HistoryPage(ctk.CTkFrame):
             self.refresh_data()
 
     def _next_page(self):
-        start_idx = self.current_page * self.items_per_page
-        if start_idx < self.total_records:
+        if self._has_more:
             self.current_page += 1
             self.refresh_data()
@@ -52,13 +52,15 @@ class SessionManagementPage(ctk.CTkFrame):
             # Sort by start_time desc
             raw_sessions.sort(key=lambda x: x.start_time, reverse=True)
             
+            # 3. Stats của mọi session trong một lần (không query theo từng session)
+            reports = self.controller.get_session_reports(self.teacher, [s.session_id for s in raw_sessions])
+            
             self.recent_sessions = []
             for s in raw_sessions:
                 c = class_map.get(s.class_id)
                 course_name = c.class_name if c else s.class_id
                 
-                # Get stats (n+1 but acceptable for small list)
-                report = self.controller.get_session_report(self.teacher, s.session_id)
+                report = reports.get(s.session_id)
                 current = report.get('present_count', 0) if report else 0
                 max_count = report.get('total_students', 0) if report else 0
                 